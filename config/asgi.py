@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Le processus ASGI (uvicorn) ne sert que les flux Server-Sent Events (ASGI_PATHS);
+le reste de l'application tourne en WSGI (gunicorn, config/wsgi.py): sous ASGI, Django
+lit tout le corps de la requête avant la vue et met en mémoire les réponses itérées
+en synchrone (exports).
 """
 
 import os
@@ -12,5 +17,21 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Pas de connexions persistantes sous ASGI (chaque requête peut changer de thread)
+os.environ['DB_CONN_MAX_AGE'] = '0'
+
+django_application = get_asgi_application()
+
+ASGI_PATHS = ('/api/jobs/events/',)
+
 
-application = get_asgi_application()
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] not in ASGI_PATHS:
+        await send({
+            'type': 'http.response.start',
+            'status': 404,
+            'headers': [(b'content-type', b'application/json')],
+        })
+        await send({'type': 'http.response.body', 'body': b'{"error": "Not found"}'})
+        return
+    await django_application(scope, receive, send)
@@ -0,0 +1,61 @@
+"""
+Routeur de base de données primaire / réplica.
+
+Les écritures vont toujours sur 'default'. Les lectures (listings, admin,
+catalogue) vont sur l'alias 'replica' s'il est configuré dans DATABASES.
+Le bloc `use_primary()` force les lectures sur le primaire quand on a besoin
+de lire ce qu'on vient d'écrire (lag de réplication).
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY_DB = 'default'
+REPLICA_DB = 'replica'
+
+_state = threading.local()
+
+
+@contextmanager
+def use_primary():
+    """Forcer les lectures sur le primaire dans ce bloc"""
+    depth = getattr(_state, 'pin_depth', 0)
+    _state.pin_depth = depth + 1
+    try:
+        yield
+    finally:
+        _state.pin_depth = depth
+
+
+def replica_available():
+    """Indique si un alias réplica est déclaré dans les settings"""
+    return REPLICA_DB in settings.DATABASES
+
+
+class PrimaryReplicaRouter:
+    """Envoie les lectures sur le réplica et les écritures sur le primaire"""
+
+    def db_for_read(self, model, **hints):
+        if not replica_available() or getattr(_state, 'pin_depth', 0):
+            return PRIMARY_DB
+        # Dans une transaction ouverte sur le primaire, on lit nos propres écritures
+        if connections[PRIMARY_DB].in_atomic_block:
+            return PRIMARY_DB
+        # Un objet déjà chargé depuis le primaire reste sur le primaire (relations)
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == PRIMARY_DB:
+            return PRIMARY_DB
+        return REPLICA_DB
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaire et réplica contiennent les mêmes données
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Le réplica reçoit le schéma par réplication, jamais par migrate
+        return db == PRIMARY_DB
@@ -42,14 +42,30 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
-    'drf_spectacular',
     
     # Apps du projet
     'core',
     'media',
 ]
 
+# Schéma OpenAPI:
+# - 'dynamic' (défaut): généré par drf_spectacular, Swagger UI et Redoc disponibles
+# - 'static' (production): fichier pré-généré au build (manage.py build_api_schema),
+#   drf_spectacular n'est ni chargé ni exécuté par les workers
+API_SCHEMA_MODE = os.getenv('API_SCHEMA_MODE', 'dynamic')
+API_SCHEMA_FILE = Path(os.getenv('API_SCHEMA_FILE', BASE_DIR / 'schema' / 'openapi.json'))
+
+if API_SCHEMA_MODE == 'dynamic':
+    INSTALLED_APPS.append('drf_spectacular')
+
+# Compression des réponses par Django (désactiver si le reverse proxy compresse déjà)
+API_GZIP = os.getenv('API_GZIP', 'true').lower() == 'true'
+
 MIDDLEWARE = [
+    # En premier: les probes ne traversent ni sessions, ni CSRF, ni DRF
+    'core.middleware.HealthProbeMiddleware',
+    # Compression gzip des réponses texte / JSON (API_GZIP)
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,11 +93,18 @@ TEMPLATES = [
 ]
 
 # REST_FRAMEWORK
+# API_JSON_RENDERER=orjson: sérialisation JSON via orjson (repli automatique si non installé)
+API_JSON_RENDERER = os.getenv('API_JSON_RENDERER', 'orjson')
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'media.renderers.FastJSONRenderer' if API_JSON_RENDERER == 'orjson' else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
+if API_SCHEMA_MODE == 'dynamic':
+    REST_FRAMEWORK['DEFAULT_SCHEMA_CLASS'] = 'drf_spectacular.openapi.AutoSchema'
 
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Media Project API',
@@ -97,12 +120,74 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# DB_ENGINE=postgres active le backend PostgreSQL (service media-psql du docker-compose).
+# Sans variable d'environnement, on garde SQLite pour le développement local.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+# Connexions persistantes: durée de vie (secondes) d'une connexion réutilisée entre requêtes.
+# Ignoré quand DB_POOL est actif (Django interdit pool + CONN_MAX_AGE).
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+DB_POOL = os.getenv('DB_POOL', 'false').lower() == 'true'
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '2'))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+# Derrière PgBouncer en mode transaction, les curseurs serveur ne survivent pas
+# entre deux transactions: il faut les désactiver.
+DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', 'false').lower() == 'true'
+
+
+def _postgres_database(prefix):
+    """Construire la configuration PostgreSQL à partir des variables <prefix>_*"""
+    options = {
+        # Le schéma "media" est créé par docker_ressources/init.sql
+        'options': f"-c search_path={os.getenv(f'{prefix}_SCHEMA', 'media')},public",
+    }
+    if DB_POOL:
+        options['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+        }
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv(f'{prefix}_NAME', 'media'),
+        'USER': os.getenv(f'{prefix}_USER', 'media'),
+        'PASSWORD': os.getenv(f'{prefix}_PASSWORD', 'media'),
+        'HOST': os.getenv(f'{prefix}_HOST', 'media-psql'),
+        'PORT': os.getenv(f'{prefix}_PORT', '5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': DB_PGBOUNCER,
+        'OPTIONS': options,
+    }
+
+
+def _sqlite_database(name):
+    return {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': BASE_DIR / name,
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
     }
-}
+
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {'default': _postgres_database('DB')}
+else:
+    DATABASES = {'default': _sqlite_database(os.getenv('DB_NAME', 'db.sqlite3'))}
+
+# Réplica en lecture seule (optionnel): DB_REPLICA_HOST / DB_REPLICA_NAME, ou DB_REPLICA=true.
+# Avec SQLite il n'y a pas de réplication: l'alias 'replica' ouvre le fichier du primaire, ce qui
+# suffit pour exercer le routeur en local (un autre fichier n'aurait aucune table, migrate ne
+# s'applique qu'à 'default', voir PrimaryReplicaRouter.allow_migrate).
+DB_REPLICA = os.getenv('DB_REPLICA', 'false').lower() == 'true'
+if DB_REPLICA or os.getenv('DB_REPLICA_HOST') or os.getenv('DB_REPLICA_NAME'):
+    if DB_ENGINE == 'postgres':
+        DATABASES['replica'] = _postgres_database('DB_REPLICA')
+    else:
+        DATABASES['replica'] = _sqlite_database(os.getenv('DB_NAME', 'db.sqlite3'))
+    # En test, le réplica pointe sur la base de test du primaire
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['config.db_router.PrimaryReplicaRouter']
 
 
 # Password validation
@@ -156,3 +241,163 @@ AUTH_USER_MODEL = 'core.User'
 IMAGEKIT_API_KEY = os.getenv('IMAGEKIT_API_KEY', '')
 IMAGEKIT_PUBLIC_KEY = os.getenv('IMAGEKIT_PUBLIC_KEY', '')
 IMAGEKIT_URL_ENDPOINT = os.getenv('IMAGEKIT_URL_ENDPOINT', '')
+# Upload direct navigateur -> ImageKit: validité du token (s, max 3600 côté ImageKit)
+IMAGEKIT_UPLOAD_TOKEN_TTL = int(os.getenv('IMAGEKIT_UPLOAD_TOKEN_TTL', '600'))
+# Délai (s) après expiration du token pendant lequel la finalisation reste acceptée (uploads longs)
+IMAGEKIT_UPLOAD_COMPLETE_GRACE = int(os.getenv('IMAGEKIT_UPLOAD_COMPLETE_GRACE', '3600'))
+
+# ============ STORAGE ============
+# Backend des nouveaux fichiers (upload, renditions): 'imagekit' ou 'local' (media.services.storage)
+MEDIA_STORAGE_BACKEND = os.getenv('MEDIA_STORAGE_BACKEND', 'imagekit')
+MEDIA_STORAGE_BACKENDS = {
+    'imagekit': 'media.services.storage.ImageKitStorage',
+    'local': 'media.services.storage.LocalStorage',
+}
+# Stockage local adressé par contenu (objects/ab/cd/<sha256>), servi sous LOCAL_STORAGE_URL
+LOCAL_STORAGE_ROOT = os.getenv('LOCAL_STORAGE_ROOT', str(BASE_DIR / 'storage'))
+LOCAL_STORAGE_URL = os.getenv('LOCAL_STORAGE_URL', '/api/files/')
+# Livraison des fichiers locaux (media.services.delivery): 'django' (FileResponse, sendfile en WSGI),
+# 'x-accel-redirect' (nginx: location interne ACCEL_PREFIX -> alias LOCAL_STORAGE_ROOT) ou 'x-sendfile'
+MEDIA_DELIVERY_MODE = os.getenv('MEDIA_DELIVERY_MODE', 'django')
+MEDIA_DELIVERY_ACCEL_PREFIX = os.getenv('MEDIA_DELIVERY_ACCEL_PREFIX', '/protected-storage/')
+# Durée de cache (s) de GET /api/media/<uuid>/file/ (réponse privée)
+MEDIA_DELIVERY_MAX_AGE = int(os.getenv('MEDIA_DELIVERY_MAX_AGE', '3600'))
+
+# ============ MEDIA SETTINGS ============
+# Upload via Django (media.upload_handlers): taille maximale et types réels acceptés
+# (type déterminé par la signature du fichier, pas par le Content-Type envoyé)
+UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', str(10 * 1024 * 1024)))
+UPLOAD_ALLOWED_MIME_TYPES = os.getenv(
+    'UPLOAD_ALLOWED_MIME_TYPES',
+    'image/jpeg,image/png,image/gif,image/webp,image/avif,image/heic,image/heif,'
+    'video/mp4,video/quicktime,video/webm,audio/mpeg,audio/mp4,audio/wav,audio/ogg,audio/flac,'
+    'application/pdf',
+).split(',')
+# Quota de stockage par uploader en octets (0 = illimité)
+MEDIA_QUOTA_BYTES = int(os.getenv('MEDIA_QUOTA_BYTES', '0'))
+
+# Jobs de conversion / compression d'images (media.jobs.conversion)
+MEDIA_CONVERSION_FORMATS = os.getenv('MEDIA_CONVERSION_FORMATS', 'avif,webp').split(',')
+MEDIA_CONVERSION_QUALITY = {
+    'avif': int(os.getenv('MEDIA_AVIF_QUALITY', '50')),
+    'webp': int(os.getenv('MEDIA_WEBP_QUALITY', '80')),
+    'jpeg': int(os.getenv('MEDIA_JPEG_QUALITY', '82')),
+}
+# Largeurs des renditions générées (0 = taille d'origine); les largeurs >= l'original sont ignorées
+MEDIA_RENDITION_WIDTHS = [int(w) for w in os.getenv('MEDIA_RENDITION_WIDTHS', '0,320,640,1280').split(',')]
+# Processus du pool de transcodage (0 = nombre de CPU)
+MEDIA_CONVERSION_WORKERS = int(os.getenv('MEDIA_CONVERSION_WORKERS', '0'))
+
+# Jobs de transcription (media.jobs.transcription)
+# Reconnaisseur: chemin d'une sous-classe de media.services.transcription.Recognizer
+MEDIA_TRANSCRIPTION_RECOGNIZER = os.getenv(
+    'MEDIA_TRANSCRIPTION_RECOGNIZER', 'media.services.transcription.WhisperRecognizer'
+)
+MEDIA_TRANSCRIPTION_MODEL = os.getenv('MEDIA_TRANSCRIPTION_MODEL', 'base')
+# Découpage en segments de SEGMENT secondes, recouvrement de OVERLAP secondes entre voisins
+MEDIA_TRANSCRIPTION_SEGMENT_SECONDS = float(os.getenv('MEDIA_TRANSCRIPTION_SEGMENT_SECONDS', '30'))
+MEDIA_TRANSCRIPTION_OVERLAP_SECONDS = float(os.getenv('MEDIA_TRANSCRIPTION_OVERLAP_SECONDS', '2'))
+MEDIA_TRANSCRIPTION_SAMPLE_RATE = 16000
+# Processus du pool de transcription (0 = nombre de CPU)
+MEDIA_TRANSCRIPTION_WORKERS = int(os.getenv('MEDIA_TRANSCRIPTION_WORKERS', '0'))
+
+# Pipelines de jobs créés à l'upload (media.jobs.pipelines): {file_type: {job_type: [dépendances]}}
+# Un job démarre dès que toutes ses dépendances sont terminées
+MEDIA_JOB_PIPELINES = {
+    'image': {'metadata': [], 'thumbnail': ['metadata'], 'conversion': ['metadata']},
+    'video': {'metadata': [], 'thumbnail': ['metadata'], 'transcription': ['thumbnail']},
+    'audio': {'metadata': [], 'transcription': ['metadata']},
+}
+# Largeur des miniatures générées par le job 'thumbnail'
+MEDIA_THUMBNAIL_WIDTH = int(os.getenv('MEDIA_THUMBNAIL_WIDTH', '320'))
+
+# Nouvelles tentatives des MediaJob (media.jobs.registry): délai exponentiel BASE * 2^(n-1) plafonné
+# à MAX secondes; au-delà de MAX_ATTEMPTS tentatives le job passe 'dead' (dead-letter)
+MEDIA_JOB_MAX_ATTEMPTS = int(os.getenv('MEDIA_JOB_MAX_ATTEMPTS', '5'))
+MEDIA_JOB_RETRY_BASE_DELAY = float(os.getenv('MEDIA_JOB_RETRY_BASE_DELAY', '30'))
+MEDIA_JOB_RETRY_MAX_DELAY = float(os.getenv('MEDIA_JOB_RETRY_MAX_DELAY', '3600'))
+# Bail d'un job réservé: sans heartbeat du worker pendant LEASE_SECONDS, le job est repris
+MEDIA_JOB_LEASE_SECONDS = float(os.getenv('MEDIA_JOB_LEASE_SECONDS', '300'))
+
+# Rétention des MediaJob (manage.py archive_media_jobs): les jobs terminés depuis plus de
+# RETENTION_DAYS jours passent dans MediaJobsArchive, conservés ARCHIVE_KEEP_DAYS jours (0 = toujours)
+MEDIA_JOB_RETENTION_DAYS = int(os.getenv('MEDIA_JOB_RETENTION_DAYS', '30'))
+MEDIA_JOB_ARCHIVE_KEEP_DAYS = int(os.getenv('MEDIA_JOB_ARCHIVE_KEEP_DAYS', '0'))
+MEDIA_JOB_ARCHIVE_BATCH_SIZE = int(os.getenv('MEDIA_JOB_ARCHIVE_BATCH_SIZE', '1000'))
+
+# Suppression différée (manage.py run_deletions): médias purgés par lots de BATCH_SIZE
+DELETION_BATCH_SIZE = int(os.getenv('DELETION_BATCH_SIZE', '100'))
+DELETION_MAX_ATTEMPTS = int(os.getenv('DELETION_MAX_ATTEMPTS', '5'))
+# Délai avant la tentative suivante d'une demande en échec: BASE_DELAY * 2^(tentatives-1), plafonné à MAX
+DELETION_RETRY_BASE_DELAY = float(os.getenv('DELETION_RETRY_BASE_DELAY', '60'))
+DELETION_RETRY_MAX_DELAY = float(os.getenv('DELETION_RETRY_MAX_DELAY', '3600'))
+# Purge ImageKit: fileIds par appel (max 100 côté ImageKit) et appels simultanés
+IMAGEKIT_BULK_DELETE_SIZE = int(os.getenv('IMAGEKIT_BULK_DELETE_SIZE', '100'))
+IMAGEKIT_PURGE_CONCURRENCY = int(os.getenv('IMAGEKIT_PURGE_CONCURRENCY', '4'))
+
+# Compteurs de vues / téléchargements (media.services.counters): incréments agrégés en mémoire
+# ou dans Redis, écrits dans MediaCounters toutes les FLUSH_INTERVAL secondes (0 = pas de thread de fond)
+MEDIA_COUNTER_FLUSH_INTERVAL = float(os.getenv('MEDIA_COUNTER_FLUSH_INTERVAL', '10'))
+MEDIA_COUNTER_FLUSH_BATCH_SIZE = int(os.getenv('MEDIA_COUNTER_FLUSH_BATCH_SIZE', '500'))
+
+# ============ SEARCH ============
+# Configuration plein texte PostgreSQL ('simple' = pas de stemming, adapté aux noms de fichiers)
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', 'simple')
+# Nombre maximum de valeurs renvoyées pour la facette tags
+SEARCH_MAX_TAG_FACETS = int(os.getenv('SEARCH_MAX_TAG_FACETS', '20'))
+
+# ============ JOB EVENTS (SSE) ============
+# Commentaire keep-alive envoyé après HEARTBEAT secondes sans événement
+JOB_EVENTS_HEARTBEAT_SECONDS = float(os.getenv('JOB_EVENTS_HEARTBEAT_SECONDS', '15'))
+# Événements en attente par client avant de perdre les plus anciens (client lent)
+JOB_EVENTS_QUEUE_SIZE = int(os.getenv('JOB_EVENTS_QUEUE_SIZE', '100'))
+# Nombre maximum d'ids (job / media) suivis par connexion
+JOB_EVENTS_MAX_TOPICS = int(os.getenv('JOB_EVENTS_MAX_TOPICS', '50'))
+
+# ============ WEBHOOKS ============
+# Sources acceptées sur /api/webhooks/<source>/ (une source sans secret est refusée)
+WEBHOOK_SOURCES = {
+    'imagekit': {
+        'secret': os.getenv('IMAGEKIT_WEBHOOK_SECRET', ''),
+        'signature_header': 'HTTP_X_IK_SIGNATURE',
+    },
+    'transcoder': {
+        'secret': os.getenv('TRANSCODER_WEBHOOK_SECRET', ''),
+        'signature_header': 'HTTP_X_WEBHOOK_SIGNATURE',
+    },
+}
+# Écart maximal (secondes) entre l'horodatage signé et la réception (anti-rejeu)
+WEBHOOK_SIGNATURE_TOLERANCE = int(os.getenv('WEBHOOK_SIGNATURE_TOLERANCE', '300'))
+# Tentatives de traitement avant de passer un événement en 'failed'
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv('WEBHOOK_MAX_ATTEMPTS', '5'))
+# Délai avant la tentative suivante d'un événement en échec: BASE_DELAY * 2^(tentatives-1), plafonné à MAX
+WEBHOOK_RETRY_BASE_DELAY = float(os.getenv('WEBHOOK_RETRY_BASE_DELAY', '10'))
+WEBHOOK_RETRY_MAX_DELAY = float(os.getenv('WEBHOOK_RETRY_MAX_DELAY', '1800'))
+
+# ============ REDIS ============
+# Ex: redis://:media@media-redis:6379/0 (vide = fonctionnalités Redis en mémoire)
+REDIS_URL = os.getenv('REDIS_URL', '')
+
+# ============ UPLOAD ADMISSION CONTROL ============
+# Token buckets: RATE = jetons par seconde (0 = pas de limite), BURST = capacité du bucket
+UPLOAD_USER_RATE = float(os.getenv('UPLOAD_USER_RATE', '0.5'))
+UPLOAD_USER_BURST = int(os.getenv('UPLOAD_USER_BURST', '10'))
+UPLOAD_IP_RATE = float(os.getenv('UPLOAD_IP_RATE', '1'))
+UPLOAD_IP_BURST = int(os.getenv('UPLOAD_IP_BURST', '20'))
+# Sans Redis, buckets en mémoire par processus (limites effectives multipliées par le nombre de workers),
+# au plus ce nombre de clés par processus (les moins récemment utilisées sont évincées)
+UPLOAD_MEMORY_BUCKET_MAX_KEYS = int(os.getenv('UPLOAD_MEMORY_BUCKET_MAX_KEYS', '100000'))
+# Nombre maximum d'uploads en cours (tous workers si Redis, sinon par processus)
+UPLOAD_MAX_IN_FLIGHT = int(os.getenv('UPLOAD_MAX_IN_FLIGHT', '16'))
+# Durée au-delà de laquelle une place non rendue (worker mort) est libérée: > timeout ImageKit (60s)
+UPLOAD_IN_FLIGHT_TTL = int(os.getenv('UPLOAD_IN_FLIGHT_TTL', '120'))
+
+# ============ HEALTH PROBES ============
+# Servies par core.middleware.HealthProbeMiddleware
+HEALTH_LIVENESS_PATHS = ['/api/healthcheck/', '/healthz']
+HEALTH_READINESS_PATHS = ['/api/readiness/', '/readyz']
+# Intervalle (secondes) des vérifications de fond DB / Redis / ImageKit
+HEALTH_CHECK_INTERVAL = float(os.getenv('HEALTH_CHECK_INTERVAL', '5'))
+HEALTH_CHECK_TIMEOUT = float(os.getenv('HEALTH_CHECK_TIMEOUT', '1'))
+# Vérifications qui rendent le pod "not ready" en cas d'échec (les autres sont seulement signalées)
+HEALTH_CRITICAL_CHECKS = ['database', 'redis']
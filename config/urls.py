@@ -14,14 +14,15 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from core.views import (
     HealthCheckView, 
     VersionView, 
     PingView,
+    StaticSchemaView,
 )
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
 urlpatterns = [
     # Core endpoints
@@ -33,12 +34,22 @@ urlpatterns = [
     # Include media app URLs
     path('api/', include('media.urls')),
 
-    # API Schema Documentation
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc-ui'),
-
 
     # Admin
     path('admin/', admin.site.urls),
 ]
+
+# API Schema Documentation
+if settings.API_SCHEMA_MODE == 'dynamic':
+    # Import local: drf_spectacular n'est chargé qu'en mode dynamique
+    from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+
+    urlpatterns += [
+        path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+        path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+        path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc-ui'),
+    ]
+else:
+    urlpatterns += [
+        path('api/schema/', StaticSchemaView.as_view(), name='schema'),
+    ]
@@ -11,6 +11,8 @@ class UserAdmin(BaseUserAdmin):
     search_fields = ['username', 'email', 'uuid']
     readonly_fields = ['uuid', 'created_at', 'updated_at']
     ordering = ['-created_at']
+    # Hérité de BaseUserAdmin (groups / user_permissions): absents de User, sans PermissionsMixin
+    filter_horizontal = ()
     
     fieldsets = (
         (None, {'fields': ('uuid', 'email', 'username', 'password')}),
@@ -25,6 +27,20 @@ class UserAdmin(BaseUserAdmin):
         }),
     )
 
+    # Suppression différée (media/services/deletion.py): le compte est désactivé tout de suite,
+    # ses données sont purgées en arrière-plan; la confirmation ne parcourt pas la cascade
+    def get_deleted_objects(self, objs, request):
+        return [str(obj) for obj in objs], {}, set(), []
+
+    def delete_model(self, request, obj):
+        from media.services.deletion import request_user_deletion
+        request_user_deletion(obj, requested_by=request.user)
+
+    def delete_queryset(self, request, queryset):
+        from media.services.deletion import request_user_deletion
+        for user in queryset:
+            request_user_deletion(user, requested_by=request.user)
+
 
 @admin.register(Role)
 class RoleAdmin(admin.ModelAdmin):
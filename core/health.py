@@ -0,0 +1,127 @@
+"""
+Vérifications de disponibilité (readiness) des dépendances: base de données, Redis, ImageKit.
+
+Les vérifications tournent dans un thread d'arrière-plan toutes les
+HEALTH_CHECK_INTERVAL secondes; les probes ne lisent que le dernier résultat
+en cache. La fréquence de polling de l'orchestrateur n'a donc aucun effet
+sur la charge des dépendances.
+"""
+import logging
+import socket
+import threading
+import time
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def check_database():
+    """SELECT 1 sur chaque alias configuré (primaire et réplica)"""
+    for alias in connections:
+        conn = connections[alias]
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        finally:
+            # Le thread de fond ne garde pas de connexion ouverte entre deux vérifications
+            conn.close()
+
+
+def check_redis():
+    """PING Redis si REDIS_URL est configuré"""
+    if not settings.REDIS_URL:
+        return
+    import redis
+    client = redis.Redis.from_url(
+        settings.REDIS_URL,
+        socket_timeout=settings.HEALTH_CHECK_TIMEOUT,
+        socket_connect_timeout=settings.HEALTH_CHECK_TIMEOUT,
+    )
+    try:
+        client.ping()
+    finally:
+        client.close()
+
+
+def check_imagekit():
+    """Connexion TCP vers l'API d'upload ImageKit (pas de requête authentifiée)"""
+    from media.services.imagekit_service import ImageKitUploadService
+    host = urlparse(ImageKitUploadService.UPLOAD_URL).hostname
+    socket.create_connection((host, 443), timeout=settings.HEALTH_CHECK_TIMEOUT).close()
+
+
+CHECKS = {
+    'database': check_database,
+    'redis': check_redis,
+    'imagekit': check_imagekit,
+}
+
+
+class ReadinessChecker:
+    """Exécute les vérifications en arrière-plan et garde le dernier résultat en cache"""
+
+    def __init__(self, checks=None, interval=None):
+        self.checks = checks or CHECKS
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._result = None
+
+    def _run_checks(self):
+        results = {}
+        for name, check in self.checks.items():
+            started = time.monotonic()
+            try:
+                check()
+                results[name] = {'status': 'ok'}
+            except Exception as exc:
+                results[name] = {'status': 'error', 'error': str(exc)}
+            results[name]['duration_ms'] = round((time.monotonic() - started) * 1000, 1)
+            self._log_transition(name, results[name])
+        # Seules les dépendances critiques rendent le pod "not ready";
+        # une panne ImageKit est signalée sans retirer tous les pods du load balancer.
+        ready = all(
+            r['status'] == 'ok' for name, r in results.items()
+            if name in settings.HEALTH_CRITICAL_CHECKS
+        )
+        return {'status': 'ok' if ready else 'error', 'checked_at': time.time(), 'checks': results}
+
+    def _log_transition(self, name, result):
+        """Journaliser uniquement les changements d'état, pas chaque vérification"""
+        previous = (self._result or {}).get('checks', {}).get(name, {}).get('status')
+        if result['status'] != previous:
+            if result['status'] == 'ok':
+                logger.info(f"Readiness check '{name}' ok")
+            else:
+                logger.warning(f"Readiness check '{name}' failed: {result['error']}")
+
+    def _loop(self):
+        interval = self.interval or settings.HEALTH_CHECK_INTERVAL
+        while True:
+            self._result = self._run_checks()
+            time.sleep(interval)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='readiness-checker', daemon=True)
+                self._thread.start()
+
+    def get_result(self):
+        """Dernier résultat en cache (None tant que la première vérification n'est pas terminée)"""
+        if self._thread is None:
+            self.start()
+        result = self._result
+        if result is None:
+            return None
+        # Résultat trop ancien: le thread de fond est bloqué ou mort
+        max_age = 3 * (self.interval or settings.HEALTH_CHECK_INTERVAL)
+        if time.time() - result['checked_at'] > max_age:
+            return {'status': 'error', 'checked_at': result['checked_at'], 'checks': {}, 'error': 'stale'}
+        return result
+
+
+readiness_checker = ReadinessChecker()
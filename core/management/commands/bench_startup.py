@@ -0,0 +1,66 @@
+"""
+Benchmark du démarrage à froid d'un worker.
+
+Chaque mesure tourne dans un processus Python neuf et relève:
+- le temps d'import (django.setup() + chargement de ROOT_URLCONF)
+- la latence de la première requête (et d'une requête à chaud pour comparaison)
+
+Exemple:
+    python manage.py bench_startup --runs 10 --path /api/version/
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+PROBE = r"""
+import json, os, sys, time
+t0 = time.perf_counter()
+import django
+django.setup()
+from django.conf import settings
+from django.urls import get_resolver
+get_resolver().url_patterns
+t1 = time.perf_counter()
+from django.test import Client
+client = Client()
+client.get(sys.argv[1])
+t2 = time.perf_counter()
+client.get(sys.argv[1])
+t3 = time.perf_counter()
+heavy = [m for m in ('drf_spectacular', 'drf_spectacular.plumbing', 'pyarrow') if m in sys.modules]
+print(json.dumps({'import_ms': (t1 - t0) * 1000, 'first_ms': (t2 - t1) * 1000,
+                  'warm_ms': (t3 - t2) * 1000, 'heavy_modules': heavy}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Mesurer le temps d'import et la latence de première requête (dynamic vs static)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--path', default='/api/version/')
+        parser.add_argument('--modes', default='dynamic,static', help='Modes API_SCHEMA_MODE à comparer')
+
+    def handle(self, *args, **options):
+        for mode in options['modes'].split(','):
+            env = dict(os.environ, API_SCHEMA_MODE=mode, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+            runs = []
+            for _ in range(options['runs']):
+                out = subprocess.run(
+                    [sys.executable, '-c', PROBE, options['path']],
+                    env=env, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+                )
+                runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+            median = {k: statistics.median(r[k] for r in runs) for k in ('import_ms', 'first_ms', 'warm_ms')}
+            self.stdout.write(
+                f"{mode:8s} import {median['import_ms']:7.1f} ms | "
+                f"1re requête {median['first_ms']:6.1f} ms | "
+                f"à chaud {median['warm_ms']:5.1f} ms | "
+                f"modules lourds: {', '.join(runs[-1]['heavy_modules']) or '-'}"
+            )
@@ -0,0 +1,36 @@
+"""
+Génération du schéma OpenAPI au build (mode API_SCHEMA_MODE='static').
+
+Exemple (Dockerfile):
+    RUN API_SCHEMA_MODE=dynamic python manage.py build_api_schema
+"""
+import gzip
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Générer le schéma OpenAPI (JSON + version gzip) pour le mode static"
+
+    def add_arguments(self, parser):
+        parser.add_argument('-o', '--output', help='Fichier de sortie (défaut: API_SCHEMA_FILE)')
+
+    def handle(self, *args, **options):
+        if settings.API_SCHEMA_MODE != 'dynamic':
+            raise CommandError("Lancer avec API_SCHEMA_MODE=dynamic (drf_spectacular doit être chargé)")
+
+        from drf_spectacular.generators import SchemaGenerator
+        from drf_spectacular.renderers import OpenApiJsonRenderer
+
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+        body = OpenApiJsonRenderer().render(schema, renderer_context={})
+
+        output = Path(options['output'] or settings.API_SCHEMA_FILE)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_bytes(body)
+        # mtime=0: fichier reproductible d'un build à l'autre
+        output.with_name(output.name + '.gz').write_bytes(gzip.compress(body, compresslevel=9, mtime=0))
+
+        self.stdout.write(self.style.SUCCESS(f"Schéma écrit dans {output} ({len(body)} octets)"))
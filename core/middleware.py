@@ -0,0 +1,67 @@
+"""
+Middlewares de l'app core.
+"""
+import json
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.middleware.gzip import GZipMiddleware
+
+from core.health import readiness_checker
+
+
+class HealthProbeMiddleware:
+    """
+    Répond aux probes de l'orchestrateur avant le reste de la pile
+    (sessions, CSRF, auth, DRF). À placer en tête de MIDDLEWARE.
+
+    - liveness: réponse constante, aucune dépendance
+    - readiness: dernier résultat des vérifications de fond (core.health)
+    """
+
+    LIVENESS_BODY = b'{"status": "ok"}'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.liveness_paths = set(settings.HEALTH_LIVENESS_PATHS)
+        self.readiness_paths = set(settings.HEALTH_READINESS_PATHS)
+
+    def __call__(self, request):
+        path = request.path_info
+        if path in self.liveness_paths:
+            return HttpResponse(self.LIVENESS_BODY, content_type='application/json')
+        if path in self.readiness_paths:
+            return self.readiness()
+        return self.get_response(request)
+
+    def readiness(self):
+        result = readiness_checker.get_result()
+        if result is None:
+            result = {'status': 'starting', 'checks': {}}
+        status = 200 if result['status'] == 'ok' else 503
+        return HttpResponse(json.dumps(result), status=status, content_type='application/json')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware limité aux types qui se compressent (JSON, texte, XML, JS).
+    Les flux SSE (text/event-stream) ne sont jamais compressés: le tampon gzip
+    retarderait la remise des événements, ni les fichiers livrés par plages (Accept-Ranges:
+    Content-Length et sendfile doivent rester intacts). Désactivé par API_GZIP=false.
+    """
+
+    COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'application/xml', 'text/')
+
+    def __init__(self, get_response):
+        if not settings.API_GZIP:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '')
+        if content_type.startswith('text/event-stream') or not content_type.startswith(self.COMPRESSIBLE_TYPES):
+            return response
+        if response.has_header('Accept-Ranges'):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,35 @@
+"""
+Annotations OpenAPI des vues (extend_schema, OpenApiParameter, OpenApiExample, OpenApiTypes).
+
+En mode API_SCHEMA_MODE='dynamic', ce sont celles de drf_spectacular.
+En mode 'static', le schéma est pré-généré au build: les décorateurs deviennent des no-op
+pour que drf_spectacular ne soit pas importé au démarrage des workers.
+"""
+from django.conf import settings
+
+if settings.API_SCHEMA_MODE == 'dynamic':
+    from drf_spectacular.types import OpenApiTypes
+    from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
+else:
+    class _Annotation:
+        """Remplace OpenApiParameter / OpenApiExample: arguments ignorés"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+    class _Types:
+        """Remplace OpenApiTypes: tout attribut (INT, STR, OBJECT...) vaut None"""
+
+        def __getattr__(self, name):
+            return None
+
+    OpenApiParameter = OpenApiExample = _Annotation
+    OpenApiTypes = _Types()
+
+    def extend_schema(*args, **kwargs):
+        def decorator(target):
+            return target
+        return decorator
+
+
+__all__ = ['extend_schema', 'OpenApiParameter', 'OpenApiExample', 'OpenApiTypes']
@@ -1,3 +1,102 @@
-from django.test import TestCase
+import os
+import subprocess
+import sys
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.db import transaction
+from django.test import SimpleTestCase, TransactionTestCase
+
+from config.db_router import PRIMARY_DB, REPLICA_DB, PrimaryReplicaRouter, use_primary
+from core.models import User
+
+
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    """Routage lectures / écritures, sans base (le réplica est simulé par replica_available)"""
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        patcher = mock.patch('config.db_router.replica_available', return_value=True)
+        self.replica_available = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(self.router.db_for_read(User), REPLICA_DB)
+
+    def test_reads_stay_on_primary_without_replica(self):
+        self.replica_available.return_value = False
+        self.assertEqual(self.router.db_for_read(User), PRIMARY_DB)
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(User), PRIMARY_DB)
+
+    def test_use_primary_pins_reads_until_outer_block_exits(self):
+        with use_primary():
+            with use_primary():
+                self.assertEqual(self.router.db_for_read(User), PRIMARY_DB)
+            self.assertEqual(self.router.db_for_read(User), PRIMARY_DB)
+        self.assertEqual(self.router.db_for_read(User), REPLICA_DB)
+
+    def test_use_primary_is_released_on_exception(self):
+        with self.assertRaises(RuntimeError):
+            with use_primary():
+                raise RuntimeError
+        self.assertEqual(self.router.db_for_read(User), REPLICA_DB)
+
+    def test_instance_loaded_from_primary_stays_on_primary(self):
+        user = User()
+        user._state.db = PRIMARY_DB
+        self.assertEqual(self.router.db_for_read(User, instance=user), PRIMARY_DB)
+        user._state.db = REPLICA_DB
+        self.assertEqual(self.router.db_for_read(User, instance=user), REPLICA_DB)
+
+    def test_only_primary_is_migrated(self):
+        self.assertTrue(self.router.allow_migrate(PRIMARY_DB, 'media'))
+        self.assertFalse(self.router.allow_migrate(REPLICA_DB, 'media'))
+
+
+class PrimaryReplicaRouterTransactionTests(TransactionTestCase):
+    """Routage avec une base: transaction ouverte sur le primaire, alias réplica configuré"""
+
+    databases = set(settings.DATABASES)
+
+    def test_reads_inside_atomic_block_go_to_primary(self):
+        router = PrimaryReplicaRouter()
+        with mock.patch('config.db_router.replica_available', return_value=True):
+            self.assertEqual(router.db_for_read(User), REPLICA_DB)
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(User), PRIMARY_DB)
+            self.assertEqual(router.db_for_read(User), REPLICA_DB)
+
+    @skipUnless(REPLICA_DB in settings.DATABASES, "réplica non configuré (DB_REPLICA=true)")
+    def test_replica_alias_serves_reads(self):
+        user = User.objects.create(username='replica', email='replica@example.com')
+        self.assertEqual(User.objects.db_manager(PRIMARY_DB).get(pk=user.pk).email, user.email)
+        read = User.objects.get(pk=user.pk)
+        self.assertEqual(read._state.db, REPLICA_DB)
+        self.assertEqual(read.email, user.email)
+
+
+# ============ SCHÉMA STATIQUE ============
+
+STATIC_PROBE = """
+import sys
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(sorted(m for m in sys.modules if m.startswith('drf_spectacular')))
+"""
+
+
+class StaticSchemaModeTests(SimpleTestCase):
+    """En mode static, le chargement des URLs (et donc des vues) n'importe pas drf_spectacular"""
+
+    def test_url_loading_does_not_import_drf_spectacular(self):
+        env = dict(os.environ, API_SCHEMA_MODE='static', DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        result = subprocess.run(
+            [sys.executable, '-c', STATIC_PROBE], env=env, cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=120,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip().splitlines()[-1], '[]')
@@ -1,6 +1,10 @@
+from django.conf import settings
+from django.http import HttpResponse, Http404
+from django.utils.cache import patch_vary_headers
+from django.views import View
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from drf_spectacular.utils import extend_schema
+from core.schema import extend_schema
 
 from .serializers import (
     PingSerializer, 
@@ -11,6 +15,8 @@ from .serializers import (
 # ============ CORE ENDPOINTS ============
 
 class HealthCheckView(APIView):
+    # Les requêtes sont servies par core.middleware.HealthProbeMiddleware avant d'arriver ici;
+    # la vue reste pour la documentation OpenAPI et si le middleware est retiré.
     @extend_schema(
         summary="Health check",
         description="Check if the API is alive.",
@@ -42,3 +48,38 @@ class PingView(APIView):
     def get(self, request):
         return Response({"message": "pong"}, status=status.HTTP_200_OK)
 
+
+# ============ API SCHEMA ============
+
+class StaticSchemaView(View):
+    """
+    Sert le schéma OpenAPI pré-généré (API_SCHEMA_MODE='static').
+    Le fichier et sa version gzip sont lus une seule fois puis gardés en mémoire.
+    """
+    _cache = {}
+
+    @classmethod
+    def _load(cls, path):
+        if path not in cls._cache:
+            try:
+                cls._cache[path] = path.read_bytes()
+            except FileNotFoundError:
+                cls._cache[path] = None
+        return cls._cache[path]
+
+    def get(self, request):
+        schema_file = settings.API_SCHEMA_FILE
+        body = self._load(schema_file)
+        if body is None:
+            raise Http404("Schema not built. Run: python manage.py build_api_schema")
+
+        gzipped = None
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            gzipped = self._load(schema_file.with_name(schema_file.name + '.gz'))
+
+        response = HttpResponse(gzipped or body, content_type='application/vnd.oai.openapi+json')
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response['Cache-Control'] = 'public, max-age=3600'
+        return response
@@ -1,5 +1,17 @@
 from django.contrib import admin
-from media.models import Media, MediaJob, HttpUrl
+from media.models import (
+    ArchivedMediaJob,
+    DeletionRequest,
+    HttpUrl,
+    Media,
+    MediaCounter,
+    MediaJob,
+    MediaRendition,
+    StorageUsage,
+    WebhookEvent,
+)
+from media.jobs.registry import requeue_dead_jobs
+from media.services.deletion import request_media_deletion
 
 
 @admin.register(Media)
@@ -13,7 +25,7 @@ class MediaAdmin(admin.ModelAdmin):
         'file_size', 
         'created_at'
     ]
-    list_filter = ['file_type', 'created_at', 'uploader']
+    list_filter = ['file_type', 'storage_backend', 'created_at', 'uploader']
     search_fields = [
         'original_filename', 
         'imagekit_file_id', 
@@ -25,9 +37,11 @@ class MediaAdmin(admin.ModelAdmin):
         'uuid', 
         'created_at', 
         'updated_at',
+        'storage_backend',
         'imagekit_file_id',
         'imagekit_url',
-        'imagekit_thumbnail_url'
+        'imagekit_thumbnail_url',
+        'deleted_at'
     ]
     ordering = ['-created_at']
     
@@ -38,14 +52,54 @@ class MediaAdmin(admin.ModelAdmin):
         ('Métadonnées du fichier', {
             'fields': ('file_size', 'mime_type', 'width', 'height', 'duration_s')
         }),
-        ('ImageKit', {
-            'fields': ('imagekit_file_id', 'imagekit_url', 'imagekit_thumbnail_url')
+        ('Stockage', {
+            'fields': ('storage_backend', 'imagekit_file_id', 'imagekit_url', 'imagekit_thumbnail_url')
         }),
         ('Dates', {
-            'fields': ('created_at', 'updated_at')
+            'fields': ('created_at', 'updated_at', 'deleted_at')
         }),
     )
 
+    # Suppression différée: la page de confirmation ne parcourt pas la cascade (jobs, renditions...)
+    def get_deleted_objects(self, objs, request):
+        return [str(obj) for obj in objs], {}, set(), []
+
+    def delete_model(self, request, obj):
+        request_media_deletion(obj, requested_by=request.user)
+
+    def delete_queryset(self, request, queryset):
+        for media in queryset.filter(deleted_at__isnull=True):
+            request_media_deletion(media, requested_by=request.user)
+
+
+@admin.register(DeletionRequest)
+class DeletionRequestAdmin(admin.ModelAdmin):
+    """Suivi des suppressions différées"""
+    list_display = ['uuid', 'target_type', 'target_id', 'status', 'attempts', 'created_at', 'completed_at']
+    list_filter = ['status', 'target_type']
+    search_fields = ['target_id', 'last_error']
+    readonly_fields = ['uuid', 'target_type', 'target_id', 'requested_by', 'attempts', 'run_after', 'progress', 'created_at', 'updated_at', 'completed_at']
+    ordering = ['-created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(MediaRendition)
+class MediaRenditionAdmin(admin.ModelAdmin):
+    """Configuration de l'admin pour le modèle MediaRendition"""
+    list_display = ['uuid', 'media', 'kind', 'format', 'width', 'height', 'quality', 'file_size', 'created_at']
+    list_filter = ['kind', 'format', 'storage_backend', 'created_at']
+    search_fields = ['media__original_filename', 'imagekit_file_id']
+    readonly_fields = ['uuid', 'created_at']
+    raw_id_fields = ['media']
+    ordering = ['-created_at']
+
+    def get_queryset(self, request):
+        """Optimiser les requêtes avec select_related"""
+        qs = super().get_queryset(request)
+        return qs.select_related('media', 'media__uploader')
+
 
 @admin.register(MediaJob)
 class MediaJobAdmin(admin.ModelAdmin):
@@ -55,11 +109,13 @@ class MediaJobAdmin(admin.ModelAdmin):
         'media',
         'job_type',
         'status',
+        'attempts',
         'started_at',
         'completed_at',
         'created_at'
     ]
     list_filter = ['status', 'job_type', 'created_at']
+    actions = ['requeue_dead']
     search_fields = [
         'media__original_filename',
         'media__imagekit_file_id',
@@ -70,7 +126,11 @@ class MediaJobAdmin(admin.ModelAdmin):
         'created_at',
         'updated_at',
         'started_at',
-        'completed_at'
+        'completed_at',
+        'depends_on',
+        'attempts',
+        'lease_expires_at',
+        'locked_by'
     ]
     ordering = ['-created_at']
     
@@ -79,13 +139,36 @@ class MediaJobAdmin(admin.ModelAdmin):
             'fields': ('uuid', 'media', 'job_type', 'status')
         }),
         ('Traitement', {
-            'fields': ('started_at', 'completed_at', 'error_message', 'result_data')
+            'fields': ('depends_on', 'started_at', 'completed_at', 'error_message', 'result_data')
+        }),
+        ('Tentatives', {
+            'fields': ('attempts', 'run_after', 'lease_expires_at', 'locked_by')
         }),
         ('Dates', {
             'fields': ('created_at', 'updated_at')
         }),
     )
 
+    @admin.action(description='Relancer les jobs abandonnés (dead-letter)')
+    def requeue_dead(self, request, queryset):
+        count = requeue_dead_jobs(queryset.filter(status='dead').values_list('pk', flat=True))
+        self.message_user(request, f"{count} jobs relancés")
+
+
+@admin.register(ArchivedMediaJob)
+class ArchivedMediaJobAdmin(admin.ModelAdmin):
+    """Jobs archivés par la rétention (lecture seule)"""
+    list_display = ['uuid', 'media_id', 'job_type', 'status', 'completed_at', 'archived_at']
+    list_filter = ['status', 'job_type']
+    search_fields = ['uuid', 'idempotency_key', 'error_message']
+    ordering = ['-completed_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(HttpUrl)
 class HttpUrlAdmin(admin.ModelAdmin):
@@ -142,3 +225,41 @@ class HttpUrlAdmin(admin.ModelAdmin):
         """Optimiser les requêtes avec select_related"""
         qs = super().get_queryset(request)
         return qs.select_related('media', 'created_by')
+
+
+@admin.register(StorageUsage)
+class StorageUsageAdmin(admin.ModelAdmin):
+    """Configuration de l'admin pour l'agrégat StorageUsage (lecture seule)"""
+    list_display = ['uploader', 'file_type', 'file_count', 'total_bytes', 'updated_at']
+    list_filter = ['file_type']
+    search_fields = ['uploader__username', 'uploader__email']
+    readonly_fields = ['uploader', 'file_type', 'file_count', 'total_bytes', 'updated_at']
+    ordering = ['-total_bytes']
+
+
+@admin.register(MediaCounter)
+class MediaCounterAdmin(admin.ModelAdmin):
+    """Compteurs de vues / téléchargements (lecture seule, écrits par lots)"""
+    list_display = ['media', 'view_count', 'download_count', 'updated_at']
+    search_fields = ['media__original_filename']
+    readonly_fields = ['media', 'view_count', 'download_count', 'updated_at']
+    ordering = ['-view_count']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('media', 'media__uploader')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    """Configuration de l'admin pour le journal des webhooks (lecture seule)"""
+    list_display = ['id', 'source', 'event_type', 'event_id', 'status', 'attempts', 'received_at', 'processed_at']
+    list_filter = ['source', 'status', 'event_type']
+    search_fields = ['event_id']
+    readonly_fields = [
+        'source', 'event_id', 'event_type', 'payload', 'received_at',
+        'status', 'attempts', 'next_attempt_at', 'processed_at', 'last_error',
+    ]
+    ordering = ['-id']
@@ -1,6 +1,32 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def install_search_structures(sender, using='default', **kwargs):
+    from media.services.search import install_search_structures
+    install_search_structures(using)
+
+
+def install_tag_structures(sender, using='default', **kwargs):
+    from media.services.url_tags import install_tag_structures
+    install_tag_structures(using)
+
+
+def install_retention_structures(sender, using='default', **kwargs):
+    from media.services.job_retention import install_retention_structures
+    install_retention_structures(using)
 
 
 class MediaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'media'
+
+    def ready(self):
+        # Enregistrer les receivers (agrégat StorageUsage, index de recherche)
+        from media import signals  # noqa: F401
+        # Index spécifiques au moteur, hors migrations:
+        # tsvector + GIN (PostgreSQL) ou FTS5 (SQLite) pour la recherche, GIN sur HttpUrls.metadata,
+        # GIN / BRIN sur l'archive des jobs
+        post_migrate.connect(install_search_structures, sender=self)
+        post_migrate.connect(install_tag_structures, sender=self)
+        post_migrate.connect(install_retention_structures, sender=self)
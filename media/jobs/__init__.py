@@ -0,0 +1,6 @@
+"""
+Handlers des MediaJob.
+
+Chaque module de ce package enregistre ses handlers via
+media.jobs.registry.register_handler(job_type).
+"""
@@ -0,0 +1,119 @@
+"""
+Handlers 'conversion' et 'compression': transcodage des images en renditions
+(WebP / AVIF, ou réencodage dans le format d'origine) enregistrées en MediaRendition.
+
+Les handlers sont idempotents: une nouvelle tentative (échec, bail expiré) supprime d'abord
+les renditions laissées par la tentative précédente du même job.
+"""
+import io
+import os
+
+from django.conf import settings
+
+from media.jobs.registry import register_handler
+from media.models import MediaRendition
+from media.services.deletion import purge_files
+from media.services.storage import get_storage
+from media.services.transcoding import MIME_FORMATS, get_process_pool, transcode_image
+
+
+def _target_widths(media):
+    """Largeurs à produire: MEDIA_RENDITION_WIDTHS sans agrandissement de l'original"""
+    return [w for w in settings.MEDIA_RENDITION_WIDTHS if w == 0 or not media.width or w < media.width]
+
+
+def _load_source(media):
+    if media.file_type != 'image':
+        raise ValueError(f"Le média {media.pk} n'est pas une image ({media.file_type})")
+    return get_storage(media.storage_backend).read(media.imagekit_file_id, media.imagekit_url)
+
+
+def discard_previous_attempt(job, formats) -> int:
+    """
+    Supprimer (fichiers et lignes) les renditions de ces formats créées pour le média depuis
+    la création du job: ce sont celles d'une tentative précédente interrompue.
+
+    Returns:
+        Nombre de renditions supprimées
+    """
+    leftovers = MediaRendition.objects.filter(
+        media_id=job.media_id, kind='variant', format__in=list(formats), created_at__gte=job.created_at,
+    )
+    files = list(leftovers.values_list('storage_backend', 'imagekit_file_id'))
+    if files:
+        purge_files(files)
+        leftovers.delete()
+    return len(files)
+
+
+def produce_renditions(media, source, specs):
+    """
+    Transcoder `source` selon les specs [(format, qualité, largeur max), ...] dans le pool de processus,
+    puis enregistrer (dans le backend de stockage du média) les renditions plus légères que l'original.
+
+    Returns:
+        Liste de dicts décrivant chaque variante (créée ou ignorée)
+    """
+    pool = get_process_pool()
+    futures = [pool.submit(transcode_image, source, fmt, quality, width) for fmt, quality, width in specs]
+
+    storage = get_storage(media.storage_backend)
+    stem = os.path.splitext(media.original_filename)[0] or str(media.pk)
+    summary = []
+    for future in futures:
+        output = future.result()
+        data = output.pop('data')
+        entry = dict(output, file_size=len(data))
+        if len(data) >= media.file_size:
+            entry['skipped'] = 'not smaller than source'
+            summary.append(entry)
+            continue
+
+        result = storage.save(
+            io.BytesIO(data),
+            file_name=f"{stem}-{output['width']}w.{output['format']}",
+            folder='/renditions',
+            content_type=output['mime_type'],
+        )
+        rendition = MediaRendition.objects.create(
+            media=media,
+            format=output['format'],
+            mime_type=output['mime_type'],
+            width=output['width'],
+            height=output['height'],
+            quality=output['quality'],
+            file_size=len(data),
+            storage_backend=storage.name,
+            imagekit_file_id=result['fileId'],
+            url=result['url'],
+        )
+        entry['rendition'] = str(rendition.pk)
+        summary.append(entry)
+    return summary
+
+
+@register_handler('conversion')
+def convert_image(job):
+    """Transcoder l'image vers les formats modernes (MEDIA_CONVERSION_FORMATS)"""
+    media = job.media
+    source = _load_source(media)
+    discard_previous_attempt(job, settings.MEDIA_CONVERSION_FORMATS)
+    specs = [
+        (fmt, settings.MEDIA_CONVERSION_QUALITY.get(fmt, 80), width)
+        for fmt in settings.MEDIA_CONVERSION_FORMATS
+        for width in _target_widths(media)
+    ]
+    return {'source_bytes': len(source), 'renditions': produce_renditions(media, source, specs)}
+
+
+@register_handler('compression')
+def compress_image(job):
+    """Réencoder l'image dans son format d'origine à la qualité configurée"""
+    media = job.media
+    fmt = MIME_FORMATS.get(media.mime_type)
+    if fmt is None:
+        raise ValueError(f"Type MIME non supporté pour la compression: {media.mime_type}")
+    source = _load_source(media)
+    discard_previous_attempt(job, [fmt])
+    specs = [(fmt, settings.MEDIA_CONVERSION_QUALITY.get(fmt, 80), 0)]
+    return {'source_bytes': len(source), 'renditions': produce_renditions(media, source, specs)}
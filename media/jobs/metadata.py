@@ -0,0 +1,126 @@
+"""
+Handlers 'metadata' et 'thumbnail': premières étapes des pipelines d'upload.
+
+- metadata: dimensions (Pillow) des images, durée et dimensions (ffprobe) des vidéos / audios,
+  enregistrées sur le Media pour les étapes suivantes (renditions, transcription)
+- thumbnail: miniature WebP de MEDIA_THUMBNAIL_WIDTH pixels (image réduite, ou première
+  image d'une vidéo extraite par ffmpeg), enregistrée en MediaRendition (kind='thumbnail',
+  supprimée avec le média) et dont l'URL va dans imagekit_thumbnail_url
+"""
+import io
+import json
+import os
+import subprocess
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from media.jobs.registry import register_handler
+from media.models import Media, MediaRendition
+from media.services.storage import get_storage
+from media.services.transcoding import get_process_pool, transcode_image
+
+
+def probe(source: str) -> dict:
+    """Durée (s), largeur et hauteur d'un fichier audio / vidéo avec ffprobe"""
+    command = [
+        'ffprobe', '-v', 'error', '-print_format', 'json',
+        '-show_entries', 'format=duration:stream=codec_type,width,height', source,
+    ]
+    try:
+        completed = subprocess.run(command, capture_output=True, check=True, timeout=60)
+    except FileNotFoundError:
+        raise RuntimeError("ffprobe est requis pour lire les métadonnées")
+    except subprocess.CalledProcessError as exc:
+        raise RuntimeError(f"ffprobe: {exc.stderr.decode(errors='replace').strip()}")
+    info = json.loads(completed.stdout or b'{}')
+    video = next((s for s in info.get('streams', []) if s.get('codec_type') == 'video'), {})
+    return {
+        'duration_s': int(float(info.get('format', {}).get('duration') or 0)),
+        'width': video.get('width') or 0,
+        'height': video.get('height') or 0,
+    }
+
+
+def extract_frame(source: str, at_s: float = 1.0) -> bytes:
+    """Une image PNG de la vidéo à `at_s` secondes"""
+    command = [
+        'ffmpeg', '-nostdin', '-loglevel', 'error',
+        '-ss', f"{at_s:.3f}", '-i', source, '-frames:v', '1', '-f', 'image2pipe', '-c:v', 'png', '-',
+    ]
+    try:
+        completed = subprocess.run(command, capture_output=True, check=True, timeout=60)
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg est requis pour extraire une image")
+    except subprocess.CalledProcessError as exc:
+        raise RuntimeError(f"ffmpeg: {exc.stderr.decode(errors='replace').strip()}")
+    return completed.stdout
+
+
+@register_handler('metadata')
+def extract_metadata(job):
+    media = job.media
+    storage = get_storage(media.storage_backend)
+    if media.file_type == 'image':
+        from PIL import Image
+        data = storage.read(media.imagekit_file_id, media.imagekit_url)
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+        metadata = {'width': width, 'height': height}
+    elif media.file_type in ('video', 'audio'):
+        metadata = probe(storage.source(media.imagekit_file_id, media.imagekit_url))
+    else:
+        return {'skipped': f"pas de métadonnées pour le type {media.file_type}"}
+
+    Media.objects.filter(pk=media.pk).update(updated_at=timezone.now(), **metadata)
+    return metadata
+
+
+@register_handler('thumbnail')
+def generate_thumbnail(job):
+    media = job.media
+    if media.imagekit_thumbnail_url:
+        return {'thumbnail_url': media.imagekit_thumbnail_url, 'skipped': 'miniature déjà fournie'}
+
+    storage = get_storage(media.storage_backend)
+    if media.file_type == 'image':
+        source = storage.read(media.imagekit_file_id, media.imagekit_url)
+    elif media.file_type == 'video':
+        at_s = min(1.0, media.duration_s / 2) if media.duration_s else 0
+        source = extract_frame(storage.source(media.imagekit_file_id, media.imagekit_url), at_s)
+    else:
+        return {'skipped': f"pas de miniature pour le type {media.file_type}"}
+
+    output = get_process_pool().submit(
+        transcode_image, source, 'webp', settings.MEDIA_CONVERSION_QUALITY.get('webp', 80),
+        settings.MEDIA_THUMBNAIL_WIDTH,
+    ).result()
+    stem = os.path.splitext(media.original_filename)[0] or str(media.pk)
+    result = storage.save(
+        io.BytesIO(output['data']),
+        file_name=f"{stem}-thumb.webp",
+        folder='/thumbnails',
+        content_type=output['mime_type'],
+    )
+    with transaction.atomic():
+        rendition = MediaRendition.objects.create(
+            media=media,
+            kind='thumbnail',
+            format=output['format'],
+            mime_type=output['mime_type'],
+            width=output['width'],
+            height=output['height'],
+            quality=output['quality'],
+            file_size=len(output['data']),
+            storage_backend=storage.name,
+            imagekit_file_id=result['fileId'],
+            url=result['url'],
+        )
+        Media.objects.filter(pk=media.pk).update(imagekit_thumbnail_url=result['url'], updated_at=timezone.now())
+    return {
+        'thumbnail_url': result['url'],
+        'rendition': str(rendition.pk),
+        'width': output['width'],
+        'height': output['height'],
+    }
@@ -0,0 +1,27 @@
+"""
+Handler 'perceptual_hash': calcul des empreintes aHash / dHash / pHash d'une image.
+"""
+from media.jobs.registry import register_handler
+from media.models import MediaPerceptualHash
+from media.services.hash_index import hash_indexes
+from media.services.phash import compute_hashes
+from media.services.storage import get_storage
+
+# Les empreintes se calculent sur 32x32 pixels: une version réduite par ImageKit suffit
+# et évite de télécharger l'original en pleine résolution (ignoré par le stockage local)
+HASH_SOURCE_TRANSFORM = 'tr=w-256'
+
+
+@register_handler('perceptual_hash')
+def compute_perceptual_hash(job):
+    media = job.media
+    if media.file_type != 'image':
+        raise ValueError(f"Le média {media.pk} n'est pas une image ({media.file_type})")
+
+    storage = get_storage(media.storage_backend)
+    data = storage.read(media.imagekit_file_id, media.imagekit_url, transform=HASH_SOURCE_TRANSFORM)
+    hashes = compute_hashes(data)
+
+    MediaPerceptualHash.objects.update_or_create(media=media, defaults=hashes)
+    hash_indexes.add(media.pk, hashes)
+    return {kind: f"{value & 0xFFFFFFFFFFFFFFFF:016x}" for kind, value in hashes.items()}
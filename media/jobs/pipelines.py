@@ -0,0 +1,166 @@
+"""
+Pipelines de jobs par type de fichier: graphe de MediaJob créé en une fois après l'upload.
+
+MEDIA_JOB_PIPELINES = {file_type: {job_type: [dépendances], ...}}, par exemple
+    image: metadata -> thumbnail + conversion
+    video: metadata -> thumbnail -> transcription
+
+- create_pipeline(): tous les jobs du média et leurs dépendances (MediaJob.depends_on) en
+  deux bulk_create; les jobs sans dépendance sont 'pending', les autres 'blocked'
+- complete_job(): dans la transaction qui termine le job, ses successeurs dont toutes les
+  dépendances sont terminées passent 'pending' (réservables immédiatement)
+- fail_job(): échec définitif (après les nouvelles tentatives, voir media/jobs/registry.py):
+  les successeurs (et leurs propres successeurs) sont annulés
+"""
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from media.models import MediaJob
+from media.services.job_events import publish_job_event
+
+Dependency = MediaJob.depends_on.through
+
+
+def get_pipeline(file_type: str) -> Dict[str, List[str]]:
+    """Étapes du pipeline d'un type de fichier ({} si aucun pipeline n'est déclaré)"""
+    pipeline = settings.MEDIA_JOB_PIPELINES.get(file_type) or {}
+    for job_type, parents in pipeline.items():
+        unknown = [parent for parent in parents if parent not in pipeline]
+        if unknown:
+            raise ValueError(f"Pipeline '{file_type}': {job_type} dépend d'étapes absentes {unknown}")
+    return pipeline
+
+
+def create_pipeline(media) -> List[MediaJob]:
+    """Créer les jobs du pipeline de `media` (aucun si son type n'a pas de pipeline)"""
+    pipeline = get_pipeline(media.file_type)
+    if not pipeline:
+        return []
+    jobs = {
+        job_type: MediaJob(media=media, job_type=job_type, status='blocked' if parents else 'pending')
+        for job_type, parents in pipeline.items()
+    }
+    links = [
+        Dependency(from_mediajob_id=jobs[job_type].pk, to_mediajob_id=jobs[parent].pk)
+        for job_type, parents in pipeline.items()
+        for parent in parents
+    ]
+    with transaction.atomic():
+        MediaJob.objects.bulk_create(jobs.values())
+        Dependency.objects.bulk_create(links)
+        # bulk_create ne déclenche pas post_save: annoncer les jobs réservables après le commit
+        ready = [job for job in jobs.values() if job.status == 'pending']
+        transaction.on_commit(lambda: _publish(ready))
+    return list(jobs.values())
+
+
+def _publish(jobs: Iterable[MediaJob]) -> None:
+    for job in jobs:
+        publish_job_event(job.pk, job.media_id, job.status, job.job_type)
+
+
+def release_dependents(job_ids: Iterable) -> List:
+    """
+    Passer 'pending' les successeurs bloqués dont toutes les dépendances sont terminées.
+    À appeler dans la transaction qui termine les jobs `job_ids`.
+
+    Returns:
+        UUID des jobs libérés
+    """
+    candidates = set(
+        MediaJob.objects.filter(status='blocked', depends_on__in=list(job_ids)).values_list('pk', flat=True)
+    )
+    if not candidates:
+        return []
+    # Verrou sur les successeurs: deux parents terminés en parallèle ne peuvent pas conclure
+    # chacun que l'autre est encore en cours (le second compte après le commit du premier)
+    locked = list(
+        MediaJob.objects.select_for_update().filter(pk__in=candidates).order_by('pk').values_list('pk', flat=True)
+    )
+    ready = list(
+        MediaJob.objects.filter(pk__in=locked, status='blocked')
+        .annotate(open_dependencies=Count('depends_on', filter=~Q(depends_on__status='completed')))
+        .filter(open_dependencies=0)
+        .values_list('pk', 'media_id', 'job_type')
+    )
+    if not ready:
+        return []
+    MediaJob.objects.filter(pk__in=[pk for pk, _, _ in ready], status='blocked').update(
+        status='pending', updated_at=timezone.now(),
+    )
+    transaction.on_commit(lambda: [publish_job_event(pk, media_id, 'pending', job_type) for pk, media_id, job_type in ready])
+    return [pk for pk, _, _ in ready]
+
+
+def cancel_dependents(job_ids: Iterable, reason: str) -> int:
+    """Annuler les successeurs bloqués de `job_ids`, de proche en proche; renvoie le nombre de jobs annulés"""
+    cancelled = 0
+    frontier = list(job_ids)
+    while frontier:
+        blocked = list(
+            MediaJob.objects.filter(status='blocked', depends_on__in=frontier)
+            .values_list('pk', 'media_id', 'job_type').distinct()
+        )
+        if not blocked:
+            break
+        now = timezone.now()
+        MediaJob.objects.filter(pk__in=[pk for pk, _, _ in blocked]).update(
+            status='cancelled', error_message=reason, completed_at=now, updated_at=now,
+        )
+        transaction.on_commit(lambda jobs=blocked: [publish_job_event(pk, m, 'cancelled', t) for pk, m, t in jobs])
+        cancelled += len(blocked)
+        frontier = [pk for pk, _, _ in blocked]
+    return cancelled
+
+
+def restore_dependents(job_ids: Iterable) -> int:
+    """
+    Repasser 'blocked' les successeurs annulés de `job_ids` (job relancé), de proche en proche.
+    Un successeur dont une autre dépendance est encore en échec, abandonnée ou annulée reste 'cancelled'.
+    """
+    restored = 0
+    frontier = list(job_ids)
+    while frontier:
+        candidates = set(
+            MediaJob.objects.filter(status='cancelled', depends_on__in=frontier).values_list('pk', flat=True)
+        )
+        if not candidates:
+            break
+        cancelled = list(
+            MediaJob.objects.filter(pk__in=candidates)
+            .annotate(broken_dependencies=Count(
+                'depends_on', filter=Q(depends_on__status__in=('failed', 'dead', 'cancelled')),
+            ))
+            .filter(broken_dependencies=0)
+            .values_list('pk', 'media_id', 'job_type')
+        )
+        if not cancelled:
+            break
+        MediaJob.objects.filter(pk__in=[pk for pk, _, _ in cancelled]).update(
+            status='blocked', error_message=None, completed_at=None, updated_at=timezone.now(),
+        )
+        transaction.on_commit(lambda jobs=cancelled: [publish_job_event(pk, m, 'blocked', t) for pk, m, t in jobs])
+        restored += len(cancelled)
+        frontier = [pk for pk, _, _ in cancelled]
+    return restored
+
+
+def complete_job(job: MediaJob, result_data=None) -> List:
+    """Terminer le job et libérer ses successeurs (une transaction); renvoie les jobs libérés"""
+    with transaction.atomic():
+        job.mark_as_completed(result_data)
+        return release_dependents([job.pk])
+
+
+def fail_job(job: MediaJob, error_message: str, status: str = 'failed') -> None:
+    """Terminer le job en échec ('failed', ou 'dead' si abandonné) et annuler ses successeurs (une transaction)"""
+    with transaction.atomic():
+        if status == 'dead':
+            job.mark_as_dead(error_message)
+        else:
+            job.mark_as_failed(error_message)
+        cancel_dependents([job.pk], f"Dépendance {job.job_type} en échec")
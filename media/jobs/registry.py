@@ -0,0 +1,274 @@
+"""
+Registre des handlers de MediaJob, réservation (claim) et exécution des jobs.
+
+Nouvelles tentatives et baux:
+- claim_jobs() compte une tentative et pose un bail (lease_expires_at) au nom du worker;
+  LeaseKeeper le prolonge (heartbeat) tant que le handler s'exécute
+- un échec remet le job en attente avec run_after = maintenant + délai exponentiel;
+  après MEDIA_JOB_MAX_ATTEMPTS tentatives il passe 'dead' (dead-letter, successeurs annulés)
+- reclaim_expired_jobs() reprend les jobs dont le bail a expiré (worker arrêté)
+"""
+import importlib
+import logging
+import os
+import random
+import socket
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from media.jobs.pipelines import cancel_dependents, complete_job, fail_job, restore_dependents
+from media.models import MediaJob
+from media.services.job_events import publish_job_event
+
+logger = logging.getLogger(__name__)
+
+# Détenteur des baux posés par ce processus (MediaJob.locked_by)
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Modules importés au démarrage du worker pour enregistrer leurs handlers
+HANDLER_MODULES = [
+    'media.jobs.conversion',
+    'media.jobs.metadata',
+    'media.jobs.phash',
+    'media.jobs.transcription',
+]
+
+JOB_HANDLERS: Dict[str, Callable[[MediaJob], Optional[dict]]] = {}
+
+
+def register_handler(job_type: str):
+    """Décorateur: enregistrer la fonction comme handler du type de job"""
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+def load_handlers() -> None:
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+def claim_jobs(limit: int, job_types: Optional[Iterable[str]] = None, pks: Optional[Iterable] = None) -> List[MediaJob]:
+    """
+    Réserver jusqu'à `limit` jobs exécutables (en attente, run_after passé) et les passer en 'processing',
+    avec un bail de MEDIA_JOB_LEASE_SECONDS au nom de ce worker. Chaque réservation compte une tentative.
+    SKIP LOCKED (PostgreSQL) permet à plusieurs workers de réserver en parallèle sans se bloquer;
+    la requête parcourt l'index partiel media_job_runnable_idx (jobs en attente seulement).
+    `pks` limite la réservation à ces jobs (successeurs libérés par le worker lui-même).
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        queryset = MediaJob.objects.select_for_update(skip_locked=True).filter(status='pending', run_after__lte=now)
+        if job_types:
+            queryset = queryset.filter(job_type__in=list(job_types))
+        if pks is not None:
+            queryset = queryset.filter(pk__in=list(pks))
+        jobs = list(queryset.order_by('run_after')[:limit])
+        if jobs:
+            lease_expires_at = now + timedelta(seconds=settings.MEDIA_JOB_LEASE_SECONDS)
+            MediaJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status='processing', started_at=now, updated_at=now, attempts=F('attempts') + 1,
+                lease_expires_at=lease_expires_at, locked_by=WORKER_ID,
+            )
+            for job in jobs:
+                job.status = 'processing'
+                job.started_at = now
+                job.attempts += 1
+                job.lease_expires_at = lease_expires_at
+                job.locked_by = WORKER_ID
+    # Hors du bloc atomique: la réservation est validée avant la diffusion
+    # (publish_job_event diffère de toute façon jusqu'au commit d'une transaction englobante)
+    for job in jobs:
+        publish_job_event(job.pk, job.media_id, job.status, job.job_type)
+    return jobs
+
+
+def requeue_stale_jobs(stale_after_s: float) -> int:
+    """
+    Remettre en attente les jobs 'processing' sans mise à jour depuis `stale_after_s` secondes
+    (worker arrêté en cours de traitement). Les handlers qui enregistrent des points
+    de reprise (transcription) repartent de là où ils s'étaient arrêtés.
+    Les jobs réservés avec un bail sont repris automatiquement par reclaim_expired_jobs().
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale_after_s)
+    with transaction.atomic():
+        stale = list(
+            MediaJob.objects.select_for_update(skip_locked=True)
+            .filter(status='processing', updated_at__lt=cutoff)
+            .values_list('pk', 'media_id', 'job_type')
+        )
+        MediaJob.objects.filter(pk__in=[pk for pk, _, _ in stale]).update(
+            status='pending', lease_expires_at=None, locked_by='', updated_at=timezone.now(),
+        )
+        for pk, media_id, job_type in stale:
+            publish_job_event(pk, media_id, 'pending', job_type)
+    return len(stale)
+
+
+# ============ BAUX ET NOUVELLES TENTATIVES ============
+
+def retry_delay(attempts: int) -> float:
+    """Délai (s) avant la tentative suivante: exponentiel, plafonné, avec gigue (pas de reprise en rafale)"""
+    delay = min(settings.MEDIA_JOB_RETRY_MAX_DELAY, settings.MEDIA_JOB_RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def heartbeat(job: MediaJob) -> bool:
+    """
+    Prolonger le bail du job. Renvoie False si le bail a été perdu
+    (expiré et repris par un autre worker: le nombre de tentatives a changé).
+    """
+    now = timezone.now()
+    return MediaJob.objects.filter(pk=job.pk, status='processing', attempts=job.attempts).update(
+        lease_expires_at=now + timedelta(seconds=settings.MEDIA_JOB_LEASE_SECONDS), updated_at=now,
+    ) == 1
+
+
+class LeaseKeeper:
+    """Heartbeat du job dans un thread de fond (toutes les MEDIA_JOB_LEASE_SECONDS / 3) pendant son exécution"""
+
+    def __init__(self, job: MediaJob):
+        self.job = job
+        self.interval = settings.MEDIA_JOB_LEASE_SECONDS / 3
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'lease-{job.pk}', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                if not heartbeat(self.job):
+                    logger.warning(f"Job {self.job.pk}: bail perdu, repris par un autre worker")
+                    break
+        except Exception as exc:
+            logger.error(f"Heartbeat du job {self.job.pk} échoué: {exc}")
+        finally:
+            connection.close()
+
+
+def _lease_held(job: MediaJob) -> bool:
+    """Verrouiller le job s'il est toujours réservé par cette tentative (à appeler dans une transaction)"""
+    return MediaJob.objects.select_for_update().filter(pk=job.pk, status='processing', attempts=job.attempts).exists()
+
+
+def record_failure(job: MediaJob, error_message: str, retry: bool = True) -> None:
+    """
+    Échec d'une tentative: nouvel essai après retry_delay(), ou dead-letter ('dead', successeurs annulés)
+    une fois MEDIA_JOB_MAX_ATTEMPTS tentatives atteintes (ou si `retry` est False).
+    """
+    with transaction.atomic():
+        if not _lease_held(job):
+            logger.warning(f"Job {job.pk}: bail perdu, échec ignoré")
+            return
+        if retry and job.attempts < settings.MEDIA_JOB_MAX_ATTEMPTS:
+            job.mark_for_retry(error_message, timezone.now() + timedelta(seconds=retry_delay(job.attempts)))
+        else:
+            fail_job(job, error_message, status='dead')
+
+
+def reclaim_expired_jobs(limit: int = 1000) -> Dict[str, int]:
+    """
+    Reprendre les jobs 'processing' dont le bail a expiré (worker arrêté sans heartbeat):
+    remis en attente avec le délai de la tentative suivante, ou 'dead' si les tentatives sont épuisées.
+    Servi par l'index partiel media_job_lease_idx. Les jobs sans bail (suivis par webhook) ne sont pas concernés.
+
+    Returns:
+        {'requeued': n, 'dead': n}
+    """
+    now = timezone.now()
+    message = "Bail expiré sans heartbeat (worker arrêté ?)"
+    with transaction.atomic():
+        expired = list(
+            MediaJob.objects.select_for_update(skip_locked=True)
+            .filter(status='processing', lease_expires_at__lt=now)
+            .order_by('lease_expires_at')
+            .values_list('pk', 'media_id', 'job_type', 'attempts')[:limit]
+        )
+        by_attempts = defaultdict(list)
+        dead = []
+        for pk, _, _, attempts in expired:
+            if attempts >= settings.MEDIA_JOB_MAX_ATTEMPTS:
+                dead.append(pk)
+            else:
+                by_attempts[attempts].append(pk)
+        for attempts, pks in by_attempts.items():
+            MediaJob.objects.filter(pk__in=pks).update(
+                status='pending', run_after=now + timedelta(seconds=retry_delay(attempts)),
+                lease_expires_at=None, locked_by='', error_message=message, updated_at=now,
+            )
+        if dead:
+            MediaJob.objects.filter(pk__in=dead).update(
+                status='dead', completed_at=now, lease_expires_at=None, error_message=message, updated_at=now,
+            )
+            cancel_dependents(dead, "Dépendance abandonnée")
+        dead_ids = set(dead)
+        for pk, media_id, job_type, _ in expired:
+            publish_job_event(pk, media_id, 'dead' if pk in dead_ids else 'pending', job_type)
+    return {'requeued': len(expired) - len(dead), 'dead': len(dead)}
+
+
+def requeue_dead_jobs(job_ids: Iterable) -> int:
+    """
+    Relancer des jobs de la dead-letter: tentatives remises à zéro, exécutables immédiatement;
+    leurs successeurs annulés par l'abandon redeviennent 'blocked'.
+
+    Returns:
+        Nombre de jobs relancés
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            MediaJob.objects.select_for_update().filter(pk__in=list(job_ids), status='dead')
+            .values_list('pk', 'media_id', 'job_type')
+        )
+        pks = [pk for pk, _, _ in jobs]
+        MediaJob.objects.filter(pk__in=pks).update(
+            status='pending', attempts=0, run_after=now, completed_at=None, locked_by='', updated_at=now,
+        )
+        restore_dependents(pks)
+        for pk, media_id, job_type in jobs:
+            publish_job_event(pk, media_id, 'pending', job_type)
+    return len(jobs)
+
+
+# ============ EXÉCUTION ============
+
+def run_job(job: MediaJob) -> List:
+    """
+    Exécuter un job réservé et enregistrer son résultat (bail prolongé pendant l'exécution).
+    Un résultat arrivé après la reprise du job par un autre worker (bail expiré) est ignoré.
+
+    Returns:
+        UUID des successeurs du pipeline libérés par ce job (réservables aussitôt)
+    """
+    handler = JOB_HANDLERS.get(job.job_type)
+    if handler is None:
+        record_failure(job, f"Aucun handler pour le type de job '{job.job_type}'", retry=False)
+        return []
+    try:
+        with LeaseKeeper(job):
+            result = handler(job)
+    except Exception as exc:
+        logger.error(f"Job {job.pk} ({job.job_type}) failed (tentative {job.attempts}): {exc}", exc_info=True)
+        record_failure(job, str(exc))
+        return []
+    with transaction.atomic():
+        if not _lease_held(job):
+            logger.warning(f"Job {job.pk}: bail perdu, résultat ignoré")
+            return []
+        return complete_job(job, result)
@@ -0,0 +1,80 @@
+"""
+Handler 'transcription': transcription audio / vidéo par segments parallèles.
+
+Les segments (avec recouvrement) sont transcrits dans le pool de processus; chaque
+segment terminé est enregistré en TranscriptionSegment (point de reprise) et la
+progression écrite dans result_data. Un job repris ne retranscrit que les segments
+manquants, puis le texte complet est recollé dans result_data.
+"""
+from concurrent.futures import as_completed
+
+from django.conf import settings
+from django.utils import timezone
+
+from media.jobs.registry import register_handler
+from media.models import MediaJob, TranscriptionSegment
+from media.services.job_events import publish_job_event
+from media.services.storage import get_storage
+from media.services.transcription import (
+    get_process_pool,
+    plan_segments,
+    stitch_segments,
+    transcribe_segment,
+)
+
+
+def _save_progress(job, done, total):
+    """Progression visible pendant le traitement (écrasée par le résultat final)"""
+    progress = {'done': done, 'total': total}
+    MediaJob.objects.filter(pk=job.pk).update(result_data={'progress': progress}, updated_at=timezone.now())
+    publish_job_event(job.pk, job.media_id, 'processing', job.job_type, progress)
+
+
+@register_handler('transcription')
+def transcribe_media(job):
+    media = job.media
+    if media.file_type not in ('audio', 'video') or not media.duration_s:
+        raise ValueError(f"Le média {media.pk} n'a pas de piste audio transcriptible")
+
+    plan = plan_segments(
+        media.duration_s,
+        settings.MEDIA_TRANSCRIPTION_SEGMENT_SECONDS,
+        settings.MEDIA_TRANSCRIPTION_OVERLAP_SECONDS,
+    )
+    done = {segment.index: segment for segment in job.transcription_segments.all()}
+    _save_progress(job, len(done), len(plan))
+
+    # Chemin local si le fichier est sur ce disque: ffmpeg lit sans passer par HTTP
+    source = get_storage(media.storage_backend).source(media.imagekit_file_id, media.imagekit_url)
+    pool = get_process_pool()
+    futures = {
+        pool.submit(
+            transcribe_segment,
+            source, start, end,
+            settings.MEDIA_TRANSCRIPTION_RECOGNIZER,
+            settings.MEDIA_TRANSCRIPTION_MODEL,
+            settings.MEDIA_TRANSCRIPTION_SAMPLE_RATE,
+        ): (index, start, end)
+        for index, start, end in plan if index not in done
+    }
+    try:
+        for future in as_completed(futures):
+            index, start, end = futures[future]
+            segment, _ = TranscriptionSegment.objects.update_or_create(
+                job=job, index=index,
+                defaults={'start_s': start, 'end_s': end, 'pieces': future.result()},
+            )
+            done[index] = segment
+            _save_progress(job, len(done), len(plan))
+    finally:
+        # Échec d'un segment: ne pas lancer ceux encore en file (les terminés restent enregistrés)
+        for future in futures:
+            future.cancel()
+
+    pieces = stitch_segments([(s.start_s, s.end_s, s.pieces) for s in done.values()])
+    return {
+        'text': ' '.join(piece['text'] for piece in pieces),
+        'segments': pieces,
+        'duration_s': media.duration_s,
+        'segment_count': len(plan),
+    }
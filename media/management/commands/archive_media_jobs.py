@@ -0,0 +1,58 @@
+"""
+Rétention des MediaJob: archivage des jobs terminés et rapport de taille des tables.
+
+Exemples:
+    python manage.py archive_media_jobs                  # MEDIA_JOB_RETENTION_DAYS
+    python manage.py archive_media_jobs --days 7 --batch-size 500 --pause 0.2
+    python manage.py archive_media_jobs --report         # tailles seulement
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from media.services.job_retention import archive_jobs, purge_archive, table_sizes
+
+
+def _format_bytes(value):
+    if value is None:
+        return 'n/d'
+    for unit in ('o', 'Ko', 'Mo', 'Go'):
+        if value < 1024 or unit == 'Go':
+            return f"{value:.1f} {unit}" if unit != 'o' else f"{value} o"
+        value /= 1024
+
+
+class Command(BaseCommand):
+    help = "Déplacer les MediaJob terminés vers MediaJobsArchive par lots, et afficher la taille des tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Âge minimum (défaut: MEDIA_JOB_RETENTION_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=None, help='Jobs par transaction')
+        parser.add_argument('--max-batches', type=int, default=None, help="Nombre maximum de lots pour ce passage")
+        parser.add_argument('--pause', type=float, default=0.0, help='Pause entre deux lots (secondes)')
+        parser.add_argument('--report', action='store_true', help="Afficher les tailles sans rien archiver")
+
+    def handle(self, *args, **options):
+        if not options['report']:
+            days = options['days'] if options['days'] is not None else settings.MEDIA_JOB_RETENTION_DAYS
+            batch_size = options['batch_size'] or settings.MEDIA_JOB_ARCHIVE_BATCH_SIZE
+            started = time.monotonic()
+            count = archive_jobs(
+                days,
+                batch_size=batch_size,
+                max_batches=options['max_batches'],
+                pause=options['pause'],
+                progress=lambda n: self.stdout.write(f"{n} jobs archivés"),
+            )
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(f"{count} jobs de plus de {days} jours archivés en {elapsed:.1f}s"))
+            if settings.MEDIA_JOB_ARCHIVE_KEEP_DAYS:
+                purged = purge_archive(settings.MEDIA_JOB_ARCHIVE_KEEP_DAYS, batch_size=batch_size)
+                self.stdout.write(f"{purged} jobs archivés supprimés (conservation: {settings.MEDIA_JOB_ARCHIVE_KEEP_DAYS} jours)")
+
+        for table, sizes in table_sizes().items():
+            self.stdout.write(
+                f"{table:18s} {sizes['rows']:>10} lignes | données {_format_bytes(sizes['table_bytes']):>10} | "
+                f"index {_format_bytes(sizes['index_bytes']):>10} | total {_format_bytes(sizes['total_bytes']):>10}"
+            )
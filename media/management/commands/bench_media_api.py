@@ -0,0 +1,94 @@
+"""
+Benchmark des endpoints de lecture Media: coût CPU et octets envoyés par requête.
+
+Scénarios comparés sur le même chemin:
+- json       JSONRenderer standard, sans compression
+- orjson     FastJSONRenderer (orjson), sans compression
+- orjson+gz  FastJSONRenderer + gzip (Accept-Encoding: gzip)
+- 304        revalidation avec If-None-Match (client à jour)
+
+Le CPU par requête inclut toute la pile (middlewares, auth, requêtes SQL, sérialisation);
+la colonne "rendu" isole le passage données -> octets du renderer.
+
+Exemple:
+    python manage.py bench_media_api --runs 200 --path /api/media/ --path "/api/media/?page=2"
+"""
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.urls import resolve
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+from media.renderers import FastJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = "Mesurer CPU et octets par requête des endpoints Media (renderer, gzip, 304)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=100)
+        parser.add_argument('--path', action='append', help='Chemin(s) à mesurer (défaut: /api/media/)')
+        parser.add_argument('--user', help="Email de l'utilisateur (défaut: celui qui a le plus de médias)")
+
+    def handle(self, *args, **options):
+        user = self._get_user(options['user'])
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson n'est pas installé: le scénario orjson utilise le repli json"))
+
+        for path in options['path'] or ['/api/media/']:
+            view_class = resolve(path.split('?')[0]).func.view_class
+            renderer_classes = view_class.renderer_classes
+            self.stdout.write(f"\n{path} ({user.email}, {options['runs']} requêtes)")
+            baseline = None
+            for name, renderer, headers in (
+                ('json', JSONRenderer, {}),
+                ('orjson', FastJSONRenderer, {}),
+                ('orjson+gz', FastJSONRenderer, {'HTTP_ACCEPT_ENCODING': 'gzip'}),
+                ('304', FastJSONRenderer, 'revalidate'),
+            ):
+                view_class.renderer_classes = [renderer, BrowsableAPIRenderer]
+                cpu_ms, render_us, size, status = self._measure(client, path, headers, options['runs'])
+                baseline = baseline or (cpu_ms, size)
+                self.stdout.write(
+                    f"  {name:10s} HTTP {status} | CPU {cpu_ms:7.3f} ms/req ({cpu_ms / baseline[0]:5.0%}) | "
+                    f"rendu {render_us:7.1f} µs | {size:8d} octets ({size / max(baseline[1], 1):5.0%})"
+                )
+            view_class.renderer_classes = renderer_classes
+
+    def _get_user(self, email):
+        User = get_user_model()
+        if email:
+            user = User.objects.filter(email=email).first()
+        else:
+            user = User.objects.annotate(n=Count('uploaded_media')).order_by('-n').first()
+        if user is None:
+            raise CommandError("Aucun utilisateur trouvé")
+        return user
+
+    def _measure(self, client, path, headers, runs):
+        if headers == 'revalidate':
+            etag = client.get(path, HTTP_ACCEPT='application/json')['ETag']
+            headers = {'HTTP_IF_NONE_MATCH': etag}
+        client.get(path, HTTP_ACCEPT='application/json', **headers)  # chauffe
+        samples = []
+        response = None
+        for _ in range(runs):
+            start = time.process_time()
+            response = client.get(path, HTTP_ACCEPT='application/json', **headers)
+            body = b''.join(response) if response.streaming else response.content
+            samples.append(time.process_time() - start)
+
+        render_us = 0.0
+        if getattr(response, 'data', None) is not None:
+            renderer = response.accepted_renderer
+            start = time.process_time()
+            for _ in range(runs):
+                renderer.render(response.data, response.accepted_media_type, response.renderer_context)
+            render_us = (time.process_time() - start) / runs * 1e6
+        return statistics.mean(samples) * 1000, render_us, len(body), response.status_code
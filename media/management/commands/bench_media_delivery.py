@@ -0,0 +1,146 @@
+"""
+Benchmark de la livraison des fichiers locaux: débit et CPU par requête.
+
+Un fichier de --size Mo est écrit dans le stockage local, puis servi par LocalFileView
+(media.services.delivery) vers une socket vidée par un processus fils:
+- naive      HttpResponse(f.read()): fichier entier en mémoire, copié par Python
+- stream     FileResponse itérée en Python (serveur WSGI sans wsgi.file_wrapper)
+- asgi       réponse ASGI: blocs lus dans un thread, itérés en asynchrone
+- sendfile   FileResponse + os.sendfile sur le descripteur (gunicorn avec wsgi.file_wrapper)
+- x-accel    MEDIA_DELIVERY_MODE='x-accel-redirect': coût Django seul, le proxy envoie les octets
+
+Chaque scénario est mesuré sur le fichier entier puis sur une plage de --range-kb Ko.
+Le CPU est celui du processus qui sert la requête, tous threads compris (le lecteur est exclu).
+
+Exemple:
+    python manage.py bench_media_delivery --size 256 --runs 5
+"""
+import asyncio
+import io
+import os
+import socket
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, override_settings
+
+from media.services.storage import LocalStorage
+from media.views import LocalFileView
+
+
+class Command(BaseCommand):
+    help = "Mesurer débit et CPU par requête de la livraison des fichiers locaux (Python, sendfile, proxy)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=128, help='Taille du fichier en Mo')
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--range-kb', type=int, default=1024, help='Taille de la plage demandée (Ko)')
+
+    def handle(self, *args, **options):
+        size = options['size'] * 1024 * 1024
+        storage = LocalStorage()
+        self.stdout.write(f"Écriture d'un fichier de {options['size']} Mo dans {storage.root}...")
+        result = storage.save(io.BytesIO(os.urandom(size)), 'bench.bin', folder='/bench')
+        self.path = f"/api/files/{result['fileId']}/bench.bin"
+        self.file_id = result['fileId']
+
+        sender, receiver = socket.socketpair()
+        pid = os.fork()
+        if pid == 0:
+            sender.close()
+            self._drain(receiver)
+            os._exit(0)
+        receiver.close()
+        self.sink = sender
+        try:
+            range_bytes = options['range_kb'] * 1024
+            start = size // 2
+            for label, headers, expected in (
+                ('fichier entier', {}, size),
+                (f'plage {options["range_kb"]} Ko', {'Range': f'bytes={start}-{start + range_bytes - 1}'}, range_bytes),
+            ):
+                self.stdout.write(f"\n{label} ({options['runs']} requêtes)")
+                for name in ('naive', 'stream', 'asgi', 'sendfile', 'x-accel'):
+                    cpu_ms, wall_s, sent, status = self._measure(name, headers, options['runs'])
+                    throughput = sent / wall_s / 1024 / 1024 if sent else 0
+                    self.stdout.write(
+                        f"  {name:9s} HTTP {status} | CPU {cpu_ms:8.2f} ms/req | "
+                        f"{throughput:8.0f} Mo/s | {sent:10d} octets envoyés par Django"
+                    )
+                    if name != 'x-accel' and sent != expected:
+                        self.stdout.write(self.style.ERROR(f"    attendu {expected} octets"))
+        finally:
+            sender.close()
+            os.waitpid(pid, 0)
+            storage.delete([self.file_id])
+
+    @staticmethod
+    def _drain(sock):
+        buffer = bytearray(1024 * 1024)
+        while sock.recv_into(buffer):
+            pass
+
+    def _measure(self, name, headers, runs):
+        cpu, wall = [], []
+        sent = status = 0
+        for _ in range(runs):
+            start_wall, start_cpu = time.perf_counter(), time.process_time()
+            sent, status = getattr(self, f"_serve_{name.replace('-', '_')}")(headers)
+            cpu.append(time.process_time() - start_cpu)
+            wall.append(time.perf_counter() - start_wall)
+        return statistics.mean(cpu) * 1000, statistics.mean(wall), sent, status
+
+    def _view(self, request):
+        return LocalFileView.as_view()(request, file_id=self.file_id, name='bench.bin')
+
+    def _serve_naive(self, headers):
+        path = LocalStorage().path(self.file_id)
+        with open(path, 'rb') as f:
+            data = f.read()
+        status = 200
+        if 'Range' in headers:
+            first, last = headers['Range'].split('=')[1].split('-')
+            data, status = data[int(first):int(last) + 1], 206
+        response = HttpResponse(data, content_type='application/octet-stream')
+        self.sink.sendall(response.content)
+        return len(response.content), status
+
+    def _serve_stream(self, headers):
+        response = self._view(RequestFactory().get(self.path, headers=headers))
+        sent = 0
+        for chunk in response:
+            self.sink.sendall(chunk)
+            sent += len(chunk)
+        response.close()
+        return sent, response.status_code
+
+    def _serve_asgi(self, headers):
+        async def serve():
+            response = await asyncio.to_thread(self._view, AsyncRequestFactory().get(self.path, headers=headers))
+            sent = 0
+            async for chunk in response:
+                self.sink.sendall(chunk)
+                sent += len(chunk)
+            return sent, response.status_code
+        return asyncio.run(serve())
+
+    def _serve_sendfile(self, headers):
+        # Comme gunicorn: os.sendfile depuis la position courante, borné par Content-Length
+        response = self._view(RequestFactory().get(self.path, headers=headers))
+        fileno = response.file_to_stream.fileno()
+        offset = os.lseek(fileno, 0, os.SEEK_CUR)
+        remaining = int(response['Content-Length'])
+        while remaining:
+            sent = os.sendfile(self.sink.fileno(), fileno, offset, remaining)
+            offset += sent
+            remaining -= sent
+        response.close()
+        return int(response['Content-Length']), response.status_code
+
+    def _serve_x_accel(self, headers):
+        with override_settings(MEDIA_DELIVERY_MODE='x-accel-redirect'):
+            response = self._view(RequestFactory().get(self.path, headers=headers))
+        self.sink.sendall(response.serialize_headers())
+        return len(response.content), response.status_code
@@ -0,0 +1,111 @@
+"""
+Export en flux des tables Media / MediaJob vers un fichier ou stdout.
+
+Exemples:
+    python manage.py export_media jobs --format jsonl --gzip -o jobs.jsonl.gz
+    python manage.py export_media media --format parquet -o media.parquet --since 2025-01-01
+"""
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from media.services.export_service import (
+    DATASETS,
+    EXPORT_CHUNK_SIZE,
+    export_rows,
+    gzip_stream,
+    iter_export,
+)
+
+
+class Command(BaseCommand):
+    help = "Exporter Media ou MediaJob en CSV/JSONL (gzip optionnel) ou Parquet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', choices=['csv', 'jsonl', 'parquet'], default='jsonl')
+        parser.add_argument('-o', '--output', help='Fichier de sortie (stdout par défaut)')
+        parser.add_argument('--gzip', action='store_true', help='Compresser la sortie (csv/jsonl)')
+        parser.add_argument('--since', help='created_at >= since (ISO 8601)')
+        parser.add_argument('--until', help='created_at < until (ISO 8601)')
+        parser.add_argument('--uploader', help='UUID de l\'uploader')
+        parser.add_argument('--file-type', help='Type de fichier (image, video, ...)')
+
+    def handle(self, *args, **options):
+        filters = {
+            'since': options['since'],
+            'until': options['until'],
+            'uploader': options['uploader'],
+            'file_type': options['file_type'],
+        }
+
+        try:
+            if options['format'] == 'parquet':
+                if not options['output']:
+                    raise CommandError("--output est obligatoire pour le format parquet")
+                self._write_parquet(options['dataset'], options['output'], filters)
+                return
+
+            chunks = iter_export(options['dataset'], options['format'], **filters)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['gzip']:
+            self._write_bytes(gzip_stream(chunks), options['output'])
+        else:
+            self._write_bytes((c.encode('utf-8') for c in chunks), options['output'])
+
+    def _write_bytes(self, chunks, output):
+        fh = open(output, 'wb') if output else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                fh.write(chunk)
+        finally:
+            if output:
+                fh.close()
+
+    def _write_parquet(self, dataset, output, filters):
+        """Écrire un fichier Parquet par row groups de EXPORT_CHUNK_SIZE lignes"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise CommandError("Le format parquet nécessite pyarrow (pip install pyarrow)")
+
+        model = DATASETS[dataset]['model']
+        fields = DATASETS[dataset]['fields']
+        # Entiers natifs, tout le reste (UUID, dates, JSON) en texte: schéma stable entre lots
+        int_fields = {
+            f for f in fields
+            if model._meta.get_field(f).get_internal_type() in ('IntegerField', 'BigIntegerField')
+        }
+        schema = pa.schema([(f, pa.int64() if f in int_fields else pa.string()) for f in fields])
+        writer = pq.ParquetWriter(output, schema)
+        batch = []
+
+        def to_text(value):
+            if value is None or isinstance(value, str):
+                return value
+            if isinstance(value, (dict, list)):
+                return json.dumps(value, cls=DjangoJSONEncoder)
+            return str(value)
+
+        def flush():
+            columns = {
+                f: [row[f] if f in int_fields else to_text(row[f]) for row in batch]
+                for f in fields
+            }
+            writer.write_table(pa.table(columns, schema=schema))
+
+        try:
+            for row in export_rows(dataset, **filters):
+                batch.append(row)
+                if len(batch) >= EXPORT_CHUNK_SIZE:
+                    flush()
+                    batch = []
+            if batch:
+                flush()
+        finally:
+            writer.close()
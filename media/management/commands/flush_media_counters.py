@@ -0,0 +1,38 @@
+"""
+Écriture des compteurs de vues / téléchargements en attente dans MediaCounters.
+
+Avec Redis (REDIS_URL), vide le tampon partagé par tous les workers: utile si les workers
+web tournent avec MEDIA_COUNTER_FLUSH_INTERVAL=0 (pas de thread de fond). Sans Redis,
+chaque processus écrit ses propres compteurs: la commande n'a rien à vider.
+
+Exemple:
+    python manage.py flush_media_counters --loop --interval 10
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from media.services.counters import get_counter_service
+
+
+class Command(BaseCommand):
+    help = "Écrire les compteurs de vues / téléchargements en attente (une fois, ou en boucle avec --loop)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Recommencer toutes les --interval secondes')
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help='Intervalle (s) entre deux écritures (défaut: MEDIA_COUNTER_FLUSH_INTERVAL)',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or settings.MEDIA_COUNTER_FLUSH_INTERVAL or 10
+        service = get_counter_service()
+        while True:
+            written = service.flush()
+            if written or not options['loop']:
+                self.stdout.write(f"{written} médias mis à jour")
+            if not options['loop']:
+                return
+            time.sleep(interval)
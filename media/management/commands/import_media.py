@@ -0,0 +1,175 @@
+"""
+Import en masse de Media depuis un manifeste CSV ou JSONL.
+
+Colonnes attendues: filename, size, mime, imagekit_file_id, imagekit_url,
+uploader_email (optionnelles: imagekit_thumbnail_url, width, height, duration_s).
+Les lignes invalides (JSON malformé, uploader inconnu, valeurs non numériques...) sont ignorées.
+
+Chaque lot est écrit avec l'agrégat StorageUsage de ses uploaders et ses documents de recherche,
+dans la même transaction que le bulk_create: un import interrompu laisse des agrégats et un index à jour.
+
+Exemple:
+    python manage.py import_media legacy.jsonl --batch-size 5000
+"""
+import csv
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import User
+from media.models import Media, StorageUsage
+from media.services import search
+from media.services.file_types import guess_file_type
+from media.services.storage_usage import rebuild_usage
+
+
+class Command(BaseCommand):
+    help = "Importer des Media en masse depuis un manifeste CSV/JSONL (bulk_create + checkpoint)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('manifest', help='Chemin du manifeste (.csv ou .jsonl)')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            help='Format du manifeste (déduit de l\'extension par défaut)',
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Fichier de checkpoint (défaut: <manifest>.checkpoint)',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignorer le checkpoint existant et repartir du début',
+        )
+
+    def handle(self, *args, **options):
+        manifest = options['manifest']
+        if not os.path.exists(manifest):
+            raise CommandError(f"Manifeste introuvable: {manifest}")
+
+        fmt = options['format'] or ('csv' if manifest.endswith('.csv') else 'jsonl')
+        batch_size = options['batch_size']
+        checkpoint_path = options['checkpoint'] or f"{manifest}.checkpoint"
+
+        done = 0 if options['restart'] else self._read_checkpoint(checkpoint_path)
+        if done:
+            self.stdout.write(f"Reprise après {done} lignes (checkpoint {checkpoint_path})")
+
+        # Résolution email -> uuid en mémoire: une seule requête pour tous les uploaders
+        uploaders = dict(User.objects.values_list('email', 'uuid').iterator(chunk_size=10000))
+
+        processed = done
+        position = done
+        skipped = 0
+        batch = []
+        started = time.monotonic()
+
+        for index, row in enumerate(self._iter_rows(manifest, fmt)):
+            if index < done:
+                continue
+            position = index + 1
+
+            obj = self._build_media(row, uploaders)
+            if obj is None:
+                skipped += 1
+            else:
+                batch.append(obj)
+
+            if position - processed >= batch_size:
+                processed = self._flush(batch, position, checkpoint_path)
+                batch = []
+                self._report(processed, done, skipped, started)
+
+        processed = self._flush(batch, position, checkpoint_path)
+        self._report(processed, done, skipped, started)
+        self.stdout.write(self.style.SUCCESS(f"Import terminé: {processed} lignes, {skipped} ignorées"))
+
+    def _iter_rows(self, manifest, fmt):
+        """Lire le manifeste ligne par ligne sans le charger en mémoire (None pour une ligne JSONL invalide)"""
+        with open(manifest, newline='', encoding='utf-8') as fh:
+            if fmt == 'csv':
+                yield from csv.DictReader(fh)
+            else:
+                for line in fh:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        row = None
+                    yield row if isinstance(row, dict) else None
+
+    def _build_media(self, row, uploaders):
+        """Construire une instance Media non sauvegardée, ou None si la ligne est invalide"""
+        if row is None:
+            return None
+        uploader_id = uploaders.get((row.get('uploader_email') or '').strip())
+        if uploader_id is None or not row.get('imagekit_file_id') or not row.get('imagekit_url'):
+            return None
+
+        try:
+            file_size = int(row.get('size') or 0)
+            width = int(row.get('width') or 0)
+            height = int(row.get('height') or 0)
+            duration_s = int(row.get('duration_s') or 0)
+        except (TypeError, ValueError):
+            # Valeur non numérique ("12 Mo", liste JSON...): ligne ignorée au lieu d'arrêter l'import
+            return None
+
+        mime = row.get('mime') or 'application/octet-stream'
+        file_type = row.get('file_type') or guess_file_type(mime)
+        if file_type == StorageUsage.TOTAL:
+            # Clé réservée au total de l'uploader dans StorageUsage
+            return None
+        return Media(
+            uploader_id=uploader_id,
+            original_filename=(row.get('filename') or '')[:255],
+            file_size=file_size,
+            mime_type=mime,
+            file_type=file_type,
+            imagekit_file_id=row['imagekit_file_id'],
+            imagekit_url=row['imagekit_url'],
+            imagekit_thumbnail_url=row.get('imagekit_thumbnail_url') or None,
+            width=width,
+            height=height,
+            duration_s=duration_s,
+        )
+
+    def _flush(self, batch, position, checkpoint_path):
+        """Écrire un lot puis enregistrer la position atteinte (un lot rejoué après crash est sans effet)"""
+        with transaction.atomic():
+            if batch:
+                # Les doublons sur imagekit_file_id (import relancé, fichiers déjà présents) sont ignorés
+                Media.objects.bulk_create(batch, ignore_conflicts=True)
+                # bulk_create ne déclenche pas post_save: agrégats et index mis à jour pour le lot.
+                # Les médias sont relus: une ligne en conflit n'a pas été insérée avec l'uuid du lot
+                rebuild_usage({obj.uploader_id for obj in batch})
+                search.index_objects(
+                    Media.objects.alive().filter(imagekit_file_id__in=[obj.imagekit_file_id for obj in batch])
+                )
+        self._write_checkpoint(checkpoint_path, position)
+        return position
+
+    def _report(self, processed, done, skipped, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        rate = (processed - done) / elapsed
+        self.stdout.write(f"{processed} lignes traitées ({skipped} ignorées) - {rate:.0f} lignes/s")
+
+    def _read_checkpoint(self, path):
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding='utf-8') as fh:
+            return int(json.load(fh).get('rows', 0))
+
+    def _write_checkpoint(self, path, rows):
+        # Écriture atomique: un crash pendant l'écriture ne corrompt pas le checkpoint
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump({'rows': rows}, fh)
+        os.replace(tmp_path, path)
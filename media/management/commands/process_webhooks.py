@@ -0,0 +1,35 @@
+"""
+Worker de traitement des webhooks reçus (WebhookEvent).
+
+Exemple:
+    python manage.py process_webhooks --source imagekit --batch-size 200
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from media.webhooks.registry import load_handlers, process_pending
+
+
+class Command(BaseCommand):
+    help = "Traiter les webhooks en attente par lots (boucle infinie, ou --once)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Événements traités par transaction')
+        parser.add_argument('--source', action='append', help='Limiter à une source, répétable')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Attente (s) quand la file est vide')
+        parser.add_argument('--once', action='store_true', help='Traiter un lot puis s\'arrêter')
+
+    def handle(self, *args, **options):
+        load_handlers()
+        while True:
+            events = process_pending(options['batch_size'], options['source'])
+            if events:
+                counts = {}
+                for event in events:
+                    counts[event.status] = counts.get(event.status, 0) + 1
+                self.stdout.write(f"{len(events)} événements: {counts}")
+            if options['once']:
+                break
+            if not events:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,27 @@
+"""
+Reconstruction de l'index de recherche (SearchDocuments / SearchTags) depuis Media et HttpUrl.
+
+À lancer après un import en masse (bulk_create ne déclenche pas les signaux)
+ou après un changement des champs indexés.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from media.services.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Réindexer Media et HttpUrl pour la recherche plein texte"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Objets par lot')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = rebuild_search_index(
+            batch_size=options['batch_size'],
+            progress=lambda n: self.stdout.write(f"{n} objets indexés"),
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Index de recherche reconstruit: {count} objets en {elapsed:.1f}s"))
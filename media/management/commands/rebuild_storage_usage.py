@@ -0,0 +1,46 @@
+"""
+Reconstruction de l'agrégat StorageUsage depuis la table Media, par lots d'uploaders.
+
+À lancer après un import en masse (bulk_create ne déclenche pas les signaux)
+ou pour corriger une dérive éventuelle.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.models import User
+from media.services.storage_usage import rebuild_usage
+
+
+class Command(BaseCommand):
+    help = "Recalculer StorageUsage (espace utilisé par uploader / type) par lots"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Uploaders par lot')
+        parser.add_argument('--uploader', action='append', help='Limiter à un uploader (UUID), répétable')
+
+    def handle(self, *args, **options):
+        if options['uploader']:
+            uploader_ids = iter(options['uploader'])
+        else:
+            uploader_ids = User.objects.order_by().values_list('uuid', flat=True).iterator(chunk_size=5000)
+
+        batch_size = options['batch_size']
+        started = time.monotonic()
+        users = rows = 0
+        batch = []
+        for uploader_id in uploader_ids:
+            batch.append(uploader_id)
+            if len(batch) >= batch_size:
+                rows += rebuild_usage(batch)
+                users += len(batch)
+                batch = []
+                self.stdout.write(f"{users} uploaders traités")
+        if batch:
+            rows += rebuild_usage(batch)
+            users += len(batch)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"StorageUsage reconstruit: {users} uploaders, {rows} lignes en {elapsed:.1f}s"
+        ))
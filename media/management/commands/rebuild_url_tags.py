@@ -0,0 +1,26 @@
+"""
+Reconstruction de la table HttpUrlTags depuis le champ JSON HttpUrl.tags.
+
+À lancer après un import en masse (bulk_create ne déclenche pas les signaux).
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from media.services.url_tags import rebuild_tags
+
+
+class Command(BaseCommand):
+    help = "Recalculer HttpUrlTags (forme normalisée des tags d'URL) par lots"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='URLs par lot')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = rebuild_tags(
+            batch_size=options['batch_size'],
+            progress=lambda n: self.stdout.write(f"{n} URLs traitées"),
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"HttpUrlTags reconstruit: {count} URLs en {elapsed:.1f}s"))
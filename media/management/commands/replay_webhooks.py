@@ -0,0 +1,60 @@
+"""
+Rejeu de webhooks: remet une plage d'événements en file d'attente.
+
+Exemples:
+    python manage.py replay_webhooks --from-id 1200 --to-id 1500
+    python manage.py replay_webhooks --source imagekit --since 2025-01-01 --status failed --process
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from media.models import WebhookEvent
+from media.services.export_service import parse_bound
+from media.webhooks.registry import load_handlers, process_pending, replay_events
+
+
+class Command(BaseCommand):
+    help = "Remettre des webhooks en attente (par plage d'id, date, source, type ou statut)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from-id', type=int, help='Premier id (inclus)')
+        parser.add_argument('--to-id', type=int, help='Dernier id (inclus)')
+        parser.add_argument('--since', help='Reçus à partir de (ISO 8601)')
+        parser.add_argument('--until', help='Reçus avant (ISO 8601)')
+        parser.add_argument('--source', help='Source (imagekit, transcoder)')
+        parser.add_argument('--type', dest='event_type', help='Type d\'événement')
+        parser.add_argument('--status', action='append', help='Statut actuel, répétable (défaut: tous)')
+        parser.add_argument('--process', action='store_true', help='Traiter immédiatement les événements rejoués')
+        parser.add_argument('--batch-size', type=int, default=100, help='Taille des lots avec --process')
+
+    def handle(self, *args, **options):
+        events = WebhookEvent.objects.all()
+        if options['from_id'] is not None:
+            events = events.filter(id__gte=options['from_id'])
+        if options['to_id'] is not None:
+            events = events.filter(id__lte=options['to_id'])
+        try:
+            if options['since']:
+                events = events.filter(received_at__gte=parse_bound(options['since']))
+            if options['until']:
+                events = events.filter(received_at__lt=parse_bound(options['until']))
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if options['source']:
+            events = events.filter(source=options['source'])
+        if options['event_type']:
+            events = events.filter(event_type=options['event_type'])
+        if options['status']:
+            events = events.filter(status__in=options['status'])
+
+        count = replay_events(events)
+        self.stdout.write(f"{count} événements remis en attente")
+
+        if options['process'] and count:
+            load_handlers()
+            processed = 0
+            while True:
+                batch = process_pending(options['batch_size'], [options['source']] if options['source'] else None)
+                if not batch:
+                    break
+                processed += len(batch)
+            self.stdout.write(self.style.SUCCESS(f"{processed} événements traités"))
@@ -0,0 +1,52 @@
+"""
+Rapport des clusters de quasi-doublons (empreintes perceptuelles).
+
+Exemple:
+    python manage.py report_duplicates --kind phash --distance 6 -o duplicates.jsonl
+"""
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from media.models import Media
+from media.services.duplicates import DEFAULT_MAX_DISTANCE, duplicate_clusters
+from media.services.hash_index import HASH_KINDS
+
+
+class Command(BaseCommand):
+    help = "Lister les clusters de médias quasi identiques (JSONL, un cluster par ligne)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=HASH_KINDS, default='phash')
+        parser.add_argument('--distance', type=int, default=DEFAULT_MAX_DISTANCE, help='Distance de Hamming max')
+        parser.add_argument('-o', '--output', help='Fichier de sortie (stdout par défaut)')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        clusters = duplicate_clusters(options['kind'], options['distance'])
+
+        out = open(options['output'], 'w', encoding='utf-8') if options['output'] else sys.stdout
+        wasted = reported = 0
+        try:
+            for cluster in clusters:
+                media = list(
+                    Media.objects.alive().filter(pk__in=cluster)
+                    .order_by('created_at')
+                    .values('uuid', 'original_filename', 'file_size', 'uploader_id', 'created_at')
+                )
+                if len(media) < 2:
+                    continue  # doublons supprimés entre-temps
+                # On garde le plus ancien: le reste est de l'espace récupérable
+                wasted += sum(m['file_size'] for m in media[1:])
+                reported += 1
+                out.write(json.dumps({'size': len(media), 'media': media}, default=str) + '\n')
+        finally:
+            if options['output']:
+                out.close()
+
+        self.stderr.write(
+            f"{reported} clusters, {wasted} octets récupérables "
+            f"({time.monotonic() - started:.1f}s)"
+        )
@@ -0,0 +1,48 @@
+"""
+Worker des suppressions différées (DeletionRequest): purge des médias, jobs, URLs
+et fichiers ImageKit par lots.
+
+Exemple:
+    python manage.py run_deletions --batch-size 200 --requeue-stale 600
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from media.services.deletion import claim_request, requeue_stale_requests, run_request
+
+
+class Command(BaseCommand):
+    help = "Exécuter les demandes de suppression en attente (boucle infinie, ou --once)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Médias purgés par lot (défaut: DELETION_BATCH_SIZE)')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Attente (s) quand la file est vide')
+        parser.add_argument(
+            '--requeue-stale', type=float, default=None,
+            help="Remettre en attente les demandes 'running' sans progression depuis N secondes",
+        )
+        parser.add_argument('--once', action='store_true', help='Traiter les demandes en attente puis s\'arrêter')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or settings.DELETION_BATCH_SIZE
+        while True:
+            if options['requeue_stale']:
+                requeued = requeue_stale_requests(options['requeue_stale'])
+                if requeued:
+                    self.stdout.write(f"{requeued} demandes bloquées remises en attente")
+            # Une demande en échec n'est reprise qu'après son délai (run_after): --once ne boucle pas dessus
+            deletion = claim_request()
+            if deletion is not None:
+                started = time.monotonic()
+                run_request(deletion, batch_size)
+                deletion.refresh_from_db()
+                self.stdout.write(
+                    f"{deletion.get_target_type_display()} {deletion.target_id}: {deletion.get_status_display()} "
+                    f"en {time.monotonic() - started:.1f}s {deletion.progress}"
+                )
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
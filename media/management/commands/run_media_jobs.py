@@ -0,0 +1,63 @@
+"""
+Worker de traitement des MediaJob.
+
+Les successeurs libérés par un job du pipeline (MEDIA_JOB_PIPELINES) sont réservés et
+exécutés aussitôt par le même worker, sans attendre l'itération suivante.
+Toutes les --reclaim-interval secondes, les jobs dont le bail a expiré (worker arrêté)
+sont remis en attente ou abandonnés (dead-letter).
+
+Exemple:
+    python manage.py run_media_jobs --job-type conversion --batch-size 4
+"""
+import time
+from collections import deque
+
+from django.core.management.base import BaseCommand
+
+from media.jobs.registry import claim_jobs, load_handlers, reclaim_expired_jobs, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Traiter les MediaJob en attente (boucle infinie, ou --once)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs réservés par itération')
+        parser.add_argument('--job-type', action='append', help='Limiter à un type de job, répétable')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Attente (s) quand la file est vide')
+        parser.add_argument(
+            '--requeue-stale', type=float, metavar='SECONDS',
+            help='Au démarrage, remettre en attente les jobs en cours sans progression depuis SECONDS',
+        )
+        parser.add_argument(
+            '--reclaim-interval', type=float, default=30.0,
+            help='Intervalle (s) de reprise des jobs au bail expiré (0 = jamais)',
+        )
+        parser.add_argument('--once', action='store_true', help='Traiter un lot puis s\'arrêter')
+
+    def handle(self, *args, **options):
+        load_handlers()
+        if options['requeue_stale']:
+            count = requeue_stale_jobs(options['requeue_stale'])
+            self.stdout.write(f"{count} jobs interrompus remis en attente")
+        last_reclaim = 0.0
+        while True:
+            if options['reclaim_interval'] and time.monotonic() - last_reclaim >= options['reclaim_interval']:
+                last_reclaim = time.monotonic()
+                reclaimed = reclaim_expired_jobs()
+                if any(reclaimed.values()):
+                    self.stdout.write(
+                        f"Baux expirés: {reclaimed['requeued']} jobs remis en attente, {reclaimed['dead']} abandonnés"
+                    )
+            jobs = claim_jobs(options['batch_size'], options['job_type'])
+            queue = deque(jobs)
+            while queue:
+                job = queue.popleft()
+                released = run_job(job)
+                self.stdout.write(f"{job.pk} {job.job_type}: {job.status}")
+                if released:
+                    # Un autre worker a pu les réserver entre-temps (SKIP LOCKED): seuls les restants sont pris
+                    queue.extend(claim_jobs(len(released), options['job_type'], pks=released))
+            if options['once']:
+                break
+            if not jobs:
+                time.sleep(options['poll_interval'])
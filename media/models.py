@@ -3,12 +3,34 @@ Modèles Django ORM pour l'application media
 Gestion des fichiers médias avec intégration ImageKit
 Basé sur le MCD/MLD fourni
 """
+import re
 import uuid
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 from core.models import User
 
 
+class MediaQuerySet(models.QuerySet):
+    """QuerySet des Media"""
+
+    def alive(self):
+        """Médias non supprimés (deleted_at vide); les autres attendent la purge en arrière-plan"""
+        return self.filter(deleted_at__isnull=True)
+
+    def with_renditions(self, max_width, formats=None):
+        """
+        Précharger, en une seule requête pour toute la page, les renditions de largeur <= max_width.
+        Chaque Media reçoit l'attribut `fitting_renditions` trié par format puis largeur décroissante
+        (voir Media.best_rendition).
+        """
+        renditions = MediaRendition.objects.fitting(max_width, formats).order_by('format', '-width')
+        return self.prefetch_related(
+            models.Prefetch('renditions', queryset=renditions, to_attr='fitting_renditions')
+        )
+
+
 class Media(models.Model):
     """
     Modèle Media pour stocker les métadonnées des fichiers uploadés vers ImageKit
@@ -43,11 +65,17 @@ class Media(models.Model):
         verbose_name='Type MIME',
         help_text='Type MIME du fichier (ex: image/jpeg, video/mp4)'
     )
+    storage_backend = models.CharField(
+        max_length=20,
+        default='imagekit',
+        verbose_name='Stockage',
+        help_text='Backend qui détient le fichier (voir media/services/storage.py)'
+    )
     imagekit_file_id = models.CharField(
         max_length=255,
         unique=True,
         verbose_name='ImageKit File ID',
-        help_text='ID unique du fichier dans ImageKit'
+        help_text='ID unique du fichier dans son backend de stockage'
     )
     imagekit_url = models.URLField(
         max_length=500,  # Augmenté de 100 à 500 pour les URLs longues
@@ -87,6 +115,28 @@ class Media(models.Model):
         help_text='Hauteur du média en pixels (pour images/vidéos)'
         # Note: corrigé "heigth" en "height"
     )
+    content_sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        db_index=True,
+        verbose_name='SHA-256',
+        help_text='Empreinte SHA-256 du contenu, calculée pendant l\'upload'
+    )
+    upload_nonce = models.CharField(
+        max_length=32,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name='Nonce d\'upload direct',
+        help_text='Token d\'upload direct consommé par ce média (un token = un fichier)'
+    )
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Date de suppression',
+        help_text='Suppression demandée: le média est masqué et sera purgé en arrière-plan'
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Date de création'
@@ -96,6 +146,8 @@ class Media(models.Model):
         verbose_name='Date de mise à jour'
     )
     
+    objects = MediaQuerySet.as_manager()
+    
     class Meta:
         db_table = 'Media'
         verbose_name = 'Média'
@@ -111,6 +163,39 @@ class Media(models.Model):
     def __str__(self):
         return f"{self.original_filename} ({self.file_type}) - {self.uploader.username}"
 
+    def best_rendition(self, fmt):
+        """
+        Plus grande rendition du format demandé parmi celles préchargées par
+        Media.objects.with_renditions() (aucune requête), ou None
+        """
+        for rendition in getattr(self, 'fitting_renditions', []):
+            if rendition.format == fmt:
+                return rendition
+        return None
+
+    @classmethod
+    def create_from_imagekit(
+        cls, uploader, result, mime_type, file_type=None, content_sha256='', storage_backend='imagekit', upload_nonce=None,
+    ):
+        """Créer le Media correspondant à une réponse d'upload ImageKit (ou de StorageBackend.save)"""
+        from media.services.file_types import guess_file_type
+        return cls.objects.create(
+            uploader=uploader,
+            original_filename=(result.get('name') or '')[:255],
+            file_size=result.get('size') or 0,
+            mime_type=mime_type,
+            file_type=file_type or guess_file_type(mime_type),
+            imagekit_file_id=result['fileId'],
+            imagekit_url=result['url'],
+            imagekit_thumbnail_url=result.get('thumbnailUrl') or None,
+            width=result.get('width') or 0,
+            height=result.get('height') or 0,
+            duration_s=int(result.get('duration') or 0),
+            content_sha256=content_sha256,
+            storage_backend=storage_backend,
+            upload_nonce=upload_nonce,
+        )
+
 
 class MediaJob(models.Model):
     """
@@ -118,10 +203,12 @@ class MediaJob(models.Model):
     Exemples: conversion, génération de thumbnails, extraction de métadonnées
     """
     JOB_STATUS_CHOICES = [
+        ('blocked', 'En attente des dépendances'),
         ('pending', 'En attente'),
         ('processing', 'En cours de traitement'),
         ('completed', 'Terminé'),
         ('failed', 'Échoué'),
+        ('dead', 'Abandonné (tentatives épuisées)'),
         ('cancelled', 'Annulé'),
     ]
     
@@ -131,6 +218,7 @@ class MediaJob(models.Model):
         ('metadata', 'Extraction de métadonnées'),
         ('transcription', 'Transcription audio/vidéo'),
         ('compression', 'Compression'),
+        ('perceptual_hash', 'Empreinte perceptuelle'),
     ]
     
     uuid = models.UUIDField(
@@ -183,6 +271,45 @@ class MediaJob(models.Model):
         verbose_name='Données de résultat',
         help_text='Données JSON contenant les résultats du job'
     )
+    idempotency_key = models.CharField(
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name='Clé d\'idempotence',
+        help_text='Identifiant externe (ex: x_request_id ImageKit) utilisé par les webhooks pour retrouver le job'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Tentatives',
+        help_text='Nombre de réservations du job par un worker (MEDIA_JOB_MAX_ATTEMPTS au plus)'
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Exécutable à partir de',
+        help_text='Un job en attente n\'est réservé qu\'après cette date (délai entre deux tentatives)'
+    )
+    lease_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fin du bail',
+        help_text='Sans heartbeat du worker avant cette date, le job est repris par un autre worker'
+    )
+    locked_by = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name='Worker',
+        help_text='Worker qui détient le bail (hôte:pid)'
+    )
+    depends_on = models.ManyToManyField(
+        'self',
+        symmetrical=False,
+        blank=True,
+        related_name='dependents',
+        verbose_name='Dépendances',
+        help_text='Jobs à terminer avant celui-ci (pipelines, voir media/jobs/pipelines.py)'
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Date de création'
@@ -196,9 +323,16 @@ class MediaJob(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['media']),
-            models.Index(fields=['status']),
+            # Sert aussi les filtres sur status seul; (status, completed_at) pour la rétention
+            models.Index(fields=['status', 'completed_at']),
             models.Index(fields=['job_type']),
             models.Index(fields=['created_at']),
+            # Index partiels: ne contiennent que les jobs en attente / en cours, quelques lignes
+            # même avec des millions de jobs terminés
+            # - prochain job exécutable: status='pending' AND run_after <= now ORDER BY run_after
+            models.Index(fields=['run_after'], condition=Q(status='pending'), name='media_job_runnable_idx'),
+            # - baux expirés: status='processing' AND lease_expires_at < now
+            models.Index(fields=['lease_expires_at'], condition=Q(status='processing'), name='media_job_lease_idx'),
         ]
     
     def __str__(self):
@@ -218,6 +352,7 @@ class MediaJob(models.Model):
         self.completed_at = timezone.now()
         if result_data:
             self.result_data = result_data
+        self.lease_expires_at = None
         self.save()
     
     def mark_as_failed(self, error_message):
@@ -226,9 +361,369 @@ class MediaJob(models.Model):
         self.status = 'failed'
         self.completed_at = timezone.now()
         self.error_message = error_message
+        self.lease_expires_at = None
+        self.save()
+    
+    def mark_for_retry(self, error_message, run_after):
+        """Remettre le job en attente après un échec, réservable à partir de run_after"""
+        self.status = 'pending'
+        self.error_message = error_message
+        self.run_after = run_after
+        self.lease_expires_at = None
+        self.locked_by = ''
+        self.save()
+    
+    def mark_as_dead(self, error_message):
+        """Abandonner le job (dead-letter): tentatives épuisées ou erreur définitive"""
+        self.status = 'dead'
+        self.completed_at = timezone.now()
+        self.error_message = error_message
+        self.lease_expires_at = None
         self.save()
 
 
+class TranscriptionSegment(models.Model):
+    """
+    Segment transcrit d'un job de transcription (point de reprise)
+    Un worker interrompu reprend le job en ne retranscrivant que les segments absents.
+    Voir media/jobs/transcription.py
+    """
+    job = models.ForeignKey(
+        MediaJob,
+        on_delete=models.CASCADE,
+        related_name='transcription_segments',
+        verbose_name='Job'
+    )
+    index = models.PositiveIntegerField(
+        verbose_name='Index du segment'
+    )
+    start_s = models.FloatField(
+        verbose_name='Début (s)'
+    )
+    end_s = models.FloatField(
+        verbose_name='Fin (s)'
+    )
+    pieces = models.JSONField(
+        default=list,
+        verbose_name='Passages reconnus',
+        help_text='[{"start": s, "end": s, "text": ...}] en temps absolu'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Date de création'
+    )
+
+    class Meta:
+        db_table = 'TranscriptionSegments'
+        ordering = ['job', 'index']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'index'], name='transcription_segment_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} #{self.index} [{self.start_s:.1f}-{self.end_s:.1f}]"
+
+
+class ArchivedMediaJob(models.Model):
+    """
+    MediaJob terminé (completed / failed / dead / cancelled) déplacé hors de la table MediaJobs
+    par la rétention (media/services/job_retention.py). Mêmes colonnes, clé conservée.
+    Pas de contrainte de clé étrangère vers Media: l'archive est un historique.
+    """
+    uuid = models.UUIDField(
+        primary_key=True,
+        editable=False,
+        verbose_name='UUID'
+    )
+    media = models.ForeignKey(
+        Media,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='archived_jobs',
+        verbose_name='Média'
+    )
+    job_type = models.CharField(
+        max_length=50,
+        choices=MediaJob.JOB_TYPE_CHOICES,
+        verbose_name='Type de job'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=MediaJob.JOB_STATUS_CHOICES,
+        verbose_name='Statut'
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Date de début'
+    )
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Date de fin'
+    )
+    error_message = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name='Message d\'erreur'
+    )
+    result_data = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Données de résultat'
+    )
+    idempotency_key = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        verbose_name='Clé d\'idempotence'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Tentatives'
+    )
+    run_after = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Exécutable à partir de'
+    )
+    lease_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fin du bail'
+    )
+    locked_by = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name='Worker'
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Date de création'
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Date de mise à jour'
+    )
+    archived_at = models.DateTimeField(
+        verbose_name='Date d\'archivage'
+    )
+
+    class Meta:
+        db_table = 'MediaJobsArchive'
+        verbose_name = 'Job archivé'
+        verbose_name_plural = 'Jobs archivés'
+        ordering = ['-completed_at']
+        indexes = [
+            models.Index(fields=['media']),
+            models.Index(fields=['job_type', 'completed_at']),
+            models.Index(fields=['archived_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_job_type_display()} {self.media_id} ({self.get_status_display()}, archivé)"
+
+
+class MediaRenditionQuerySet(models.QuerySet):
+    """QuerySet des MediaRendition"""
+
+    def variants(self):
+        """Variantes servies à la place de l'original (hors miniatures)"""
+        return self.filter(kind='variant')
+
+    def fitting(self, max_width, formats=None):
+        """Variantes de largeur <= max_width, éventuellement limitées à certains formats"""
+        queryset = self.variants().filter(width__lte=max_width)
+        if formats:
+            queryset = queryset.filter(format__in=list(formats))
+        return queryset
+
+    def best_for(self, media, max_width, fmt):
+        """
+        Plus grande rendition <= max_width au format fmt pour un média.
+        Servie par l'index (media, format, -width): un seul parcours d'index, sans tri.
+        """
+        return self.variants().filter(media=media, format=fmt, width__lte=max_width).order_by('-width').first()
+
+
+class MediaRendition(models.Model):
+    """
+    Variante dérivée d'un Media (autre format / qualité / taille), produite par les jobs
+    de conversion et de compression, ou miniature produite par le job 'thumbnail'
+    """
+    FORMAT_CHOICES = [
+        ('avif', 'AVIF'),
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+        ('png', 'PNG'),
+    ]
+
+    KIND_CHOICES = [
+        ('variant', 'Variante'),
+        ('thumbnail', 'Miniature'),
+    ]
+
+    uuid = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        verbose_name='UUID'
+    )
+    media = models.ForeignKey(
+        Media,
+        on_delete=models.CASCADE,
+        related_name='renditions',
+        verbose_name='Média source'
+    )
+    kind = models.CharField(
+        max_length=20,
+        choices=KIND_CHOICES,
+        default='variant',
+        verbose_name='Nature',
+        help_text='Les miniatures ne sont jamais servies à la place de l\'original'
+    )
+    format = models.CharField(
+        max_length=10,
+        choices=FORMAT_CHOICES,
+        verbose_name='Format'
+    )
+    mime_type = models.CharField(
+        max_length=100,
+        verbose_name='Type MIME'
+    )
+    width = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0)],
+        verbose_name='Largeur (pixels)'
+    )
+    height = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0)],
+        verbose_name='Hauteur (pixels)'
+    )
+    quality = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0)],
+        verbose_name='Qualité',
+        help_text='Qualité d\'encodage (0-100, 0 = sans perte / non applicable)'
+    )
+    file_size = models.IntegerField(
+        validators=[MinValueValidator(0)],
+        verbose_name='Taille du fichier (bytes)'
+    )
+    storage_backend = models.CharField(
+        max_length=20,
+        default='imagekit',
+        verbose_name='Stockage'
+    )
+    imagekit_file_id = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='ImageKit File ID'
+    )
+    url = models.URLField(
+        max_length=500,
+        verbose_name='URL'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Date de création'
+    )
+
+    objects = MediaRenditionQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'MediaRenditions'
+        verbose_name = 'Rendition'
+        verbose_name_plural = 'Renditions'
+        ordering = ['media', 'file_size']
+        indexes = [
+            # "Meilleure rendition <= largeur W au format F": égalité sur (media, format),
+            # plage sur width, déjà triée par largeur décroissante
+            models.Index(fields=['media', 'format', '-width'], name='rendition_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.media_id} - {self.format} {self.width}x{self.height} q{self.quality}"
+
+
+class MediaPerceptualHash(models.Model):
+    """
+    Empreintes perceptuelles 64 bits d'une image (aHash, dHash, pHash), pour la détection
+    de quasi-doublons (copies redimensionnées / réencodées)
+    Stockées en entiers signés 64 bits (BigIntegerField), voir media/services/phash.py
+    """
+    media = models.OneToOneField(
+        Media,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='perceptual_hash',
+        verbose_name='Média'
+    )
+    ahash = models.BigIntegerField(verbose_name='aHash')
+    dhash = models.BigIntegerField(verbose_name='dHash')
+    phash = models.BigIntegerField(verbose_name='pHash')
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Date de création'
+    )
+
+    class Meta:
+        db_table = 'MediaPerceptualHashes'
+        verbose_name = 'Empreinte perceptuelle'
+        verbose_name_plural = 'Empreintes perceptuelles'
+
+    def __str__(self):
+        return f"{self.media_id} pHash={self.phash & 0xFFFFFFFFFFFFFFFF:016x}"
+
+
+class HttpUrlQuerySet(models.QuerySet):
+    """QuerySet des HttpUrl: filtres par tags (table HttpUrlTags) et par métadonnées"""
+
+    ALL_TAGS_COUNT_CAP = 10000
+    # Clés de metadata acceptées dans with_metadata
+    METADATA_KEY_RE = re.compile(r'[A-Za-z_]\w*', re.ASCII)
+
+    def tagged_any(self, tags):
+        """URLs portant au moins un des tags"""
+        tags = [t.strip().lower() for t in tags]
+        return self.filter(uuid__in=HttpUrlTag.objects.filter(tag__in=tags).values('url_id'))
+
+    def tagged_all(self, tags):
+        """
+        URLs portant tous les tags.
+        On part du tag le plus rare (comptage borné à ALL_TAGS_COUNT_CAP lignes d'index)
+        et on vérifie les autres par l'index unique (url, tag), sans parcourir les tags fréquents.
+        """
+        tags = list({t.strip().lower() for t in tags})
+        if not tags:
+            return self
+        cap = self.ALL_TAGS_COUNT_CAP
+        tags.sort(key=lambda t: HttpUrlTag.objects.filter(tag=t)[:cap].count())
+        rows = HttpUrlTag.objects.filter(tag=tags[0])
+        for tag in tags[1:]:
+            rows = rows.filter(models.Exists(
+                HttpUrlTag.objects.filter(url_id=models.OuterRef('url_id'), tag=tag)
+            ))
+        return self.filter(uuid__in=rows.values('url_id'))
+
+    def with_metadata(self, key, value):
+        """
+        URLs dont metadata[key] == value (égalité exacte sur toutes les bases).
+        La clé, fournie par le client, doit être un identifiant simple (lettres, chiffres, _,
+        sans chiffre en tête): elle n'est jamais interprétée comme lookup ou chemin. ValueError sinon.
+        PostgreSQL: le containment @> en plus de l'égalité sert la requête par l'index GIN sur metadata.
+        """
+        from django.db import connections
+        from django.db.models.fields.json import KeyTransform
+        if not isinstance(key, str) or not self.METADATA_KEY_RE.fullmatch(key):
+            raise ValueError(f"Clé de metadata invalide: {key}")
+        alias = f'metadata_{key}'
+        queryset = self.alias(**{alias: KeyTransform(key, 'metadata')}).filter(**{alias: value})
+        if connections[self.db].vendor == 'postgresql':
+            queryset = queryset.filter(metadata__contains={key: value})
+        return queryset
+
+
 class HttpUrl(models.Model):
     """
     Modèle pour stocker et gérer les URLs HTTP avec métadonnées
@@ -359,6 +854,8 @@ class HttpUrl(models.Model):
         auto_now=True
     )
     
+    objects = HttpUrlQuerySet.as_manager()
+    
     class Meta:
         db_table = 'HttpUrls'
         ordering = ['-created_at']
@@ -400,3 +897,371 @@ class HttpUrl(models.Model):
             else:
                 self.status = 'inactive'
         self.save()
+
+
+class HttpUrlTag(models.Model):
+    """
+    Tag d'une HttpUrl (une ligne par tag, en minuscules)
+    Forme normalisée de HttpUrl.tags pour les filtres et comptes par tag:
+    l'index (tag, url) sert les filtres any-of / all-of sans lire HttpUrls.
+    Synchronisée par media/signals.py et media/services/url_tags.py
+    """
+    url = models.ForeignKey(
+        HttpUrl,
+        on_delete=models.CASCADE,
+        related_name='tag_rows',
+        verbose_name='URL'
+    )
+    tag = models.CharField(
+        max_length=100,
+        verbose_name='Tag'
+    )
+
+    class Meta:
+        db_table = 'HttpUrlTags'
+        constraints = [
+            models.UniqueConstraint(fields=['url', 'tag'], name='http_url_tag_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'url'], name='http_url_tag_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.url_id}: {self.tag}"
+
+
+class StorageUsage(models.Model):
+    """
+    Agrégat maintenu de l'espace utilisé par uploader et par type de fichier
+    Mis à jour incrémentalement à la création / suppression d'un Media (voir media/signals.py)
+    La ligne file_type='all' contient le total de l'uploader (lecture en une ligne pour les quotas);
+    'all' n'est donc jamais un Media.file_type valide (refusé à l'import)
+    """
+    TOTAL = 'all'
+
+    uploader = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='storage_usage',
+        verbose_name='Uploader'
+    )
+    file_type = models.CharField(
+        max_length=50,
+        verbose_name='Type de fichier',
+        help_text='Type de fichier, ou "all" pour le total'
+    )
+    file_count = models.BigIntegerField(
+        default=0,
+        verbose_name='Nombre de fichiers'
+    )
+    total_bytes = models.BigIntegerField(
+        default=0,
+        verbose_name='Taille totale (bytes)'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Date de mise à jour'
+    )
+
+    class Meta:
+        db_table = 'StorageUsage'
+        verbose_name = 'Utilisation du stockage'
+        verbose_name_plural = 'Utilisation du stockage'
+        constraints = [
+            models.UniqueConstraint(fields=['uploader', 'file_type'], name='storage_usage_uploader_file_type'),
+        ]
+
+    def __str__(self):
+        return f"{self.uploader_id} / {self.file_type}: {self.total_bytes} bytes"
+
+
+class MediaCounter(models.Model):
+    """
+    Compteurs de vues / téléchargements d'un Media, hors de la table Media
+    Alimentés par lots (write-behind) par media/services/counters.py: les incréments sont
+    agrégés en mémoire ou dans Redis puis ajoutés ici toutes les MEDIA_COUNTER_FLUSH_INTERVAL secondes
+    """
+    media = models.OneToOneField(
+        Media,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters',
+        verbose_name='Média'
+    )
+    view_count = models.BigIntegerField(
+        default=0,
+        verbose_name='Vues'
+    )
+    download_count = models.BigIntegerField(
+        default=0,
+        verbose_name='Téléchargements'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Date de mise à jour'
+    )
+
+    class Meta:
+        db_table = 'MediaCounters'
+        verbose_name = 'Compteurs du média'
+        verbose_name_plural = 'Compteurs des médias'
+        indexes = [
+            # Top N: parcours de l'index dans l'ordre, arrêt après N lignes
+            models.Index(fields=['-view_count'], name='media_counter_views_idx'),
+            models.Index(fields=['-download_count'], name='media_counter_downloads_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.media_id}: {self.view_count} vues, {self.download_count} téléchargements"
+
+
+class SearchDocument(models.Model):
+    """
+    Document de l'index de recherche plein texte (un par Media ou HttpUrl)
+    Maintenu par les signaux de media/signals.py. Le vecteur plein texte est géré
+    hors ORM: colonne tsvector + GIN sur PostgreSQL, table FTS5 sur SQLite
+    (voir media/services/search.py)
+    """
+    OBJECT_TYPE_CHOICES = [
+        ('media', 'Média'),
+        ('url', 'URL'),
+    ]
+
+    object_type = models.CharField(
+        max_length=10,
+        choices=OBJECT_TYPE_CHOICES,
+        verbose_name='Type d\'objet'
+    )
+    object_id = models.UUIDField(
+        verbose_name='UUID de l\'objet'
+    )
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Propriétaire'
+    )
+    title = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Titre'
+    )
+    document = models.TextField(
+        verbose_name='Texte indexé'
+    )
+    # Facettes dénormalisées
+    file_type = models.CharField(max_length=50, blank=True)
+    mime_type = models.CharField(max_length=100, blank=True)
+    url_type = models.CharField(max_length=50, blank=True)
+    tags = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Date de mise à jour'
+    )
+
+    class Meta:
+        db_table = 'SearchDocuments'
+        constraints = [
+            models.UniqueConstraint(fields=['object_type', 'object_id'], name='search_document_object'),
+        ]
+        indexes = [
+            models.Index(fields=['owner']),
+        ]
+
+    def __str__(self):
+        return f"{self.object_type}:{self.object_id} {self.title}"
+
+
+class SearchTag(models.Model):
+    """
+    Tag d'un SearchDocument (une ligne par tag) pour les facettes et filtres par tag
+    """
+    document = models.ForeignKey(
+        SearchDocument,
+        on_delete=models.CASCADE,
+        related_name='tag_rows'
+    )
+    tag = models.CharField(max_length=100)
+
+    class Meta:
+        db_table = 'SearchTags'
+        constraints = [
+            models.UniqueConstraint(fields=['document', 'tag'], name='search_tag_document_tag'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'document']),
+        ]
+
+    def __str__(self):
+        return self.tag
+
+
+class WebhookEvent(models.Model):
+    """
+    Événement webhook reçu (ImageKit, transcodeur), journal en ajout seul
+    Les colonnes brutes (source, event_id, event_type, payload, received_at) ne sont jamais
+    modifiées; seul l'état de traitement évolue. L'id croissant sert aux rejeux par plage.
+    Voir media/webhooks/.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('processed', 'Traité'),
+        ('ignored', 'Ignoré'),
+        ('failed', 'Échoué'),
+    ]
+
+    source = models.CharField(
+        max_length=50,
+        verbose_name='Source'
+    )
+    event_id = models.CharField(
+        max_length=255,
+        verbose_name='ID de l\'événement',
+        help_text='Identifiant fourni par l\'émetteur (clé d\'idempotence de réception)'
+    )
+    event_type = models.CharField(
+        max_length=100,
+        verbose_name='Type d\'événement'
+    )
+    payload = models.JSONField(
+        verbose_name='Contenu brut'
+    )
+    received_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Date de réception'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='Statut'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Tentatives'
+    )
+    processed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Date de traitement'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Dernière erreur'
+    )
+    next_attempt_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Prochaine tentative',
+        help_text='Après un échec, pas de nouvelle tentative avant cette date (délai exponentiel)'
+    )
+
+    class Meta:
+        db_table = 'WebhookEvents'
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'event_id'], name='webhook_event_unique'),
+        ]
+        indexes = [
+            # File d'attente des workers: WHERE status = 'pending' ORDER BY id
+            models.Index(fields=['status', 'id'], name='webhook_event_queue_idx'),
+            models.Index(fields=['source', 'event_type']),
+        ]
+
+    def __str__(self):
+        return f"{self.source}:{self.event_type} {self.event_id} ({self.get_status_display()})"
+
+
+class DeletionRequest(models.Model):
+    """
+    Suppression différée d'un utilisateur ou d'un média.
+    La demande masque immédiatement la cible (suppression logique); un worker purge ensuite
+    médias, jobs, URLs et fichiers ImageKit par petits lots. Voir media/services/deletion.py.
+    """
+    TARGET_CHOICES = [
+        ('user', 'Utilisateur'),
+        ('media', 'Média'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('done', 'Terminée'),
+        ('failed', 'Échouée'),
+    ]
+
+    uuid = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        verbose_name='UUID'
+    )
+    target_type = models.CharField(
+        max_length=10,
+        choices=TARGET_CHOICES,
+        verbose_name='Type de cible'
+    )
+    target_id = models.UUIDField(
+        verbose_name='UUID de la cible'
+    )
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Demandée par'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='Statut'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Tentatives'
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Exécutable à partir de',
+        help_text='Après un échec, la demande est retentée après un délai exponentiel'
+    )
+    progress = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Progression',
+        help_text='Compteurs de lignes et fichiers supprimés'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Dernière erreur'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Date de création'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Date de mise à jour'
+    )
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Date de fin'
+    )
+
+    class Meta:
+        db_table = 'DeletionRequests'
+        verbose_name = 'Demande de suppression'
+        verbose_name_plural = 'Demandes de suppression'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='deletion_request_queue_idx'),
+            models.Index(fields=['target_type', 'target_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_target_type_display()} {self.target_id} ({self.get_status_display()})"
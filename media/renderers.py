@@ -0,0 +1,27 @@
+"""
+Renderers DRF de l'app media.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle: repli sur le JSONRenderer standard
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer sérialisé avec orjson quand il est installé.
+    Même sortie que JSONRenderer (compacte, UTF-8): les types qu'orjson ne connaît pas
+    (Decimal, datetime, lazy strings...) passent par l'encodeur DRF.
+    """
+
+    OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Sortie indentée demandée (Accept: application/json; indent=4): rendu standard
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=self.encoder_class().default, option=self.OPTIONS)
@@ -3,8 +3,11 @@ Serializers pour l'upload et la gestion des fichiers avec ImageKit.
 Référence: https://www.django-rest-framework.org/api-guide/serializers/
 """
 
+from django.conf import settings
 from rest_framework import serializers
 
+from media.models import HttpUrl, Media, MediaRendition
+
 
 # ============ UPLOAD SERIALIZERS ============
 
@@ -23,17 +26,25 @@ class UploadFileSerializer(serializers.Serializer):
         if file.size == 0:
             raise serializers.ValidationError("Le fichier est vide")
         
-        # Max 10MB
-        max_size = 10 * 1024 * 1024
+        max_size = settings.UPLOAD_MAX_BYTES
         if file.size > max_size:
             raise serializers.ValidationError(
-                f"Fichier trop volumineux ({file.size / (1024*1024):.2f}MB). Max: 10MB"
+                f"Fichier trop volumineux ({file.size / (1024*1024):.2f}MB). Max: {max_size / (1024*1024):.0f}MB"
             )
         
         return file
 
 
 
+class DirectUploadCompleteSerializer(serializers.Serializer):
+    """
+    Serializer pour la finalisation d'un upload direct vers ImageKit.
+    """
+    fileId = serializers.CharField(max_length=100, help_text="fileId renvoyé par ImageKit")
+    token = serializers.CharField(max_length=64, help_text="Token reçu de /api/files/upload/token/")
+    expire = serializers.IntegerField(help_text="Expiration reçue avec le token")
+
+
 class ErrorResponseSerializer(serializers.Serializer):
     """
     Serializer pour les réponses d'erreur.
@@ -44,3 +55,77 @@ class ErrorResponseSerializer(serializers.Serializer):
     message = serializers.CharField(required=False, help_text="Message supplémentaire")
     errors = serializers.DictField(required=False, help_text="Détail des erreurs de validation")
 
+
+# ============ MEDIA SERIALIZERS ============
+
+class MediaRenditionSerializer(serializers.ModelSerializer):
+    """
+    Serializer pour une rendition (variante dérivée) d'un média.
+    """
+
+    class Meta:
+        model = MediaRendition
+        fields = ['format', 'mime_type', 'width', 'height', 'quality', 'file_size', 'url']
+
+
+class MediaSerializer(serializers.ModelSerializer):
+    """
+    Serializer pour un média.
+    Si la vue a préchargé les renditions (Media.objects.with_renditions) et passé
+    `rendition_formats` dans le contexte, expose la meilleure rendition par format.
+    """
+
+    renditions = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Media
+        fields = [
+            'uuid', 'uploader', 'original_filename', 'file_size', 'mime_type', 'file_type',
+            'imagekit_url', 'imagekit_thumbnail_url', 'width', 'height', 'duration_s',
+            'created_at', 'updated_at', 'renditions',
+        ]
+
+    def get_renditions(self, media):
+        formats = self.context.get('rendition_formats') or []
+        result = {}
+        for fmt in formats:
+            rendition = media.best_rendition(fmt)
+            if rendition is not None:
+                result[fmt] = MediaRenditionSerializer(rendition).data
+        return result
+
+
+# ============ URL SERIALIZERS ============
+
+class HttpUrlSerializer(serializers.ModelSerializer):
+    """
+    Serializer pour une URL suivie.
+    """
+
+    class Meta:
+        model = HttpUrl
+        fields = [
+            'uuid', 'url', 'url_type', 'status', 'title', 'description', 'tags', 'metadata',
+            'media', 'status_code', 'last_checked_at', 'expires_at', 'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
+
+
+class BulkTagSerializer(serializers.Serializer):
+    """
+    Serializer pour l'ajout / le retrait de tags en masse.
+    Les URLs visées sont soit une liste d'UUID, soit un filtre par tags.
+    """
+    ACTION_CHOICES = [('add', 'Ajouter'), ('remove', 'Retirer')]
+    MATCH_CHOICES = [('any', 'Au moins un'), ('all', 'Tous')]
+
+    action = serializers.ChoiceField(choices=ACTION_CHOICES)
+    tags = serializers.ListField(child=serializers.CharField(max_length=100), min_length=1)
+    urls = serializers.ListField(child=serializers.UUIDField(), required=False)
+    filter_tags = serializers.ListField(child=serializers.CharField(max_length=100), required=False)
+    match = serializers.ChoiceField(choices=MATCH_CHOICES, default='any')
+
+    def validate(self, attrs):
+        if not attrs.get('urls') and not attrs.get('filter_tags'):
+            raise serializers.ValidationError("urls ou filter_tags est requis")
+        return attrs
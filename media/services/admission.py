@@ -0,0 +1,246 @@
+"""
+Contrôle d'admission des uploads: token buckets (par utilisateur / par IP)
+et limite globale de requêtes en cours.
+
+Backend Redis si REDIS_URL est configuré et le paquet `redis` installé,
+sinon (ou si Redis ne répond pas) repli en mémoire, par processus: avec N workers
+gunicorn, un client peut alors obtenir jusqu'à N fois le débit et le burst configurés.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ============ COMPTEURS ============
+
+class AdmissionStats:
+    """Compteurs d'admission (par processus)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+stats = AdmissionStats()
+
+
+# ============ TOKEN BUCKETS ============
+
+class MemoryTokenBucket:
+    """
+    Token bucket en mémoire: `rate` jetons/seconde, au plus `burst` jetons. Limites par processus.
+
+    Un bucket inactif depuis burst / rate secondes est de nouveau plein: il est supprimé
+    (équivalent du PEXPIRE de RedisTokenBucket). Au-delà de `max_keys` buckets, les moins
+    récemment utilisés sont évincés (un bucket évincé repart plein), ce qui borne la mémoire
+    face à un grand nombre d'IP distinctes.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self._max_keys = max_keys
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def consume(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        """Consommer un jeton. Retourne (admis, secondes avant le prochain jeton)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts, _ = self._buckets.pop(key, (float(burst), now, None))
+            tokens = min(float(burst), tokens + (now - ts) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # Clé réinsérée en fin d'ordre (plus récemment utilisée), avec son instant de remplissage
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            self._evict(now)
+            return (True, 0.0) if allowed else (False, (1 - tokens) / rate)
+
+    def _evict(self, now: float) -> None:
+        """Supprimer depuis les moins récemment utilisés: buckets redevenus pleins, puis dépassement de max_keys"""
+        while self._buckets:
+            _, (_, _, full_at) = next(iter(self._buckets.items()))
+            if full_at > now and len(self._buckets) <= self._max_keys:
+                break
+            self._buckets.popitem(last=False)
+
+
+class RedisTokenBucket:
+    """Token bucket partagé entre workers, mis à jour atomiquement par un script Lua"""
+
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(data[1]) or burst
+    local ts = tonumber(data[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+    return {allowed, tostring(wait)}
+    """
+
+    def __init__(self, client):
+        self._script = client.register_script(self.SCRIPT)
+
+    def consume(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        allowed, wait = self._script(keys=[f"admission:bucket:{key}"], args=[rate, burst, time.time()])
+        return bool(int(allowed)), float(wait)
+
+
+# ============ LIMITE DE CONCURRENCE ============
+
+class MemoryInFlightLimiter:
+    """Nombre maximum de requêtes en cours (par processus)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def acquire(self, limit: int) -> Optional[str]:
+        """Réserver une place. Retourne un jeton à rendre via release(), ou None si plein"""
+        with self._lock:
+            if self._in_flight >= limit:
+                return None
+            self._in_flight += 1
+            return 'local'
+
+    def release(self, token: str) -> None:
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+
+
+class RedisInFlightLimiter:
+    """
+    Limite globale (tous workers) des requêtes en cours.
+    Chaque requête est un membre d'un sorted set horodaté: une entrée laissée par
+    un worker mort expire après `ttl` secondes au lieu de bloquer une place à vie.
+    """
+
+    KEY = 'admission:in_flight'
+
+    ACQUIRE_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local ttl = tonumber(ARGV[2])
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - ttl)
+    if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+        return 0
+    end
+    redis.call('ZADD', KEYS[1], now, ARGV[4])
+    redis.call('EXPIRE', KEYS[1], ttl)
+    return 1
+    """
+
+    def __init__(self, client, ttl: int):
+        self._client = client
+        self._ttl = ttl
+        self._acquire = client.register_script(self.ACQUIRE_SCRIPT)
+
+    def acquire(self, limit: int) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if self._acquire(keys=[self.KEY], args=[time.time(), self._ttl, limit, token]):
+            return token
+        return None
+
+    def release(self, token: str) -> None:
+        self._client.zrem(self.KEY, token)
+
+
+# ============ FAÇADE ============
+
+class AdmissionController:
+    """Point d'entrée unique: choisit Redis ou la mémoire et bascule en mémoire si Redis tombe"""
+
+    def __init__(self):
+        self._memory_bucket = MemoryTokenBucket(settings.UPLOAD_MEMORY_BUCKET_MAX_KEYS)
+        self._memory_limiter = MemoryInFlightLimiter()
+        self._redis_bucket = None
+        self._redis_limiter = None
+
+        redis_url = getattr(settings, 'REDIS_URL', '')
+        if redis_url:
+            try:
+                import redis
+                client = redis.Redis.from_url(redis_url, socket_timeout=0.05, socket_connect_timeout=0.05)
+                self._redis_bucket = RedisTokenBucket(client)
+                self._redis_limiter = RedisInFlightLimiter(client, settings.UPLOAD_IN_FLIGHT_TTL)
+            except ImportError:
+                logger.warning("REDIS_URL défini mais le paquet redis n'est pas installé: admission en mémoire")
+
+    def consume(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        if rate <= 0:
+            # Débit nul ou négatif: bucket désactivé (les buckets divisent par `rate`)
+            return True, 0.0
+        if self._redis_bucket is not None:
+            try:
+                return self._redis_bucket.consume(key, rate, burst)
+            except Exception as exc:
+                logger.warning(f"Admission Redis indisponible, repli en mémoire: {exc}")
+                stats.incr('redis_errors')
+        return self._memory_bucket.consume(key, rate, burst)
+
+    def acquire(self, limit: int) -> Optional[Tuple[str, str]]:
+        if self._redis_limiter is not None:
+            try:
+                token = self._redis_limiter.acquire(limit)
+                return ('redis', token) if token else None
+            except Exception as exc:
+                logger.warning(f"Admission Redis indisponible, repli en mémoire: {exc}")
+                stats.incr('redis_errors')
+        token = self._memory_limiter.acquire(limit)
+        return ('memory', token) if token else None
+
+    def release(self, slot: Tuple[str, str]) -> None:
+        backend, token = slot
+        if backend == 'redis':
+            try:
+                self._redis_limiter.release(token)
+            except Exception as exc:
+                # L'entrée expirera d'elle-même après UPLOAD_IN_FLIGHT_TTL
+                logger.warning(f"Libération Redis impossible: {exc}")
+        else:
+            self._memory_limiter.release(token)
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController()
+    return _controller
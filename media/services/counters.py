@@ -0,0 +1,268 @@
+"""
+Compteurs de vues / téléchargements des Media en écriture différée (write-behind).
+
+- record(): incrément en mémoire (dict du processus) ou dans Redis (HINCRBY sur un hash
+  partagé par tous les workers), aucun accès à la base pendant la requête
+- flush(): toutes les MEDIA_COUNTER_FLUSH_INTERVAL secondes (thread de fond du processus,
+  ou manage.py flush_media_counters), les incréments accumulés sont ajoutés à MediaCounters
+  par INSERT ... ON CONFLICT DO UPDATE (col = col + EXCLUDED.col), par lots
+- get_counts(): valeur en base + incréments pas encore écrits (approximatif)
+- top_media(): N médias les plus vus / téléchargés, servi par les index (-view_count / -download_count)
+
+Un arrêt brutal perd au plus les incréments d'un intervalle. Un échec d'écriture remet
+les incréments dans le tampon pour le flush suivant.
+"""
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from media.models import Media, MediaCounter
+
+logger = logging.getLogger(__name__)
+
+KINDS = {'view': 'view_count', 'download': 'download_count'}
+
+
+# ============ TAMPONS ============
+
+class MemoryCounterBuffer:
+    """Incréments en attente du processus: {(media_id, kind): n}"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+
+    def incr(self, media_id: str, kind: str, amount: int = 1) -> None:
+        with self._lock:
+            self._pending[(media_id, kind)] += amount
+
+    def drain(self) -> Counter:
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        return pending
+
+    def restore(self, pending: Counter) -> None:
+        with self._lock:
+            self._pending.update(pending)
+
+    def pending(self, media_id: str) -> Dict[str, int]:
+        with self._lock:
+            return {kind: self._pending.get((media_id, kind), 0) for kind in KINDS}
+
+
+class RedisCounterBuffer:
+    """
+    Incréments en attente de tous les workers dans un hash Redis ("<kind>:<media_id>" -> n).
+    drain() renomme le hash (RENAME atomique): les incréments suivants repartent dans un hash neuf,
+    et plusieurs processus peuvent vider sans se marcher dessus.
+    """
+
+    KEY = 'media:counters:pending'
+
+    def __init__(self, client):
+        self._client = client
+
+    def incr(self, media_id: str, kind: str, amount: int = 1) -> None:
+        self._client.hincrby(self.KEY, f"{kind}:{media_id}", amount)
+
+    def drain(self) -> Counter:
+        flushing = f"{self.KEY}:flushing:{uuid.uuid4().hex}"
+        try:
+            self._client.rename(self.KEY, flushing)
+        except Exception as exc:
+            if 'no such key' in str(exc).lower():
+                return Counter()
+            raise
+        raw = self._client.hgetall(flushing)
+        self._client.delete(flushing)
+        pending = Counter()
+        for field, value in raw.items():
+            kind, _, media_id = field.decode().partition(':')
+            pending[(media_id, kind)] += int(value)
+        return pending
+
+    def restore(self, pending: Counter) -> None:
+        pipe = self._client.pipeline()
+        for (media_id, kind), amount in pending.items():
+            pipe.hincrby(self.KEY, f"{kind}:{media_id}", amount)
+        pipe.execute()
+
+    def pending(self, media_id: str) -> Dict[str, int]:
+        values = self._client.hmget(self.KEY, [f"{kind}:{media_id}" for kind in KINDS])
+        return {kind: int(value or 0) for kind, value in zip(KINDS, values)}
+
+
+# ============ ÉCRITURE EN BASE ============
+
+def _upsert_sql(count: int) -> str:
+    quote = connection.ops.quote_name
+    table = quote(MediaCounter._meta.db_table)
+    rows = ', '.join(['(%s, %s, %s)'] * count)
+    # WHERE 1 = 1: lève l'ambiguïté JOIN ... ON / ON CONFLICT pour SQLite
+    return (
+        f'INSERT INTO {table} ({quote("media_id")}, {quote("view_count")}, {quote("download_count")}, '
+        f'{quote("updated_at")}) '
+        f'SELECT v.column1, v.column2, v.column3, %s FROM (VALUES {rows}) AS v '
+        f'JOIN {quote(Media._meta.db_table)} m ON m.{quote("uuid")} = v.column1 WHERE 1 = 1 '
+        f'ON CONFLICT ({quote("media_id")}) DO UPDATE SET '
+        f'{quote("view_count")} = {table}.{quote("view_count")} + EXCLUDED.{quote("view_count")}, '
+        f'{quote("download_count")} = {table}.{quote("download_count")} + EXCLUDED.{quote("download_count")}, '
+        f'{quote("updated_at")} = EXCLUDED.{quote("updated_at")}'
+    )
+
+
+def write_counts(pending: Counter, batch_size: int) -> int:
+    """
+    Ajouter les incréments à MediaCounters, `batch_size` médias par requête.
+    Les médias supprimés entre-temps sont ignorés (jointure sur Media).
+
+    Returns:
+        Nombre de médias mis à jour
+    """
+    per_media = {}
+    for (media_id, kind), amount in pending.items():
+        if kind in KINDS:
+            per_media.setdefault(media_id, {'view': 0, 'download': 0})[kind] += amount
+    pk = Media._meta.pk
+    updated_at = MediaCounter._meta.get_field('updated_at').get_db_prep_value(timezone.now(), connection)
+    items = list(per_media.items())
+    written = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        for i in range(0, len(items), batch_size):
+            batch = items[i:i + batch_size]
+            params = []
+            for media_id, counts in batch:
+                params += [pk.get_db_prep_value(uuid.UUID(media_id), connection), counts['view'], counts['download']]
+            cursor.execute(_upsert_sql(len(batch)), [updated_at] + params)
+            written += max(cursor.rowcount, 0)
+    return written
+
+
+# ============ FAÇADE ============
+
+class CounterService:
+    """Tampon Redis si REDIS_URL est configuré (repli en mémoire si Redis tombe), sinon mémoire"""
+
+    def __init__(self):
+        self._memory = MemoryCounterBuffer()
+        self._redis = None
+        self._flusher = None
+        self._flush_lock = threading.Lock()
+
+        if settings.REDIS_URL:
+            try:
+                import redis
+                client = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.05, socket_connect_timeout=0.05)
+                self._redis = RedisCounterBuffer(client)
+            except ImportError:
+                logger.warning("REDIS_URL défini mais le paquet redis n'est pas installé: compteurs en mémoire")
+
+    def record(self, media_id, kind: str, amount: int = 1) -> None:
+        """Compter une vue / un téléchargement (kind: 'view' ou 'download')"""
+        if kind not in KINDS:
+            raise ValueError(f"Compteur inconnu: {kind}")
+        self._ensure_flusher()
+        if self._redis is not None:
+            try:
+                self._redis.incr(str(media_id), kind, amount)
+                return
+            except Exception as exc:
+                logger.warning(f"Compteurs Redis indisponibles, repli en mémoire: {exc}")
+        self._memory.incr(str(media_id), kind, amount)
+
+    def flush(self) -> int:
+        """Écrire les incréments en attente (mémoire du processus, puis Redis); renvoie le nombre de médias"""
+        batch_size = settings.MEDIA_COUNTER_FLUSH_BATCH_SIZE
+        written = 0
+        with self._flush_lock:
+            buffers = [self._memory] + ([self._redis] if self._redis is not None else [])
+            for buffer in buffers:
+                try:
+                    pending = buffer.drain()
+                except Exception as exc:
+                    logger.warning(f"Lecture des compteurs en attente impossible: {exc}")
+                    continue
+                if not pending:
+                    continue
+                try:
+                    written += write_counts(pending, batch_size)
+                except Exception as exc:
+                    logger.error(f"Écriture des compteurs échouée, nouvel essai au prochain flush: {exc}")
+                    buffer.restore(pending)
+        return written
+
+    def pending(self, media_id) -> Dict[str, int]:
+        counts = self._memory.pending(str(media_id))
+        if self._redis is not None:
+            try:
+                for kind, amount in self._redis.pending(str(media_id)).items():
+                    counts[kind] += amount
+            except Exception:
+                pass
+        return counts
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None or settings.MEDIA_COUNTER_FLUSH_INTERVAL <= 0:
+            return
+        with self._flush_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name='media-counters', daemon=True)
+                self._flusher.start()
+                atexit.register(self.flush)
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(settings.MEDIA_COUNTER_FLUSH_INTERVAL)
+            # Connexion propre au thread: fermée si expirée (CONN_MAX_AGE) ou cassée
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as exc:
+                logger.error(f"Flush des compteurs échoué: {exc}", exc_info=True)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_counter_service() -> CounterService:
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = CounterService()
+    return _service
+
+
+def record(media_id, kind: str) -> None:
+    get_counter_service().record(media_id, kind)
+
+
+# ============ LECTURE ============
+
+def get_counts(media_id) -> Dict[str, int]:
+    """{'views', 'downloads'}: valeur en base + incréments pas encore écrits"""
+    row = MediaCounter.objects.filter(media_id=media_id).values_list('view_count', 'download_count').first()
+    views, downloads = row or (0, 0)
+    pending = get_counter_service().pending(media_id)
+    return {'views': views + pending['view'], 'downloads': downloads + pending['download']}
+
+
+def top_media(kind: str, limit: int, queryset=None):
+    """
+    Les `limit` médias les plus vus (kind='view') ou téléchargés (kind='download'), valeurs en base.
+    `queryset` restreint les médias candidats (ex: ceux d'un uploader).
+    """
+    field = KINDS[kind]
+    counters = MediaCounter.objects.filter(**{f'{field}__gt': 0})
+    if queryset is not None:
+        counters = counters.filter(media__in=queryset)
+    return counters.select_related('media').order_by(f'-{field}')[:limit]
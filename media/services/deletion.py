@@ -0,0 +1,202 @@
+"""
+Suppression différée des utilisateurs et des médias.
+
+1. request_media_deletion() / request_user_deletion(): dans la requête HTTP, coût constant
+   - média: deleted_at renseigné (masqué des vues, retiré du quota et de l'index de recherche)
+   - utilisateur: is_active = False (plus d'authentification possible), et tous ses médias
+     masqués comme ci-dessus (agrégat StorageUsage vidé, documents de recherche retirés)
+   puis une DeletionRequest est mise en file
+2. run_request() (manage.py run_deletions): purge par lots de DELETION_BATCH_SIZE médias
+   - fichiers du lot (originaux + renditions), groupés par backend de stockage; ImageKit:
+     appels groupés de IMAGEKIT_BULK_DELETE_SIZE fileIds, au plus IMAGEKIT_PURGE_CONCURRENCY simultanés
+   - puis jobs, URLs, jobs archivés et médias, chacun par petites transactions
+   - utilisateur: ses URLs, puis la ligne User (reste de la cascade: StorageUsage, documents)
+
+Les fichiers distants sont purgés avant les lignes qui les référencent, et chaque étape
+supprime ce qui reste: une demande interrompue reprend là où elle s'était arrêtée.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from collections import defaultdict
+from typing import Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import User
+from media.models import ArchivedMediaJob, DeletionRequest, HttpUrl, Media, MediaJob, MediaRendition, StorageUsage
+from media.services import search
+from media.services.storage import get_storage
+from media.services.storage_usage import apply_delta
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_KEYS = ('media', 'jobs', 'archived_jobs', 'urls', 'files')
+
+
+# ============ DEMANDES ============
+
+def _open_request(target_type: str, target_id) -> Optional[DeletionRequest]:
+    return DeletionRequest.objects.filter(
+        target_type=target_type, target_id=target_id, status__in=('pending', 'running'),
+    ).first()
+
+
+def request_media_deletion(media: Media, requested_by=None) -> DeletionRequest:
+    """Masquer le média immédiatement et mettre sa purge en file (idempotent)"""
+    now = timezone.now()
+    with transaction.atomic():
+        hidden = Media.objects.filter(pk=media.pk, deleted_at__isnull=True).update(deleted_at=now, updated_at=now)
+        existing = _open_request('media', media.pk)
+        if existing is not None:
+            return existing
+        if hidden:
+            apply_delta(media.uploader_id, media.file_type, -1, -media.file_size)
+            search.unindex_object('media', media.pk)
+        return DeletionRequest.objects.create(target_type='media', target_id=media.pk, requested_by=requested_by)
+
+
+def request_user_deletion(user: User, requested_by=None) -> DeletionRequest:
+    """Désactiver le compte et masquer ses médias immédiatement, mettre la purge de ses données en file (idempotent)"""
+    now = timezone.now()
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False, updated_at=now)
+        # Un seul UPDATE: tous les médias de l'utilisateur sortent des vues, du quota et de la recherche
+        Media.objects.filter(uploader_id=user.pk, deleted_at__isnull=True).update(deleted_at=now, updated_at=now)
+        StorageUsage.objects.filter(uploader_id=user.pk).delete()
+        search.unindex_objects('media', Media.objects.filter(uploader_id=user.pk).values('pk'))
+        existing = _open_request('user', user.pk)
+        if existing is not None:
+            return existing
+        return DeletionRequest.objects.create(target_type='user', target_id=user.pk, requested_by=requested_by)
+
+
+# ============ PURGE ============
+
+def purge_files(files: Iterable[Tuple[str, str]]) -> int:
+    """
+    Supprimer des fichiers [(backend, fileId), ...]: un backend à la fois, par appels
+    groupés de IMAGEKIT_BULK_DELETE_SIZE, en parallèle limité.
+
+    Returns:
+        Nombre de fichiers supprimés (les fichiers déjà absents ne sont pas comptés)
+    """
+    by_backend = defaultdict(list)
+    for backend, file_id in files:
+        by_backend[backend].append(file_id)
+    deleted = 0
+    size = settings.IMAGEKIT_BULK_DELETE_SIZE
+    for backend, file_ids in by_backend.items():
+        storage = get_storage(backend)
+        chunks = [file_ids[i:i + size] for i in range(0, len(file_ids), size)]
+        with ThreadPoolExecutor(max_workers=min(settings.IMAGEKIT_PURGE_CONCURRENCY, len(chunks))) as pool:
+            deleted += sum(pool.map(storage.delete, chunks))
+    return deleted
+
+
+def delete_in_batches(queryset, batch_size: int) -> int:
+    """Supprimer les lignes du queryset par lots de `batch_size` (une transaction par lot)"""
+    total = 0
+    model = queryset.model
+    while True:
+        ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        with transaction.atomic():
+            model._base_manager.filter(pk__in=ids).delete()
+        total += len(ids)
+
+
+def purge_media_batch(media_ids: List, progress: dict, batch_size: int) -> None:
+    """Purger un lot de médias: fichiers distants, puis jobs, URLs et lignes Media"""
+    files = list(Media.objects.filter(pk__in=media_ids).values_list('storage_backend', 'imagekit_file_id'))
+    files += MediaRendition.objects.filter(media_id__in=media_ids).values_list('storage_backend', 'imagekit_file_id')
+    progress['files'] += purge_files(files)
+
+    progress['jobs'] += delete_in_batches(MediaJob.objects.filter(media_id__in=media_ids), batch_size)
+    progress['archived_jobs'] += delete_in_batches(ArchivedMediaJob.objects.filter(media_id__in=media_ids), batch_size)
+    progress['urls'] += delete_in_batches(HttpUrl.objects.filter(media_id__in=media_ids), batch_size)
+    with transaction.atomic():
+        # deleted_at renseigné: le signal post_delete ne recompte pas le quota (voir media/signals.py)
+        Media.objects.filter(pk__in=media_ids, deleted_at__isnull=True).update(deleted_at=timezone.now())
+        Media.objects.filter(pk__in=media_ids).delete()
+    progress['media'] += len(media_ids)
+
+
+def _checkpoint(deletion: DeletionRequest, progress: dict) -> None:
+    # Sert aussi de battement de cœur (updated_at) pour requeue_stale_requests
+    DeletionRequest.objects.filter(pk=deletion.pk).update(progress=progress, updated_at=timezone.now())
+
+
+def process_request(deletion: DeletionRequest, batch_size: int) -> dict:
+    """Exécuter une demande jusqu'au bout; renvoie les compteurs de progression"""
+    progress = {key: 0 for key in PROGRESS_KEYS}
+    progress.update(deletion.progress or {})
+    if deletion.target_type == 'media':
+        media = Media.objects.filter(pk=deletion.target_id)
+    else:
+        media = Media.objects.filter(uploader_id=deletion.target_id)
+
+    while True:
+        media_ids = list(media.order_by().values_list('pk', flat=True)[:batch_size])
+        if not media_ids:
+            break
+        purge_media_batch(media_ids, progress, batch_size)
+        _checkpoint(deletion, progress)
+
+    if deletion.target_type == 'user':
+        progress['urls'] += delete_in_batches(HttpUrl.objects.filter(created_by_id=deletion.target_id), batch_size)
+        with transaction.atomic():
+            User.objects.filter(pk=deletion.target_id).delete()
+    return progress
+
+
+# ============ FILE D'ATTENTE ============
+
+def claim_request() -> Optional[DeletionRequest]:
+    """Réserver la plus ancienne demande en attente (SKIP LOCKED: plusieurs workers possibles)"""
+    with transaction.atomic():
+        deletion = (
+            DeletionRequest.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', run_after__lte=timezone.now()).order_by('created_at').first()
+        )
+        if deletion is None:
+            return None
+        deletion.status = 'running'
+        deletion.attempts += 1
+        deletion.save(update_fields=['status', 'attempts', 'updated_at'])
+    return deletion
+
+
+def retry_delay(attempts: int) -> float:
+    """Délai (s) avant la tentative suivante d'une demande: exponentiel, plafonné"""
+    return min(settings.DELETION_RETRY_MAX_DELAY, settings.DELETION_RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0))
+
+
+def run_request(deletion: DeletionRequest, batch_size: Optional[int] = None) -> None:
+    """Exécuter une demande réservée et enregistrer son issue"""
+    try:
+        progress = process_request(deletion, batch_size or settings.DELETION_BATCH_SIZE)
+    except Exception as exc:
+        logger.error(f"Suppression {deletion.pk} ({deletion.target_type} {deletion.target_id}) échouée: {exc}", exc_info=True)
+        now = timezone.now()
+        status = 'failed' if deletion.attempts >= settings.DELETION_MAX_ATTEMPTS else 'pending'
+        DeletionRequest.objects.filter(pk=deletion.pk).update(
+            status=status, last_error=str(exc), updated_at=now,
+            run_after=now + timedelta(seconds=retry_delay(deletion.attempts)),
+        )
+        return
+    now = timezone.now()
+    DeletionRequest.objects.filter(pk=deletion.pk).update(
+        status='done', progress=progress, last_error='', completed_at=now, updated_at=now,
+    )
+
+
+def requeue_stale_requests(stale_after_s: float) -> int:
+    """Remettre en attente les demandes 'running' sans progression depuis `stale_after_s` secondes"""
+    cutoff = timezone.now() - timedelta(seconds=stale_after_s)
+    return DeletionRequest.objects.filter(status='running', updated_at__lt=cutoff).update(
+        status='pending', updated_at=timezone.now(),
+    )
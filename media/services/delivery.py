@@ -0,0 +1,166 @@
+"""
+Livraison des fichiers du stockage local: requêtes partielles (Range / If-Range) et
+délégation au proxy.
+
+MEDIA_DELIVERY_MODE:
+- 'django': la réponse porte le fichier ouvert (FileResponse)
+  - WSGI (gunicorn): le serveur l'envoie par os.sendfile via wsgi.file_wrapper, sans copie en Python
+  - ASGI (uvicorn): lecture par blocs de ASYNC_BLOCK_SIZE dans un thread, sans charger le fichier
+    en mémoire (un itérateur synchrone serait d'abord lu en entier par Django); des blocs plus
+    grands amortissent le passage par le thread
+- 'x-accel-redirect' (nginx) / 'x-sendfile' (Apache, lighttpd): réponse vide avec l'en-tête
+  interne; le proxy envoie le fichier et traite lui-même Range / If-Range
+
+Une seule plage par requête: une demande multi-plages reçoit le fichier entier (RFC 9110 §14.2).
+"""
+import asyncio
+import os
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+BLOCK_SIZE = 256 * 1024
+ASYNC_BLOCK_SIZE = 1024 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class FileRange:
+    """
+    Fenêtre [start, start + length) d'un fichier ouvert.
+    fileno() expose le descripteur, positionné sur start (sendfile du serveur WSGI,
+    borné par Content-Length); read() s'arrête à la fin de la plage.
+    """
+
+    def __init__(self, file, start: int, length: int):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Plage (début, fin incluse) d'un en-tête Range, ou None si l'en-tête est ignoré
+    (syntaxe invalide, unité inconnue, plusieurs plages).
+
+    Raises:
+        RangeNotSatisfiable: la plage commence après la fin du fichier
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, sep, last = spec.strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                raise RangeNotSatisfiable
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if start < 0 or (end is not None and end < start):
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+def _if_range_matches(request, etag: str, last_modified: int) -> bool:
+    """If-Range absent, ou validateur identique (comparaison forte) à celui du fichier"""
+    value = request.headers.get('If-Range')
+    if not value:
+        return True
+    if value.startswith(('"', 'W/')):
+        return not value.startswith('W/') and value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+async def _aiter_file(file, block_size: int = ASYNC_BLOCK_SIZE):
+    try:
+        while True:
+            chunk = await asyncio.to_thread(file.read, block_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file.close()
+
+
+def serve_file(request, path: str, content_type: str, etag: str, filename: str = '') -> HttpResponse:
+    """
+    Réponse GET / HEAD pour le fichier local `path` (200, 206, 304, 412 ou 416).
+
+    Args:
+        etag: ETag fort (entre guillemets), stable tant que le contenu ne change pas
+        filename: Nom proposé au client (Content-Disposition: inline)
+    """
+    stat = os.stat(path)
+    last_modified = int(stat.st_mtime)
+    size = stat.st_size
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        response['ETag'] = etag
+        return response
+
+    mode = settings.MEDIA_DELIVERY_MODE
+    if mode == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        relative = os.path.relpath(path, settings.LOCAL_STORAGE_ROOT)
+        response['X-Accel-Redirect'] = settings.MEDIA_DELIVERY_ACCEL_PREFIX + relative.replace(os.sep, '/')
+    elif mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+    else:
+        start, length, status = 0, size, 200
+        range_header = request.headers.get('Range')
+        if request.method == 'GET' and range_header and _if_range_matches(request, etag, last_modified):
+            try:
+                byte_range = parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+            if byte_range is not None:
+                start, length, status = byte_range[0], byte_range[1] - byte_range[0] + 1, 206
+
+        file = FileRange(open(path, 'rb'), start, length)
+        if isinstance(request, ASGIRequest):
+            response = StreamingHttpResponse(_aiter_file(file), status=status, content_type=content_type)
+        else:
+            response = FileResponse(file, status=status, content_type=content_type)
+            response.block_size = BLOCK_SIZE
+        response['Content-Length'] = length
+        if status == 206:
+            response['Content-Range'] = f'bytes {start}-{start + length - 1}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if filename:
+        response['Content-Disposition'] = content_disposition_header(False, filename)
+    return response
@@ -0,0 +1,130 @@
+"""
+Upload direct navigateur -> ImageKit.
+
+1. issue_credentials(): le client reçoit token / expire / signature (quelques centaines d'octets)
+   et envoie le fichier directement à ImageKit: aucun octet du fichier ne passe par Django
+2. complete_upload(): le client renvoie fileId + token; le serveur lit les métadonnées du
+   fichier chez ImageKit (source de vérité pour taille / mime / url) et enregistre le Media
+
+Le token est sans état: il contient un MAC (SECRET_KEY) qui le lie à l'utilisateur et à
+sa date d'expiration, aucune écriture en base à l'émission. Il est consommé à la
+finalisation: son nonce est enregistré sur le Media (Media.upload_nonce, unique), un
+token ne peut donc enregistrer qu'un seul fichier.
+"""
+import hashlib
+import hmac
+import time
+import uuid
+from datetime import datetime
+from typing import Dict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from media.jobs.pipelines import create_pipeline
+from media.models import Media
+from media.services.imagekit_service import ImageKitUploadService
+from media.services.storage_usage import quota_exceeded
+
+# Tolérance d'horloge (s) entre ImageKit et le serveur pour la date de création du fichier
+CLOCK_SKEW = 120
+
+
+class DirectUploadError(Exception):
+    """Finalisation refusée; `status` est le code HTTP à renvoyer"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _token_mac(user_id, nonce: str, expire: int) -> str:
+    message = f"direct-upload:{user_id}:{nonce}:{int(expire)}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()[:16]
+
+
+def user_folder(user) -> str:
+    return f"/uploads/{user.pk}"
+
+
+def issue_credentials(user) -> Dict:
+    """Identifiants d'upload ImageKit à usage unique, liés à l'utilisateur"""
+    nonce = uuid.uuid4().hex
+    expire = int(time.time()) + settings.IMAGEKIT_UPLOAD_TOKEN_TTL
+    credentials = ImageKitUploadService().get_upload_credentials(
+        token=f"{nonce}{_token_mac(user.pk, nonce, expire)}",
+        expire=expire,
+    )
+    credentials['folder'] = user_folder(user)
+    return credentials
+
+
+def _parse_imagekit_date(value: str) -> float:
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def complete_upload(user, file_id: str, token: str, expire: int) -> Media:
+    """
+    Enregistrer le Media d'un fichier uploadé directement sur ImageKit.
+    Rejouer la finalisation pour le même fichier renvoie le Media existant.
+
+    Raises:
+        DirectUploadError: token invalide / expiré / déjà utilisé (403), fichier introuvable (404),
+            fichier déjà enregistré par un autre utilisateur (409), quota dépassé (403)
+    """
+    nonce, mac = token[:32], token[32:]
+    # `expire` vient du client: il fait partie du MAC, une valeur modifiée invalide le token
+    if not hmac.compare_digest(mac, _token_mac(user.pk, nonce, expire)):
+        raise DirectUploadError("Invalid upload token", status=403)
+    now = time.time()
+    ttl = settings.IMAGEKIT_UPLOAD_TOKEN_TTL
+    if now > expire + settings.IMAGEKIT_UPLOAD_COMPLETE_GRACE:
+        raise DirectUploadError("Upload token expired", status=403)
+
+    existing = Media.objects.filter(imagekit_file_id=file_id).first()
+    if existing is not None:
+        if existing.uploader_id != user.pk:
+            raise DirectUploadError("File already registered", status=409)
+        return existing
+    if Media.objects.filter(upload_nonce=nonce).exists():
+        raise DirectUploadError("Upload token already used", status=403)
+
+    service = ImageKitUploadService()
+    try:
+        details = service.get_file_details(file_id)
+    except LookupError:
+        raise DirectUploadError("File not found", status=404)
+
+    # Le fichier doit avoir été créé pendant la validité du token, dans le dossier de l'utilisateur
+    created = _parse_imagekit_date(details.get('createdAt') or '1970-01-01T00:00:00Z')
+    if not (expire - ttl - CLOCK_SKEW <= created <= expire + CLOCK_SKEW):
+        raise DirectUploadError("File was not uploaded with this token", status=403)
+    if not (details.get('filePath') or '').startswith(user_folder(user) + '/'):
+        raise DirectUploadError("File was not uploaded with this token", status=403)
+
+    size = details.get('size') or 0
+    if quota_exceeded(user.pk, size, settings.MEDIA_QUOTA_BYTES):
+        service.delete_file(file_id)
+        raise DirectUploadError("Storage quota exceeded", status=403)
+
+    result = dict(details, thumbnailUrl=details.get('thumbnail'))
+    try:
+        with transaction.atomic():
+            media = Media.create_from_imagekit(
+                uploader=user,
+                result=result,
+                mime_type=details.get('mime') or 'application/octet-stream',
+                upload_nonce=nonce,
+            )
+            create_pipeline(media)
+            return media
+    except IntegrityError:
+        # Finalisation concurrente du même fichier, ou du même token pour un autre fichier
+        existing = Media.objects.filter(imagekit_file_id=file_id).first()
+        if existing is None:
+            if Media.objects.filter(upload_nonce=nonce).exists():
+                raise DirectUploadError("Upload token already used", status=403)
+            raise
+        if existing.uploader_id != user.pk:
+            raise DirectUploadError("File already registered", status=409)
+        return existing
@@ -0,0 +1,50 @@
+"""
+Détection de quasi-doublons à partir des empreintes perceptuelles.
+"""
+from typing import Dict, List, Tuple
+
+from media.services.hash_index import hash_indexes
+
+DEFAULT_MAX_DISTANCE = 6
+
+
+def find_similar(media_id, kind: str = 'phash', max_distance: int = DEFAULT_MAX_DISTANCE) -> List[Tuple[object, int]]:
+    """Médias à distance de Hamming <= max_distance du média donné (lui-même exclu)"""
+    from media.models import MediaPerceptualHash
+
+    value = MediaPerceptualHash.objects.filter(media_id=media_id).values_list(kind, flat=True).first()
+    if value is None:
+        return []
+    return [
+        (other, distance)
+        for other, distance in hash_indexes.get(kind).search(value, max_distance)
+        if other != media_id
+    ]
+
+
+def duplicate_clusters(kind: str = 'phash', max_distance: int = DEFAULT_MAX_DISTANCE) -> List[List]:
+    """
+    Regrouper tous les médias en clusters de quasi-doublons (union-find sur les paires proches).
+    Seuls les clusters d'au moins deux médias sont retournés, du plus grand au plus petit.
+    """
+    index = hash_indexes.get(kind)
+    parent: Dict = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for media_id, value in list(index.items()):
+        for other, _ in index.search(value, max_distance):
+            if other != media_id:
+                root_a, root_b = find(media_id), find(other)
+                if root_a != root_b:
+                    parent[root_b] = root_a
+
+    clusters: Dict = {}
+    for media_id in parent:
+        clusters.setdefault(find(media_id), []).append(media_id)
+    return sorted((c for c in clusters.values() if len(c) > 1), key=len, reverse=True)
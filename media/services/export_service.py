@@ -0,0 +1,166 @@
+"""
+Export en flux des tables Media et MediaJob (CSV / JSONL, gzip optionnel).
+
+Les lignes sont lues via QuerySet.iterator() (curseur serveur sur PostgreSQL)
+et sérialisées une par une: la mémoire reste constante quel que soit le volume.
+"""
+
+import csv
+import io
+import json
+import uuid
+import zlib
+from datetime import datetime, time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_date
+
+from media.models import Media, MediaJob
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+DATASETS = {
+    'media': {
+        'model': Media,
+        'fields': [
+            'uuid', 'uploader_id', 'original_filename', 'file_size', 'mime_type',
+            'file_type', 'imagekit_file_id', 'imagekit_url', 'imagekit_thumbnail_url',
+            'width', 'height', 'duration_s', 'created_at', 'updated_at',
+        ],
+        'uploader_lookup': 'uploader_id',
+        'file_type_lookup': 'file_type',
+        # Médias supprimés (en attente de purge) exclus
+        'filters': {'deleted_at__isnull': True},
+    },
+    'jobs': {
+        'model': MediaJob,
+        'fields': [
+            'uuid', 'media_id', 'job_type', 'status', 'started_at', 'completed_at',
+            'error_message', 'result_data', 'created_at', 'updated_at',
+        ],
+        'uploader_lookup': 'media__uploader_id',
+        'file_type_lookup': 'media__file_type',
+        'filters': {'media__deleted_at__isnull': True},
+    },
+}
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+
+def parse_bound(value: Optional[str]):
+    """Accepter une date (YYYY-MM-DD) ou un datetime ISO 8601"""
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError(f"Date invalide: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def export_rows(
+    dataset: str,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    uploader: Optional[str] = None,
+    file_type: Optional[str] = None,
+) -> Iterator[Dict]:
+    """
+    Itérer sur les lignes d'un dataset sous forme de dicts.
+
+    Args:
+        dataset: 'media' ou 'jobs'
+        since / until: bornes sur created_at (incluse / exclue)
+        uploader: UUID de l'uploader
+        file_type: Type de fichier du média (image, video, ...)
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Dataset inconnu: {dataset}")
+    spec = DATASETS[dataset]
+
+    filters = dict(spec['filters'])
+    since_bound, until_bound = parse_bound(since), parse_bound(until)
+    if since_bound:
+        filters['created_at__gte'] = since_bound
+    if until_bound:
+        filters['created_at__lt'] = until_bound
+    if uploader:
+        try:
+            filters[spec['uploader_lookup']] = uuid.UUID(uploader)
+        except ValueError:
+            raise ValueError(f"Uploader invalide: {uploader}")
+    if file_type:
+        filters[spec['file_type_lookup']] = file_type
+
+    # order_by() supprime le tri par défaut (-created_at): pas de tri global de la table
+    queryset = spec['model'].objects.filter(**filters).order_by().values(*spec['fields'])
+    return queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def iter_jsonl(rows: Iterable[Dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def iter_csv(rows: Iterable[Dict], fields: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow([
+            json.dumps(row[f], cls=DjangoJSONEncoder) if isinstance(row[f], (dict, list)) else row[f]
+            for f in fields
+        ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+
+def iter_export(dataset: str, fmt: str, **filters) -> Iterator[str]:
+    """Générer l'export texte (CSV ou JSONL) ligne par ligne"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format inconnu: {fmt}")
+    rows = export_rows(dataset, **filters)
+    if fmt == 'csv':
+        return iter_csv(rows, DATASETS[dataset]['fields'])
+    return iter_jsonl(rows)
+
+
+def gzip_stream(chunks: Iterable[str], flush_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Compresser un flux de texte en gzip à la volée, par blocs d'environ flush_size octets"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: en-tête gzip
+    pending = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        pending += len(data)
+        out = compressor.compress(data)
+        if pending >= flush_size:
+            out += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def batch_stream(chunks: Iterable[str], batch_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Regrouper les petites lignes en blocs pour limiter le nombre d'écritures réseau"""
+    parts = []
+    size = 0
+    for chunk in chunks:
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= batch_size:
+            yield ''.join(parts).encode('utf-8')
+            parts, size = [], 0
+    if parts:
+        yield ''.join(parts).encode('utf-8')
@@ -0,0 +1,58 @@
+"""
+Déduction du type de fichier (image, video, audio, document) à partir du type MIME.
+"""
+
+
+def guess_file_type(mime_type: str) -> str:
+    """Retourner la catégorie de Media.file_type correspondant au type MIME"""
+    major = (mime_type or '').split('/', 1)[0].lower()
+    if major in ('image', 'video', 'audio'):
+        return major
+    return 'document'
+
+
+# ============ SIGNATURES (MAGIC BYTES) ============
+
+# Octets nécessaires pour reconnaître toutes les signatures ci-dessous
+SNIFF_BYTES = 16
+
+# Marques ISO BMFF (boîte 'ftyp' à l'octet 4): images AVIF / HEIC, vidéos MP4 / MOV
+FTYP_BRANDS = {
+    b'avif': 'image/avif',
+    b'avis': 'image/avif',
+    b'heic': 'image/heic',
+    b'heix': 'image/heic',
+    b'mif1': 'image/heif',
+    b'qt  ': 'video/quicktime',
+    b'M4A ': 'audio/mp4',
+}
+
+
+def sniff_mime_type(head: bytes):
+    """
+    Type MIME réel d'un fichier d'après ses premiers octets (SNIFF_BYTES suffisent),
+    ou None si la signature n'est pas reconnue.
+    """
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return 'audio/wav'
+    if head[4:8] == b'ftyp':
+        return FTYP_BRANDS.get(head[8:12], 'video/mp4')
+    if head.startswith(b'\x1a\x45\xdf\xa3'):
+        return 'video/webm'
+    if head.startswith(b'ID3') or head[:2] in (b'\xff\xfb', b'\xff\xf3', b'\xff\xf2'):
+        return 'audio/mpeg'
+    if head.startswith(b'OggS'):
+        return 'audio/ogg'
+    if head.startswith(b'fLaC'):
+        return 'audio/flac'
+    if head.startswith(b'%PDF-'):
+        return 'application/pdf'
+    return None
@@ -0,0 +1,129 @@
+"""
+Index en mémoire des empreintes perceptuelles: recherche "tous les médias à distance
+de Hamming <= k" par multi-index hashing (MIH).
+
+L'empreinte 64 bits est découpée en m blocs de 64/m bits, chacun indexé dans un dict.
+Principe des tiroirs: si distance(a, b) <= k, au moins un bloc diffère de <= k // m bits.
+On énumère donc, pour chaque bloc, les valeurs à distance <= k // m du bloc requêté,
+puis on vérifie la distance exacte des candidats.
+"""
+import itertools
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from media.services.phash import hamming, to_unsigned
+
+HASH_KINDS = ('ahash', 'dhash', 'phash')
+
+
+class MultiIndexHash:
+    """Index MIH de hashes 64 bits -> identifiants"""
+
+    def __init__(self, chunks: int = 4):
+        if 64 % chunks:
+            raise ValueError("chunks doit diviser 64")
+        self.chunks = chunks
+        self.chunk_bits = 64 // chunks
+        self.chunk_mask = (1 << self.chunk_bits) - 1
+        self._tables: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(chunks)]
+        self._hashes: List[int] = []
+        self._ids: List = []
+        self._positions: Dict = {}
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _split(self, value: int):
+        return [(value >> (i * self.chunk_bits)) & self.chunk_mask for i in range(self.chunks)]
+
+    def add(self, ident, value: int) -> None:
+        """Ajouter (ou remplacer) l'empreinte d'un identifiant"""
+        value = to_unsigned(value)
+        if ident in self._positions:
+            self.remove(ident)
+        position = len(self._hashes)
+        self._hashes.append(value)
+        self._ids.append(ident)
+        self._positions[ident] = position
+        for table, chunk in zip(self._tables, self._split(value)):
+            table[chunk].append(position)
+
+    def remove(self, ident) -> None:
+        # Suppression logique: la position reste dans les tables mais n'est plus résolue
+        position = self._positions.pop(ident, None)
+        if position is not None:
+            self._ids[position] = None
+
+    def _neighbours(self, chunk: int, radius: int):
+        yield chunk
+        for r in range(1, radius + 1):
+            for bits in itertools.combinations(range(self.chunk_bits), r):
+                flipped = chunk
+                for bit in bits:
+                    flipped ^= 1 << bit
+                yield flipped
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[object, int]]:
+        """Retourner [(identifiant, distance)] triés par distance croissante"""
+        value = to_unsigned(value)
+        radius = max_distance // self.chunks
+        seen = set()
+        results = []
+        for table, chunk in zip(self._tables, self._split(value)):
+            for candidate_chunk in self._neighbours(chunk, radius):
+                for position in table.get(candidate_chunk, ()):
+                    if position in seen:
+                        continue
+                    seen.add(position)
+                    ident = self._ids[position]
+                    if ident is None:
+                        continue
+                    distance = hamming(value, self._hashes[position])
+                    if distance <= max_distance:
+                        results.append((ident, distance))
+        results.sort(key=lambda item: item[1])
+        return results
+
+    def items(self) -> Iterable[Tuple[object, int]]:
+        for ident, position in self._positions.items():
+            yield ident, self._hashes[position]
+
+
+class HashIndexCache:
+    """Index par type d'empreinte, chargés depuis la base au premier usage et rechargés après ttl secondes"""
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, Tuple[float, MultiIndexHash]] = {}
+
+    def get(self, kind: str) -> MultiIndexHash:
+        if kind not in HASH_KINDS:
+            raise ValueError(f"Type d'empreinte inconnu: {kind}")
+        entry = self._indexes.get(kind)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            with self._lock:
+                entry = self._indexes.get(kind)
+                if entry is None or time.monotonic() - entry[0] > self.ttl:
+                    entry = (time.monotonic(), self._load(kind))
+                    self._indexes[kind] = entry
+        return entry[1]
+
+    def _load(self, kind: str) -> MultiIndexHash:
+        from media.models import MediaPerceptualHash
+
+        index = MultiIndexHash()
+        rows = MediaPerceptualHash.objects.order_by().values_list('media_id', kind).iterator(chunk_size=10000)
+        for media_id, value in rows:
+            index.add(media_id, value)
+        return index
+
+    def add(self, media_id, hashes: Dict[str, int]) -> None:
+        """Répercuter une nouvelle empreinte sur les index déjà chargés"""
+        for kind, (_, index) in list(self._indexes.items()):
+            index.add(media_id, hashes[kind])
+
+
+hash_indexes = HashIndexCache()
@@ -0,0 +1,31 @@
+"""
+Validateurs HTTP (ETag / Last-Modified) des réponses Media.
+
+Calculés depuis Media.updated_at sans charger les lignes:
+- détail: une colonne (updated_at) d'une ligne
+- liste: MAX(updated_at) et COUNT(*) du queryset filtré (le compte détecte les suppressions)
+
+L'ETag est faible (W/"..."): la représentation dépend aussi du renderer et de la
+compression, seule l'équivalence sémantique est garantie.
+"""
+import hashlib
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.db.models import Count, Max
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1('|'.join(str(p) for p in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def object_version(queryset, pk) -> Optional[datetime]:
+    """updated_at de l'objet, ou None s'il n'existe pas dans le queryset"""
+    return queryset.filter(pk=pk).values_list('updated_at', flat=True).first()
+
+
+def list_version(queryset) -> Tuple[Optional[datetime], int]:
+    """(MAX(updated_at), nombre de lignes) du queryset, en une requête d'agrégat"""
+    row = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+    return row['last_modified'], row['count']
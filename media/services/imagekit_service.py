@@ -3,10 +3,13 @@ Service pour uploader des fichiers à ImageKit.
 Documentation: https://imagekit.io/docs/api-reference/upload-file/upload-file
 """
 
-import requests
 import os
 import base64
-from typing import Dict, Optional, BinaryIO
+import hashlib
+import hmac
+import time
+import uuid
+from typing import Dict, List, Optional, BinaryIO
 from django.conf import settings
 
 
@@ -87,6 +90,9 @@ class ImageKitUploadService:
         if tags:
             payload["tags"] = ','.join(tags) if isinstance(tags, list) else tags
         
+        # Import local: requests n'est chargé qu'au premier appel (démarrage des workers plus rapide)
+        import requests
+
         # Faire la requête
         response = requests.post(
             self.IMAGEKIT_API_URL,
@@ -103,6 +109,99 @@ class ImageKitUploadService:
         return response.json()
     
 
+    def get_upload_credentials(self, expire_in: int = 600, token: Optional[str] = None, expire: Optional[int] = None) -> Dict:
+        """
+        Paramètres d'authentification pour un upload direct navigateur -> ImageKit.
+        Documentation: https://imagekit.io/docs/api-reference/upload-file/upload-file#how-to-implement-client-side-file-upload
+        
+        Args:
+            expire_in: Validité en secondes (ImageKit refuse plus d'une heure)
+            token: Valeur unique (défaut: UUID v4); ImageKit refuse un token déjà utilisé
+            expire: Date d'expiration (timestamp) imposée, à la place de maintenant + expire_in
+            
+        Returns:
+            Dict avec token, expire, signature (HMAC-SHA1 de token + expire par la clé privée) et publicKey
+        """
+        token = token or uuid.uuid4().hex
+        expire = expire or int(time.time()) + expire_in
+        signature = hmac.new(self.api_key.encode(), f"{token}{expire}".encode(), hashlib.sha1).hexdigest()
+        return {
+            'token': token,
+            'expire': expire,
+            'signature': signature,
+            'publicKey': self.public_key,
+            'uploadUrl': self.UPLOAD_URL,
+        }
+    
+
+    def get_file_details(self, file_id: str) -> Dict:
+        """
+        Détails d'un fichier (nom, taille, mime, url, dimensions, date de création).
+        Documentation: https://imagekit.io/docs/api-reference/digital-asset-management-dam/managing-assets/get-file-details
+        """
+        import requests
+
+        response = requests.get(f"{self.API_BASE_URL}/files/{file_id}/details", auth=(self.api_key, ''), timeout=30)
+        if response.status_code == 404:
+            raise LookupError(f"Fichier ImageKit introuvable: {file_id}")
+        if response.status_code != 200:
+            raise ValueError(f"ImageKit error: {response.text}")
+        return response.json()
+    
+
+    def delete_file(self, file_id: str) -> None:
+        """Supprimer un fichier ImageKit"""
+        import requests
+
+        response = requests.delete(f"{self.API_BASE_URL}/files/{file_id}", auth=(self.api_key, ''), timeout=30)
+        if response.status_code not in (204, 404):
+            raise ValueError(f"ImageKit error: {response.text}")
+
+
+    def bulk_delete_files(self, file_ids: List[str]) -> List[str]:
+        """
+        Supprimer jusqu'à 100 fichiers en un appel.
+        Documentation: https://imagekit.io/docs/api-reference/digital-asset-management-dam/managing-assets/delete-multiple-files
+
+        Si des fichiers n'existent plus, ImageKit refuse tout le lot (404, missingFileIds):
+        le lot est renvoyé sans eux.
+
+        Returns:
+            fileIds supprimés
+        """
+        import requests
+
+        url = f"{self.API_BASE_URL}/files/batch/deleteByFileIds"
+        response = requests.post(url, json={'fileIds': file_ids}, auth=(self.api_key, ''), timeout=60)
+        if response.status_code == 404:
+            missing = set(response.json().get('missingFileIds') or [])
+            if not missing:
+                raise ValueError(f"ImageKit error: {response.text}")
+            remaining = [f for f in file_ids if f not in missing]
+            if not remaining:
+                return []
+            response = requests.post(url, json={'fileIds': remaining}, auth=(self.api_key, ''), timeout=60)
+        if response.status_code != 200:
+            raise ValueError(f"ImageKit error: {response.text}")
+        return response.json().get('successfullyDeletedFileIds') or []
+
+
+    def download_file(self, url: str, timeout: int = 60) -> bytes:
+        """
+        Télécharger le contenu d'un fichier ImageKit (URL publique).
+        
+        Args:
+            url: URL du fichier (Media.imagekit_url)
+            timeout: Timeout en secondes
+        """
+        import requests
+
+        response = requests.get(url, timeout=timeout)
+        if response.status_code != 200:
+            raise ValueError(f"ImageKit download error ({response.status_code}): {url}")
+        return response.content
+    
+
     def list_files(self, folder: Optional[str] = None, limit: int = 100, skip: int = 0) -> Dict:
         """
         Lister les fichiers.
@@ -116,6 +215,8 @@ class ImageKitUploadService:
             Dict avec la liste des fichiers
         """
         try:
+            import requests
+
             url = f"{self.API_BASE_URL}/files"
             
             params = {
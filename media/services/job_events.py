@@ -0,0 +1,211 @@
+"""
+Diffusion des changements d'état des MediaJob vers les clients SSE.
+
+- publish_job_event(): appelé par les workers / handlers après commit
+- Redis (REDIS_URL): PUBLISH sur un canal unique; chaque processus ASGI a un seul
+  abonnement (thread d'écoute) qui redistribue aux clients connectés localement
+- sans Redis: distribution directe en mémoire (publieur et clients dans le même processus)
+
+Un abonné s'inscrit à des sujets "job:<uuid>" / "media:<uuid>": une publication
+atteint tous les abonnés du job et du média concernés.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'media:job-events'
+
+
+# ============ COMPTEURS ============
+
+class JobEventStats:
+    """Connexions SSE et latence de diffusion (publication -> remise au client), par processus"""
+
+    def __init__(self, samples: int = 1000):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+        self._latencies = deque(maxlen=samples)
+
+    def incr(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def observe_latency(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            data = dict(self._counters)
+            latencies = sorted(self._latencies)
+        if latencies:
+            data['fanout_latency_ms'] = {
+                'p50': round(latencies[len(latencies) // 2] * 1000, 2),
+                'p95': round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+                'max': round(latencies[-1] * 1000, 2),
+                'samples': len(latencies),
+            }
+        return data
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._latencies.clear()
+
+
+stats = JobEventStats()
+
+
+# ============ DISTRIBUTION LOCALE ============
+
+class Subscription:
+    """File d'événements d'un client SSE, consommée dans la boucle asyncio du serveur"""
+
+    def __init__(self, topics: Iterable[str], loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.topics = set(topics)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.closed = False
+
+    def _put(self, event: dict) -> None:
+        # Client trop lent: on perd l'événement le plus ancien plutôt que de bloquer la diffusion
+        if self.queue.full():
+            self.queue.get_nowait()
+            stats.incr('dropped')
+        self.queue.put_nowait(event)
+
+    def deliver(self, event: dict) -> None:
+        """Appelable depuis n'importe quel thread"""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """Prochain événement, ou None après `timeout` secondes sans événement"""
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        stats.observe_latency(max(0.0, time.time() - event.get('ts', time.time())))
+        stats.incr('delivered')
+        return event
+
+
+class JobEventHub:
+    """Index sujet -> abonnés de ce processus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._topics: Dict[str, set] = defaultdict(set)
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        subscription = Subscription(topics, asyncio.get_running_loop(), settings.JOB_EVENTS_QUEUE_SIZE)
+        with self._lock:
+            for topic in subscription.topics:
+                self._topics[topic].add(subscription)
+        stats.incr('connections')
+        stats.incr('connections_total')
+        _ensure_listener()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            for topic in subscription.topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._topics[topic]
+        stats.incr('connections', -1)
+
+    def dispatch(self, event: dict) -> None:
+        topics = (f"job:{event['job']}", f"media:{event['media']}")
+        with self._lock:
+            subscribers = set().union(*(self._topics.get(topic, ()) for topic in topics))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+
+hub = JobEventHub()
+
+
+# ============ REDIS ============
+
+_redis_client = None
+_listener: Optional[threading.Thread] = None
+_listener_lock = threading.Lock()
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None and settings.REDIS_URL:
+        import redis
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL, socket_connect_timeout=1)
+    return _redis_client
+
+
+def _listen():
+    """Abonnement Redis du processus: chaque message est redistribué aux abonnés locaux"""
+    while True:
+        try:
+            pubsub = _get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CHANNEL)
+            for message in pubsub.listen():
+                hub.dispatch(json.loads(message['data']))
+        except Exception as exc:
+            logger.warning(f"Job events: abonnement Redis interrompu, reconnexion: {exc}")
+            stats.incr('redis_errors')
+            time.sleep(1)
+
+
+def _ensure_listener():
+    global _listener
+    if _listener is None and settings.REDIS_URL:
+        with _listener_lock:
+            if _listener is None:
+                _listener = threading.Thread(target=_listen, name='job-events-listener', daemon=True)
+                _listener.start()
+
+
+# ============ PUBLICATION ============
+
+def _publish(event: dict) -> None:
+    event['ts'] = time.time()
+    stats.incr('published')
+    try:
+        client = _get_redis()
+        if client is not None:
+            client.publish(CHANNEL, json.dumps(event))
+        else:
+            hub.dispatch(event)
+    except Exception as exc:
+        # La diffusion est best effort: un job ne doit pas échouer faute de Redis
+        logger.warning(f"Job events: publication impossible: {exc}")
+        stats.incr('publish_errors')
+
+
+def publish_job_event(job_id, media_id, status: str, job_type: str = '', progress: Optional[dict] = None) -> None:
+    """Diffuser l'état d'un job, après validation de la transaction en cours"""
+    event = {'job': str(job_id), 'media': str(media_id), 'status': status, 'job_type': job_type}
+    if progress is not None:
+        event['progress'] = progress
+    transaction.on_commit(lambda: _publish(event))
+
+
+def job_snapshot(job) -> dict:
+    """État courant d'un job au format des événements (envoyé à l'ouverture du flux)"""
+    event = {'job': str(job.pk), 'media': str(job.media_id), 'status': job.status, 'job_type': job.job_type}
+    progress = (job.result_data or {}).get('progress')
+    if job.status == 'processing' and progress:
+        event['progress'] = progress
+    return event
@@ -0,0 +1,195 @@
+"""
+Rétention des MediaJob: les jobs terminés quittent la table MediaJobs pour MediaJobsArchive.
+
+- archive_jobs(): lots bornés, chaque lot dans sa transaction:
+  INSERT ... SELECT vers l'archive puis DELETE dans MediaJobs (aucune ligne chargée en Python)
+- purge_archive(): suppression par lots des jobs archivés au-delà de la durée de conservation
+- table_sizes(): lignes et taille (données / index) des tables chaude et archive
+
+Un job est archivable s'il est completed / failed / dead / cancelled et terminé (completed_at,
+à défaut created_at) depuis plus de MEDIA_JOB_RETENTION_DAYS jours.
+Sur PostgreSQL, result_data reste interrogeable via un index GIN (jsonb_path_ops) et
+completed_at a un index BRIN (table en ajout seul, ordonnée dans le temps).
+"""
+import time
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from media.models import ArchivedMediaJob, MediaJob, TranscriptionSegment
+
+FINAL_STATUSES = ('completed', 'failed', 'dead', 'cancelled')
+
+
+# ============ STRUCTURES D'INDEX ============
+
+POSTGRES_SETUP = [
+    'CREATE INDEX IF NOT EXISTS media_jobs_archive_result_gin ON "MediaJobsArchive" '
+    'USING GIN (result_data jsonb_path_ops)',
+    'CREATE INDEX IF NOT EXISTS media_jobs_archive_completed_brin ON "MediaJobsArchive" '
+    'USING BRIN (completed_at)',
+]
+
+
+def install_retention_structures(using='default'):
+    """Index GIN / BRIN sur MediaJobsArchive (PostgreSQL uniquement, idempotent)"""
+    conn = connections[using]
+    if conn.vendor != 'postgresql':
+        return
+    with conn.cursor() as cursor:
+        for sql in POSTGRES_SETUP:
+            cursor.execute(sql)
+
+
+# ============ ARCHIVAGE ============
+
+def expired_jobs(cutoff):
+    """Jobs terminés avant `cutoff` (servi par l'index (status, completed_at))"""
+    return MediaJob.objects.filter(status__in=FINAL_STATUSES).filter(
+        Q(completed_at__lt=cutoff) | Q(completed_at__isnull=True, created_at__lt=cutoff)
+    )
+
+
+def _archive_sql(count: int) -> str:
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(f.column) for f in MediaJob._meta.concrete_fields)
+    placeholders = ', '.join(['%s'] * count)
+    return (
+        f'INSERT INTO {quote(ArchivedMediaJob._meta.db_table)} ({columns}, {quote("archived_at")}) '
+        f'SELECT {columns}, %s FROM {quote(MediaJob._meta.db_table)} WHERE {quote("uuid")} IN ({placeholders}) '
+        f'ON CONFLICT ({quote("uuid")}) DO NOTHING'
+    )
+
+
+def archive_batch(cutoff, batch_size: int) -> int:
+    """
+    Archiver un lot d'au plus `batch_size` jobs expirés (une transaction).
+    SKIP LOCKED (PostgreSQL): les jobs verrouillés par un autre processus sont laissés au lot suivant.
+
+    Returns:
+        Nombre de jobs déplacés
+    """
+    with transaction.atomic():
+        ids = list(
+            expired_jobs(cutoff).select_for_update(skip_locked=True)
+            .order_by().values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        pk = MediaJob._meta.pk
+        params = [ArchivedMediaJob._meta.get_field('archived_at').get_db_prep_value(timezone.now(), connection)]
+        params += [pk.get_db_prep_value(i, connection) for i in ids]
+        # Points de reprise de transcription: inutiles une fois le job terminé
+        TranscriptionSegment.objects.filter(job_id__in=ids).delete()
+        # Liens de dépendance du pipeline (le DELETE brut ne les supprime pas en cascade)
+        Dependency = MediaJob.depends_on.through
+        Dependency.objects.filter(Q(from_mediajob_id__in=ids) | Q(to_mediajob_id__in=ids)).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(_archive_sql(len(ids)), params)
+            cursor.execute(
+                f'DELETE FROM {connection.ops.quote_name(MediaJob._meta.db_table)} '
+                f'WHERE {connection.ops.quote_name("uuid")} IN ({", ".join(["%s"] * len(ids))})',
+                params[1:],
+            )
+    return len(ids)
+
+
+def archive_jobs(
+    older_than_days: int,
+    batch_size: int = 1000,
+    max_batches: Optional[int] = None,
+    pause: float = 0.0,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Déplacer vers l'archive tous les jobs terminés depuis plus de `older_than_days` jours.
+
+    Args:
+        batch_size: Jobs par transaction (borne la durée des verrous et la taille du WAL)
+        max_batches: Arrêter après ce nombre de lots (None = jusqu'à épuisement)
+        pause: Pause (s) entre deux lots, pour laisser respirer la base en production
+
+    Returns:
+        Nombre total de jobs archivés
+    """
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(cutoff, batch_size)
+        total += moved
+        batches += 1
+        if moved and progress:
+            progress(total)
+        if moved < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return total
+
+
+def purge_archive(keep_days: int, batch_size: int = 1000) -> int:
+    """Supprimer par lots les jobs archivés depuis plus de `keep_days` jours"""
+    cutoff = timezone.now() - timedelta(days=keep_days)
+    total = 0
+    while True:
+        ids = list(
+            ArchivedMediaJob.objects.filter(archived_at__lt=cutoff)
+            .order_by().values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        ArchivedMediaJob.objects.filter(pk__in=ids).delete()
+        total += len(ids)
+
+
+# ============ TAILLES ============
+
+def _postgres_sizes(cursor, table: str) -> Dict:
+    cursor.execute(
+        "SELECT GREATEST(c.reltuples, 0)::bigint, pg_table_size(c.oid), pg_indexes_size(c.oid), "
+        "pg_total_relation_size(c.oid) FROM pg_class c WHERE c.oid = %s::regclass",
+        [connection.ops.quote_name(table)],
+    )
+    rows, table_bytes, index_bytes, total_bytes = cursor.fetchone()
+    # reltuples est une estimation (mise à jour par ANALYZE / autovacuum), sans parcours de table
+    return {'rows': rows, 'table_bytes': table_bytes, 'index_bytes': index_bytes, 'total_bytes': total_bytes}
+
+
+def _sqlite_sizes(cursor, table: str) -> Dict:
+    quote = connection.ops.quote_name
+    cursor.execute(f'SELECT COUNT(*) FROM {quote(table)}')
+    sizes = {'rows': cursor.fetchone()[0], 'table_bytes': None, 'index_bytes': None, 'total_bytes': None}
+    try:
+        # Table virtuelle dbstat: disponible si SQLite est compilé avec SQLITE_ENABLE_DBSTAT_VTAB
+        cursor.execute(
+            "SELECT SUM(CASE WHEN m.type = 'table' THEN d.pgsize ELSE 0 END), "
+            "SUM(CASE WHEN m.type = 'index' THEN d.pgsize ELSE 0 END) "
+            "FROM dbstat d JOIN sqlite_master m ON m.name = d.name WHERE m.tbl_name = %s",
+            [table],
+        )
+    except Exception:
+        return sizes
+    table_bytes, index_bytes = cursor.fetchone()
+    sizes.update(
+        table_bytes=table_bytes or 0,
+        index_bytes=index_bytes or 0,
+        total_bytes=(table_bytes or 0) + (index_bytes or 0),
+    )
+    return sizes
+
+
+def table_sizes() -> Dict[str, Dict]:
+    """
+    {table: {'rows', 'table_bytes', 'index_bytes', 'total_bytes'}} pour MediaJobs et MediaJobsArchive.
+    Les tailles valent None si le moteur ne les expose pas.
+    """
+    measure = _postgres_sizes if connection.vendor == 'postgresql' else _sqlite_sizes
+    with connection.cursor() as cursor:
+        return {
+            model._meta.db_table: measure(cursor, model._meta.db_table)
+            for model in (MediaJob, ArchivedMediaJob)
+        }
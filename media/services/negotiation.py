@@ -0,0 +1,57 @@
+"""
+Négociation de contenu: choix de la variante la plus légère acceptée par le client.
+"""
+from typing import Iterable, Optional, Set
+
+from rest_framework.negotiation import BaseContentNegotiation
+
+
+class IgnoreAcceptNegotiation(BaseContentNegotiation):
+    """
+    Négociation DRF qui ignore l'en-tête Accept (exemple de la doc DRF).
+    Pour les vues qui répondent par une redirection ou un fichier: un Accept
+    d'image ne doit pas provoquer de 406.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
+
+
+def parse_accept(header: Optional[str]) -> Set[str]:
+    """Types MIME explicitement acceptés (q > 0) dans un en-tête Accept"""
+    accepted = set()
+    for part in (header or '').split(','):
+        fields = [f.strip() for f in part.split(';')]
+        mime = fields[0].lower()
+        if not mime:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(mime)
+    return accepted
+
+
+def pick_smallest(original, renditions: Iterable, accept_header: Optional[str]):
+    """
+    Retourner l'objet (Media original ou rendition) le plus léger dont le type MIME est accepté.
+    L'original sert toujours de repli.
+    """
+    accepted = parse_accept(accept_header)
+    best = original
+    for rendition in renditions:
+        # Pas de joker image/*: Safari l'envoie sans savoir décoder AVIF.
+        # Une rendition dans le format de l'original (compression) est toujours acceptable.
+        if rendition.mime_type not in accepted and rendition.mime_type != original.mime_type:
+            continue
+        if rendition.file_size < best.file_size:
+            best = rendition
+    return best
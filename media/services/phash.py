@@ -0,0 +1,87 @@
+"""
+Empreintes perceptuelles 64 bits (aHash, dHash, pHash) calculées avec Pillow, sans numpy.
+
+Les valeurs sont converties en entiers signés pour tenir dans un BigIntegerField;
+la distance de Hamming est calculée sur la représentation non signée.
+"""
+import io
+import math
+from typing import Dict
+
+MASK_64 = (1 << 64) - 1
+
+_DCT_SIZE = 32
+_DCT_KEEP = 8
+# Coefficients cos pour les 8 premières fréquences d'une DCT-II sur 32 points
+_DCT_COEFFS = [
+    [math.cos(math.pi * (2 * x + 1) * u / (2 * _DCT_SIZE)) for x in range(_DCT_SIZE)]
+    for u in range(_DCT_KEEP)
+]
+
+
+def to_signed(value: int) -> int:
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned(value: int) -> int:
+    return value & MASK_64
+
+
+def hamming(a: int, b: int) -> int:
+    return ((a ^ b) & MASK_64).bit_count()
+
+
+def _bits(flags) -> int:
+    value = 0
+    for flag in flags:
+        value = (value << 1) | int(flag)
+    return value
+
+
+def _grayscale(image, width, height):
+    from PIL import Image
+    return list(image.convert('L').resize((width, height), Image.Resampling.LANCZOS).getdata())
+
+
+def average_hash(image) -> int:
+    pixels = _grayscale(image, 8, 8)
+    mean = sum(pixels) / 64
+    return _bits(p > mean for p in pixels)
+
+
+def difference_hash(image) -> int:
+    pixels = _grayscale(image, 9, 8)
+    return _bits(
+        pixels[row * 9 + col] > pixels[row * 9 + col + 1]
+        for row in range(8) for col in range(8)
+    )
+
+
+def dct_hash(image) -> int:
+    """pHash: DCT 32x32, coefficients basse fréquence 8x8 comparés à leur médiane"""
+    pixels = _grayscale(image, _DCT_SIZE, _DCT_SIZE)
+    rows = [pixels[y * _DCT_SIZE:(y + 1) * _DCT_SIZE] for y in range(_DCT_SIZE)]
+    # DCT séparable: d'abord sur les lignes, puis sur les colonnes (8 fréquences gardées)
+    row_dct = [[sum(c * p for c, p in zip(coeffs, row)) for coeffs in _DCT_COEFFS] for row in rows]
+    low = [
+        sum(_DCT_COEFFS[v][y] * row_dct[y][u] for y in range(_DCT_SIZE))
+        for v in range(_DCT_KEEP) for u in range(_DCT_KEEP)
+    ]
+    # Le coefficient DC (moyenne) est exclu du calcul de la médiane
+    median = sorted(low[1:])[len(low[1:]) // 2]
+    return _bits(c > median for c in low)
+
+
+def compute_hashes(data: bytes) -> Dict[str, int]:
+    """Calculer aHash, dHash et pHash (entiers signés 64 bits) d'une image"""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as source:
+        # Décodage JPEG à taille réduite: beaucoup plus rapide, sans effet sur les empreintes
+        source.draft('L', (_DCT_SIZE * 4, _DCT_SIZE * 4))
+        image = ImageOps.exif_transpose(source)
+        return {
+            'ahash': to_signed(average_hash(image)),
+            'dhash': to_signed(difference_hash(image)),
+            'phash': to_signed(dct_hash(image)),
+        }
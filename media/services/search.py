@@ -0,0 +1,345 @@
+"""
+Recherche plein texte et à facettes sur Media et HttpUrl.
+
+Index inversé selon la base:
+- PostgreSQL: colonne générée tsvector sur SearchDocuments + index GIN, rang ts_rank
+- SQLite: table virtuelle FTS5 (contenu externe) synchronisée par triggers, rang bm25
+
+Les structures sont créées après `migrate` (install_search_structures, signal post_migrate).
+Les documents sont mis à jour à chaque save/delete (media/signals.py).
+"""
+import base64
+import json
+import re
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Count, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from media.models import HttpUrl, Media, SearchDocument, SearchTag
+from media.services.url_tags import normalize_tags
+
+FACET_FIELDS = ('file_type', 'mime_type', 'url_type')
+MAX_LIMIT = 100
+
+
+# ============ STRUCTURES D'INDEX ============
+
+POSTGRES_SETUP = [
+    """
+    ALTER TABLE "SearchDocuments" ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('{config}'::regconfig, coalesce(document, ''))) STORED
+    """,
+    'CREATE INDEX IF NOT EXISTS search_documents_vector_gin ON "SearchDocuments" USING GIN (search_vector)',
+]
+
+SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+        document, content='SearchDocuments', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_fts_ai AFTER INSERT ON "SearchDocuments" BEGIN
+        INSERT INTO search_fts(rowid, document) VALUES (new.id, new.document);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_fts_ad AFTER DELETE ON "SearchDocuments" BEGIN
+        INSERT INTO search_fts(search_fts, rowid, document) VALUES ('delete', old.id, old.document);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_fts_au AFTER UPDATE OF document ON "SearchDocuments" BEGIN
+        INSERT INTO search_fts(search_fts, rowid, document) VALUES ('delete', old.id, old.document);
+        INSERT INTO search_fts(rowid, document) VALUES (new.id, new.document);
+    END
+    """,
+]
+
+
+def install_search_structures(using='default'):
+    """Créer la colonne / table plein texte et son index (idempotent)"""
+    conn = connections[using]
+    if conn.vendor == 'postgresql':
+        statements = [sql.format(config=settings.SEARCH_CONFIG) for sql in POSTGRES_SETUP]
+    elif conn.vendor == 'sqlite':
+        statements = SQLITE_SETUP
+    else:
+        return
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+# ============ INDEXATION ============
+
+_SPLIT_RE = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def _words(*values) -> str:
+    """Texte indexable: les séparateurs (_, -, ., /) deviennent des espaces ("my_photo.png" -> "my photo png")"""
+    return ' '.join(_SPLIT_RE.sub(' ', v).strip() for v in values if v)
+
+
+def build_document(instance) -> Dict:
+    if isinstance(instance, Media):
+        return {
+            'object_type': 'media',
+            'owner_id': instance.uploader_id,
+            'title': instance.original_filename[:255],
+            'document': _words(instance.original_filename, instance.file_type, instance.mime_type),
+            'file_type': instance.file_type,
+            'mime_type': instance.mime_type,
+            'url_type': '',
+            'tags': [],
+        }
+    tags = normalize_tags(instance.tags)
+    return {
+        'object_type': 'url',
+        'owner_id': instance.created_by_id,
+        'title': (instance.title or instance.url)[:255],
+        'document': _words(instance.title, instance.description, instance.url, *tags),
+        'file_type': '',
+        'mime_type': '',
+        'url_type': instance.url_type,
+        'tags': tags,
+    }
+
+
+def index_object(instance) -> SearchDocument:
+    """Créer ou mettre à jour le document de recherche d'un Media / HttpUrl"""
+    values = build_document(instance)
+    object_type = values.pop('object_type')
+    with transaction.atomic():
+        document, _ = SearchDocument.objects.update_or_create(
+            object_type=object_type, object_id=instance.pk, defaults=values,
+        )
+        current = set(document.tag_rows.values_list('tag', flat=True))
+        wanted = set(values['tags'])
+        if current != wanted:
+            document.tag_rows.filter(tag__in=current - wanted).delete()
+            SearchTag.objects.bulk_create([SearchTag(document=document, tag=t) for t in wanted - current])
+    return document
+
+
+def index_objects(instances: Iterable) -> int:
+    """
+    Créer ou mettre à jour les documents d'un lot de Media / HttpUrl (opérations en masse):
+    un bulk_update et un bulk_create des documents, puis des tags, au lieu d'index_object() par objet.
+
+    Returns:
+        Nombre de documents écrits
+    """
+    wanted = {}
+    for instance in instances:
+        values = build_document(instance)
+        wanted[(values.pop('object_type'), str(instance.pk))] = values
+    if not wanted:
+        return 0
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {}
+        for object_type in {object_type for object_type, _ in wanted}:
+            ids = [object_id for t, object_id in wanted if t == object_type]
+            for document in SearchDocument.objects.filter(object_type=object_type, object_id__in=ids):
+                existing[(object_type, str(document.object_id))] = document
+        updated, created = [], []
+        for (object_type, object_id), values in wanted.items():
+            document = existing.get((object_type, object_id))
+            if document is None:
+                created.append(SearchDocument(object_type=object_type, object_id=object_id, **values))
+                continue
+            for field, value in values.items():
+                setattr(document, field, value)
+            document.updated_at = now
+            updated.append(document)
+        SearchDocument.objects.bulk_update(updated, list(next(iter(wanted.values()))) + ['updated_at'])
+        SearchDocument.objects.bulk_create(created)
+
+        # Tags: seuls les documents dont l'ensemble de tags a changé sont réécrits
+        current = {document.pk: set() for document in updated}
+        for document_id, tag in SearchTag.objects.filter(document__in=list(current)).values_list('document_id', 'tag'):
+            current[document_id].add(tag)
+        changed = [d for d in updated if current[d.pk] != set(d.tags)]
+        SearchTag.objects.filter(document__in=[d.pk for d in changed]).delete()
+        SearchTag.objects.bulk_create([
+            SearchTag(document=document, tag=tag) for document in changed + created for tag in document.tags
+        ])
+    return len(updated) + len(created)
+
+
+def unindex_object(object_type: str, object_id) -> None:
+    SearchDocument.objects.filter(object_type=object_type, object_id=object_id).delete()
+
+
+def unindex_objects(object_type: str, object_ids) -> int:
+    """Retirer les documents d'un ensemble d'objets (liste d'ids ou sous-requête values('pk'))"""
+    deleted, _ = SearchDocument.objects.filter(object_type=object_type, object_id__in=object_ids).delete()
+    return deleted
+
+
+# ============ RECHERCHE ============
+
+def _sqlite_match_query(query: str) -> str:
+    # Chaque mot devient un terme FTS5 entre guillemets: pas d'erreur de syntaxe sur une saisie libre,
+    # le dernier mot est préfixé pour la recherche pendant la frappe
+    tokens = [t for t in _SPLIT_RE.split(query) if t]
+    if not tokens:
+        return ''
+    terms = [f'"{t}"' for t in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _match_sql(query: str):
+    """SQL des id des documents correspondant à la requête, et ses paramètres"""
+    if connection.vendor == 'postgresql':
+        sql = (
+            'SELECT id FROM "SearchDocuments" '
+            'WHERE search_vector @@ websearch_to_tsquery(%s::regconfig, %s)'
+        )
+        return sql, [settings.SEARCH_CONFIG, query]
+    return 'SELECT rowid FROM search_fts WHERE search_fts MATCH %s', [_sqlite_match_query(query)]
+
+
+def _ranked_documents(query: str):
+    """
+    Documents correspondant à la requête, annotés de leur rang (rank).
+    L'index est joint une seule fois (FTS5) ou lu sur la ligne même (tsvector):
+    le rang est calculé par ligne, sans sous-requête corrélée.
+    """
+    if connection.vendor == 'postgresql':
+        tsquery = 'websearch_to_tsquery(%s::regconfig, %s)'
+        params = [settings.SEARCH_CONFIG, query]
+        return SearchDocument.objects.extra(
+            where=[f'"SearchDocuments".search_vector @@ {tsquery}'], params=params,
+        ).annotate(rank=RawSQL(f'ts_rank("SearchDocuments".search_vector, {tsquery})', params, output_field=FloatField()))
+    return SearchDocument.objects.extra(
+        tables=['search_fts'],
+        where=['search_fts.rowid = "SearchDocuments".id', 'search_fts MATCH %s'],
+        params=[_sqlite_match_query(query)],
+    ).annotate(rank=RawSQL('-bm25(search_fts)', [], output_field=FloatField()))
+
+
+def _apply_filters(documents, owner_id, filters: Dict):
+    """Filtres communs aux résultats et aux facettes: propriétaire et sélections de facettes"""
+    if owner_id is not None:
+        documents = documents.filter(owner_id=owner_id)
+    for field in ('object_type',) + FACET_FIELDS:
+        if filters.get(field):
+            documents = documents.filter(**{field: filters[field]})
+    if filters.get('tag'):
+        documents = documents.filter(tag_rows__tag=filters['tag'].lower())
+    return documents
+
+
+def _encode_cursor(rank: float, doc_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([rank, doc_id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        rank, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), int(doc_id)
+    except (ValueError, TypeError):
+        raise ValueError("Curseur invalide")
+
+
+def search(
+    query: str,
+    owner_id=None,
+    filters: Optional[Dict] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+) -> Dict:
+    """
+    Rechercher des documents.
+
+    Args:
+        query: Texte recherché
+        owner_id: Limiter aux objets de cet utilisateur (None = tous, réservé aux admins)
+        filters: Sélections de facettes (object_type, file_type, mime_type, url_type, tag)
+        cursor: Curseur de page opaque (next_cursor de la page précédente)
+        limit: Taille de page
+
+    Returns:
+        Dict avec results, facets et next_cursor
+    """
+    filters = filters or {}
+    limit = max(1, min(limit, MAX_LIMIT))
+    query = (query or '').strip()
+    if not query:
+        return {'results': [], 'facets': {}, 'next_cursor': None}
+
+    match_sql, match_params = _match_sql(query)
+    if connection.vendor == 'sqlite' and not match_params[0]:
+        return {'results': [], 'facets': {}, 'next_cursor': None}
+
+    # Facettes: ensemble des documents correspondants (sous-requête non corrélée, évaluée une fois)
+    documents = _apply_filters(SearchDocument.objects.filter(id__in=RawSQL(match_sql, match_params)), owner_id, filters)
+
+    # Page: tri par rang décroissant puis id, pagination par clé (rank, id) sans OFFSET
+    page = _apply_filters(_ranked_documents(query), owner_id, filters)
+    if cursor:
+        last_rank, last_id = _decode_cursor(cursor)
+        page = page.filter(Q(rank__lt=last_rank) | Q(rank=last_rank, id__lt=last_id))
+    rows = list(
+        page.order_by('-rank', '-id').values(
+            'id', 'rank', 'object_type', 'object_id', 'title',
+            'file_type', 'mime_type', 'url_type', 'tags',
+        )[:limit + 1]
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1]['rank'], rows[-1]['id'])
+
+    return {
+        'results': [{k: v for k, v in row.items() if k != 'id'} for row in rows],
+        'facets': facet_counts(documents),
+        'next_cursor': next_cursor,
+    }
+
+
+def facet_counts(documents) -> Dict[str, Dict[str, int]]:
+    """Comptes par valeur de facette sur l'ensemble des documents correspondants"""
+    facets = {}
+    for field in FACET_FIELDS:
+        rows = documents.exclude(**{field: ''}).order_by().values(field).annotate(n=Count('id'))
+        facets[field] = {row[field]: row['n'] for row in rows}
+    tag_rows = (
+        SearchTag.objects.filter(document__in=documents.values('id'))
+        .order_by().values('tag').annotate(n=Count('id')).order_by('-n')[:settings.SEARCH_MAX_TAG_FACETS]
+    )
+    facets['tags'] = {row['tag']: row['n'] for row in tag_rows}
+    return facets
+
+
+def rebuild_search_index(batch_size: int = 1000, progress=None) -> int:
+    """
+    Réindexer tous les Media et HttpUrl par lots (index_objects) et supprimer les documents orphelins.
+    À lancer après un import en masse (bulk_create ne déclenche pas les signaux).
+    """
+    install_search_structures()
+    count = 0
+    # Les médias en attente de purge (deleted_at) ne sont pas indexés
+    for object_type, objects in (('media', Media.objects.alive()), ('url', HttpUrl.objects.all())):
+        chunk = []
+        for instance in objects.order_by().iterator(chunk_size=batch_size):
+            chunk.append(instance)
+            if len(chunk) >= batch_size:
+                count += index_objects(chunk)
+                chunk = []
+                if progress:
+                    progress(count)
+        count += index_objects(chunk)
+        orphans = SearchDocument.objects.filter(object_type=object_type).exclude(
+            object_id__in=objects.values('pk'),
+        )
+        orphans.delete()
+    return count
@@ -0,0 +1,250 @@
+"""
+Backends de stockage des fichiers Media / MediaRendition.
+
+- 'imagekit': ImageKit (URLs publiques, transformations à la volée)
+- 'local': disque local, adressé par contenu (SHA-256), sans réseau
+
+Chaque Media / MediaRendition enregistre le backend qui détient son fichier
+(storage_backend); imagekit_file_id / imagekit_url contiennent l'identifiant et l'URL
+renvoyés par ce backend. Les nouveaux fichiers vont dans MEDIA_STORAGE_BACKEND.
+
+Stockage local (LOCAL_STORAGE_ROOT):
+    objects/ab/cd/<sha256>           contenu, écrit une seule fois (tmp/ + rename atomique)
+    refs/ab/cd/<sha256>/<ref>        une entrée vide par fichier enregistré (fileId = <sha256>.<ref>)
+    tmp/                             fichiers en cours d'écriture (même système de fichiers)
+Deux uploads identiques partagent le contenu; il est supprimé avec sa dernière référence.
+"""
+import hashlib
+import mimetypes
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+from django.utils.text import get_valid_filename
+
+try:
+    import fcntl
+except ImportError:  # Windows: pas de verrou entre processus
+    fcntl = None
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class StorageBackend:
+    """
+    Interface commune. Les résultats de save() ont la forme d'une réponse d'upload ImageKit
+    (fileId, name, url, thumbnailUrl, size, width, height, fileType) pour Media.create_from_imagekit.
+    """
+
+    name = ''
+
+    def save(self, file_obj, file_name: str, folder: str = '', content_type: Optional[str] = None) -> Dict:
+        raise NotImplementedError
+
+    def read(self, file_id: str, url: str, transform: str = '') -> bytes:
+        """
+        Contenu d'un fichier. `transform` est une transformation ImageKit (ex: 'tr=w-256');
+        un backend qui ne sait pas transformer renvoie l'original.
+        """
+        raise NotImplementedError
+
+    def source(self, file_id: str, url: str) -> str:
+        """Chemin local ou URL lisible par ffmpeg"""
+        return url
+
+    def path(self, file_id: str) -> Optional[str]:
+        """Chemin du fichier sur le disque local, ou None (backend distant / fichier absent)"""
+        return None
+
+    def delete(self, file_ids: List[str]) -> int:
+        """Supprimer des fichiers; renvoie le nombre effectivement supprimé"""
+        raise NotImplementedError
+
+
+# ============ IMAGEKIT ============
+
+class ImageKitStorage(StorageBackend):
+    name = 'imagekit'
+
+    @cached_property
+    def service(self):
+        from media.services.imagekit_service import ImageKitUploadService
+        return ImageKitUploadService()
+
+    def save(self, file_obj, file_name, folder='', content_type=None):
+        return self.service.upload_file(file_obj=file_obj, file_name=file_name, unique_name=True, folder=folder or None)
+
+    def read(self, file_id, url, transform=''):
+        if transform:
+            url = f"{url}{'&' if '?' in url else '?'}{transform}"
+        return self.service.download_file(url)
+
+    def delete(self, file_ids):
+        return len(self.service.bulk_delete_files(file_ids))
+
+
+# ============ DISQUE LOCAL ============
+
+class LocalStorage(StorageBackend):
+    name = 'local'
+
+    def __init__(self, root=None, base_url=None):
+        self.root = str(root or settings.LOCAL_STORAGE_ROOT)
+        self.base_url = base_url or settings.LOCAL_STORAGE_URL
+
+    # --- chemins ---
+
+    @staticmethod
+    def split_id(file_id: str):
+        digest, _, ref = file_id.partition('.')
+        if len(digest) != 64 or not ref or not all(c in '0123456789abcdef' for c in digest + ref):
+            raise ValueError(f"Identifiant de fichier local invalide: {file_id}")
+        return digest, ref
+
+    def _shard(self, kind: str, digest: str) -> str:
+        return os.path.join(self.root, kind, digest[:2], digest[2:4])
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self._shard('objects', digest), digest)
+
+    def refs_dir(self, digest: str) -> str:
+        return os.path.join(self._shard('refs', digest), digest)
+
+    @contextmanager
+    def _locked(self, digest: str):
+        """Verrou par répertoire de shard: ajout d'une référence et suppression du contenu s'excluent"""
+        shard = self._shard('refs', digest)
+        os.makedirs(shard, exist_ok=True)
+        with open(os.path.join(shard, '.lock'), 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def path(self, file_id):
+        try:
+            digest, ref = self.split_id(file_id)
+        except ValueError:
+            return None
+        if not os.path.exists(os.path.join(self.refs_dir(digest), ref)):
+            return None
+        return self.blob_path(digest)
+
+    # --- écriture ---
+
+    def _write_temp(self, file_obj):
+        """Copier le flux dans tmp/ en calculant SHA-256 et taille; renvoie (chemin, digest, taille)"""
+        tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        sha256 = hashlib.sha256()
+        size = 0
+        if hasattr(file_obj, 'seek'):
+            file_obj.seek(0)
+        chunks = file_obj.chunks(CHUNK_SIZE) if hasattr(file_obj, 'chunks') else iter(lambda: file_obj.read(CHUNK_SIZE), b'')
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in chunks:
+                    sha256.update(chunk)
+                    size += len(chunk)
+                    out.write(chunk)
+                out.flush()
+                os.fsync(out.fileno())
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path, sha256.hexdigest(), size
+
+    def save(self, file_obj, file_name, folder='', content_type=None):
+        tmp_path, digest, size = self._write_temp(file_obj)
+        ref = uuid.uuid4().hex[:12]
+        blob = self.blob_path(digest)
+        with self._locked(digest):
+            os.makedirs(self.refs_dir(digest), exist_ok=True)
+            open(os.path.join(self.refs_dir(digest), ref), 'w').close()
+            if os.path.exists(blob):
+                os.unlink(tmp_path)  # contenu déjà présent
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.replace(tmp_path, blob)
+
+        name = get_valid_filename(os.path.basename(file_name or '')) or digest
+        file_id = f"{digest}.{ref}"
+        content_type = content_type or mimetypes.guess_type(name)[0] or ''
+        width, height = self._dimensions(blob) if content_type.startswith('image/') else (0, 0)
+        return {
+            'fileId': file_id,
+            'name': name,
+            'filePath': f"{folder.rstrip('/')}/{name}",
+            'url': f"{self.base_url}{file_id}/{name}",
+            'thumbnailUrl': None,
+            'size': size,
+            'width': width,
+            'height': height,
+            'fileType': 'image' if width else 'non-image',
+        }
+
+    @staticmethod
+    def _dimensions(path):
+        # Pillow ne lit que l'en-tête pour .size
+        try:
+            from PIL import Image
+            with Image.open(path) as image:
+                return image.size
+        except Exception:
+            return 0, 0
+
+    # --- lecture / suppression ---
+
+    def read(self, file_id, url, transform=''):
+        path = self.path(file_id)
+        if path is None:
+            raise ValueError(f"Fichier local introuvable: {file_id}")
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def source(self, file_id, url):
+        return self.path(file_id) or url
+
+    def delete(self, file_ids):
+        deleted = 0
+        for file_id in file_ids:
+            try:
+                digest, ref = self.split_id(file_id)
+            except ValueError:
+                continue
+            refs = self.refs_dir(digest)
+            with self._locked(digest):
+                try:
+                    os.unlink(os.path.join(refs, ref))
+                except FileNotFoundError:
+                    continue
+                deleted += 1
+                if not os.listdir(refs):
+                    os.rmdir(refs)
+                    try:
+                        os.unlink(self.blob_path(digest))
+                    except FileNotFoundError:
+                        pass
+        return deleted
+
+
+# ============ REGISTRE ============
+
+_backends: Dict[str, StorageBackend] = {}
+
+
+def get_storage(name: Optional[str] = None) -> StorageBackend:
+    """Backend `name` (défaut: MEDIA_STORAGE_BACKEND), instancié une fois par processus"""
+    name = name or settings.MEDIA_STORAGE_BACKEND
+    if name not in _backends:
+        try:
+            path = settings.MEDIA_STORAGE_BACKENDS[name]
+        except KeyError:
+            raise ValueError(f"Backend de stockage inconnu: {name}")
+        _backends[name] = import_string(path)()
+    return _backends[name]
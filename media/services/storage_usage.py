@@ -0,0 +1,112 @@
+"""
+Maintenance incrémentale de l'agrégat StorageUsage (espace utilisé par uploader / type).
+
+Chaque création ou suppression de Media applique un delta sur deux lignes
+(le type de fichier et le total 'all') en un seul UPDATE, au lieu de
+recalculer SUM(file_size) GROUP BY uploader, file_type sur toute la table.
+"""
+
+from typing import Iterable, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from media.models import Media, StorageUsage
+
+
+def apply_delta(uploader_id, file_type: str, count_delta: int, bytes_delta: int) -> None:
+    """Ajouter (ou retirer) des fichiers / octets à l'agrégat d'un uploader"""
+    keys = [file_type, StorageUsage.TOTAL]
+    with transaction.atomic():
+        updated = StorageUsage.objects.filter(uploader_id=uploader_id, file_type__in=keys).update(
+            file_count=F('file_count') + count_delta,
+            total_bytes=F('total_bytes') + bytes_delta,
+        )
+        # Une suppression ne crée jamais de ligne (ex: cascade depuis un User en cours de suppression)
+        if updated == len(keys) or count_delta < 0:
+            return
+
+        # Première écriture pour cet uploader / type: créer les lignes manquantes
+        existing = set(
+            StorageUsage.objects.filter(uploader_id=uploader_id, file_type__in=keys)
+            .values_list('file_type', flat=True)
+        )
+        for key in keys:
+            if key in existing:
+                continue
+            try:
+                with transaction.atomic():
+                    StorageUsage.objects.create(
+                        uploader_id=uploader_id,
+                        file_type=key,
+                        file_count=count_delta,
+                        total_bytes=bytes_delta,
+                    )
+            except IntegrityError:
+                # Créée entre-temps par une requête concurrente: appliquer le delta dessus
+                StorageUsage.objects.filter(uploader_id=uploader_id, file_type=key).update(
+                    file_count=F('file_count') + count_delta,
+                    total_bytes=F('total_bytes') + bytes_delta,
+                )
+
+
+def get_total_bytes(uploader_id) -> int:
+    """Lire l'espace total utilisé par un uploader (une ligne, pas d'agrégation)"""
+    total = (
+        StorageUsage.objects.filter(uploader_id=uploader_id, file_type=StorageUsage.TOTAL)
+        .values_list('total_bytes', flat=True)
+        .first()
+    )
+    return total or 0
+
+
+def rebuild_usage(uploader_ids: Iterable) -> int:
+    """
+    Recalculer l'agrégat pour un lot d'uploaders depuis la table Media.
+    Les médias en attente de purge (deleted_at) sont exclus: ils ont été retirés de l'agrégat
+    lors de la demande de suppression et post_delete ne les retire pas une seconde fois.
+
+    Returns:
+        Nombre de lignes StorageUsage écrites
+    """
+    uploader_ids = list(uploader_ids)
+    rows = []
+    totals = {}
+    with transaction.atomic():
+        # Verrouiller les lignes existantes pour ne pas perdre un delta concurrent
+        list(StorageUsage.objects.select_for_update().filter(uploader_id__in=uploader_ids))
+
+        aggregates = (
+            Media.objects.alive().filter(uploader_id__in=uploader_ids)
+            .order_by()
+            .values('uploader_id', 'file_type')
+            .annotate(file_count=Count('uuid'), total_bytes=Sum('file_size'))
+        )
+        for agg in aggregates:
+            rows.append(StorageUsage(
+                uploader_id=agg['uploader_id'],
+                file_type=agg['file_type'],
+                file_count=agg['file_count'],
+                total_bytes=agg['total_bytes'] or 0,
+            ))
+            count, size = totals.get(agg['uploader_id'], (0, 0))
+            totals[agg['uploader_id']] = (count + agg['file_count'], size + (agg['total_bytes'] or 0))
+
+        for uploader_id, (count, size) in totals.items():
+            rows.append(StorageUsage(
+                uploader_id=uploader_id,
+                file_type=StorageUsage.TOTAL,
+                file_count=count,
+                total_bytes=size,
+            ))
+
+        StorageUsage.objects.filter(uploader_id__in=uploader_ids).delete()
+        StorageUsage.objects.bulk_create(rows)
+    return len(rows)
+
+
+def quota_exceeded(uploader_id, incoming_bytes: int, quota_bytes: Optional[int]) -> bool:
+    """Indique si l'ajout de incoming_bytes dépasserait le quota (0 / None = illimité)"""
+    if not quota_bytes:
+        return False
+    return get_total_bytes(uploader_id) + incoming_bytes > quota_bytes
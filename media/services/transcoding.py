@@ -0,0 +1,74 @@
+"""
+Transcodage d'images (WebP / AVIF / JPEG / PNG) avec Pillow, exécuté dans un pool de processus.
+
+transcode_image() est une fonction de module sans accès Django: elle est
+sérialisable vers les processus du pool et ne touche pas à la base.
+"""
+import io
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from django.conf import settings
+
+FORMAT_MIME_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+}
+
+MIME_FORMATS = {mime: fmt for fmt, mime in FORMAT_MIME_TYPES.items()}
+MIME_FORMATS['image/jpg'] = 'jpeg'
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Pool de processus partagé (créé au premier usage, MEDIA_CONVERSION_WORKERS processus)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=settings.MEDIA_CONVERSION_WORKERS or None)
+    return _pool
+
+
+def transcode_image(data: bytes, fmt: str, quality: int, max_width: int = 0) -> Dict:
+    """
+    Réencoder une image.
+
+    Args:
+        data: Contenu de l'image source
+        fmt: Format cible (avif, webp, jpeg, png)
+        quality: Qualité d'encodage (ignorée pour png)
+        max_width: Largeur maximale (0 = taille d'origine)
+
+    Returns:
+        Dict avec format, mime_type, width, height, quality et data (bytes)
+    """
+    from PIL import Image, ImageOps
+
+    if fmt not in FORMAT_MIME_TYPES:
+        raise ValueError(f"Format non supporté: {fmt}")
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        if max_width and image.width > max_width:
+            image.thumbnail((max_width, image.height))
+        if fmt == 'jpeg' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        options = {'optimize': True} if fmt == 'png' else {'quality': quality}
+        out = io.BytesIO()
+        image.save(out, format=fmt.upper(), **options)
+
+    return {
+        'format': fmt,
+        'mime_type': FORMAT_MIME_TYPES[fmt],
+        'width': image.width,
+        'height': image.height,
+        'quality': 0 if fmt == 'png' else quality,
+        'data': out.getvalue(),
+    }
@@ -0,0 +1,184 @@
+"""
+Transcription audio / vidéo par segments, exécutée dans un pool de processus.
+
+- plan_segments(): découpage de la durée en segments qui se recouvrent
+- transcribe_segment(): extraction PCM (ffmpeg) et reconnaissance d'un segment,
+  fonction de module sans accès Django, sérialisable vers les processus du pool
+- stitch_segments(): recollage des segments, le recouvrement est coupé en son milieu
+
+Le reconnaisseur est configurable (MEDIA_TRANSCRIPTION_RECOGNIZER): une sous-classe de
+Recognizer, instanciée une fois par processus du pool.
+"""
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Reconnaisseurs déjà chargés dans ce processus (un modèle par processus, pas par segment)
+_recognizers: Dict[Tuple[str, str], 'Recognizer'] = {}
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Pool de processus de transcription (créé au premier usage, MEDIA_TRANSCRIPTION_WORKERS processus)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=settings.MEDIA_TRANSCRIPTION_WORKERS or None)
+    return _pool
+
+
+# ============ RECONNAISSEURS ============
+
+class Recognizer:
+    """
+    Reconnaisseur vocal local.
+    Sous-classer et implémenter transcribe(); `needs_audio = False` évite l'extraction ffmpeg.
+    """
+
+    needs_audio = True
+
+    def __init__(self, model: str = ''):
+        self.model = model
+
+    def transcribe(self, pcm: Optional[bytes], sample_rate: int, duration: float) -> List[Dict]:
+        """
+        Transcrire un segment.
+
+        Args:
+            pcm: Audio mono 16 bits little-endian (None si needs_audio est False)
+            sample_rate: Fréquence d'échantillonnage
+            duration: Durée du segment en secondes
+
+        Returns:
+            Liste de {'start', 'end', 'text'}, temps relatifs au début du segment
+        """
+        raise NotImplementedError
+
+
+class StubRecognizer(Recognizer):
+    """Reconnaisseur factice (tests, développement): un passage par tranche de 5 secondes"""
+
+    needs_audio = False
+    STEP = 5.0
+
+    def transcribe(self, pcm, sample_rate, duration):
+        pieces = []
+        start = 0.0
+        while start < duration:
+            end = min(duration, start + self.STEP)
+            pieces.append({'start': start, 'end': end, 'text': f"[{end - start:.1f}s]"})
+            start = end
+        return pieces
+
+
+class WhisperRecognizer(Recognizer):
+    """Reconnaissance avec faster-whisper (dépendance optionnelle: pip install faster-whisper)"""
+
+    def __init__(self, model: str = 'base'):
+        super().__init__(model)
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("faster-whisper n'est pas installé (MEDIA_TRANSCRIPTION_RECOGNIZER)")
+        self._model = WhisperModel(model or 'base', device='cpu', compute_type='int8')
+
+    def transcribe(self, pcm, sample_rate, duration):
+        import numpy as np
+
+        audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        segments, _ = self._model.transcribe(audio, vad_filter=True)
+        return [{'start': s.start, 'end': s.end, 'text': s.text.strip()} for s in segments]
+
+
+def get_recognizer(path: str, model: str) -> Recognizer:
+    key = (path, model)
+    if key not in _recognizers:
+        _recognizers[key] = import_string(path)(model)
+    return _recognizers[key]
+
+
+# ============ SEGMENTS ============
+
+def plan_segments(duration: float, segment_s: float, overlap_s: float) -> List[Tuple[int, float, float]]:
+    """
+    Découper [0, duration] en segments [(index, début, fin)] de segment_s secondes,
+    chacun recouvrant le précédent de overlap_s secondes.
+    """
+    if duration <= 0:
+        return []
+    if overlap_s >= segment_s:
+        raise ValueError("Le recouvrement doit être plus court que le segment")
+    segments = []
+    start = 0.0
+    step = segment_s - overlap_s
+    while True:
+        end = min(float(duration), start + segment_s)
+        segments.append((len(segments), start, end))
+        if end >= duration:
+            return segments
+        start += step
+
+
+def extract_pcm(source: str, start: float, duration: float, sample_rate: int) -> bytes:
+    """Extraire un segment audio mono s16le avec ffmpeg (lecture par plage HTTP, sans télécharger le fichier)"""
+    command = [
+        'ffmpeg', '-nostdin', '-loglevel', 'error',
+        '-ss', f"{start:.3f}", '-t', f"{duration:.3f}", '-i', source,
+        '-vn', '-ac', '1', '-ar', str(sample_rate), '-f', 's16le', '-',
+    ]
+    try:
+        completed = subprocess.run(command, capture_output=True, check=True, timeout=max(60, duration * 4))
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg est requis pour extraire l'audio")
+    except subprocess.CalledProcessError as exc:
+        raise RuntimeError(f"ffmpeg: {exc.stderr.decode(errors='replace').strip()}")
+    return completed.stdout
+
+
+def transcribe_segment(
+    source: str,
+    start: float,
+    end: float,
+    recognizer_path: str,
+    model: str,
+    sample_rate: int,
+) -> List[Dict]:
+    """
+    Transcrire un segment [start, end] de la source (exécuté dans le pool).
+
+    Returns:
+        Passages {'start', 'end', 'text'} en temps absolu
+    """
+    recognizer = get_recognizer(recognizer_path, model)
+    duration = end - start
+    pcm = extract_pcm(source, start, duration, sample_rate) if recognizer.needs_audio else None
+    pieces = recognizer.transcribe(pcm, sample_rate, duration)
+    return [
+        {'start': round(start + p['start'], 3), 'end': round(start + p['end'], 3), 'text': p['text']}
+        for p in pieces if p.get('text')
+    ]
+
+
+def stitch_segments(segments: List[Tuple[float, float, List[Dict]]]) -> List[Dict]:
+    """
+    Recoller les passages de segments consécutifs [(début, fin, passages)].
+    Dans la zone de recouvrement entre deux segments, la coupe est au milieu:
+    un passage est gardé par le segment qui contient son centre.
+    """
+    segments = sorted(segments, key=lambda s: s[0])
+    stitched = []
+    for i, (start, end, pieces) in enumerate(segments):
+        low = (start + segments[i - 1][1]) / 2 if i > 0 else float('-inf')
+        high = (segments[i + 1][0] + end) / 2 if i + 1 < len(segments) else float('inf')
+        for piece in pieces:
+            center = (piece['start'] + piece['end']) / 2
+            if low <= center < high:
+                stitched.append(piece)
+    return stitched
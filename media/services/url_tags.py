@@ -0,0 +1,190 @@
+"""
+Tags et métadonnées des HttpUrl.
+
+HttpUrl.tags (JSON) reste la valeur exposée; la table HttpUrlTags en est la forme
+normalisée, indexée (tag, url), utilisée pour tous les filtres et comptes par tag.
+
+- save() d'une HttpUrl: sync_tags() depuis le JSON (signal post_save)
+- opérations en masse (bulk_tag / bulk_untag): INSERT / DELETE ensemblistes par lots
+  d'URLs, puis HttpUrl.tags recalculé en SQL depuis HttpUrlTags pour le même lot
+- metadata: index GIN (jsonb_path_ops) sur PostgreSQL, créé après `migrate`
+"""
+from typing import Callable, Iterable, List, Optional
+
+from django.db import connection, connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from media.models import HttpUrl, HttpUrlTag
+
+TAG_MAX_LENGTH = 100
+BULK_BATCH_SIZE = 1000
+
+
+def normalize_tags(tags) -> List[str]:
+    """Tags uniques, en minuscules, triés (les valeurs non-liste donnent [])"""
+    if not isinstance(tags, (list, tuple, set)):
+        return []
+    return sorted({str(t).strip().lower()[:TAG_MAX_LENGTH] for t in tags if str(t).strip()})
+
+
+# ============ STRUCTURES D'INDEX ============
+
+POSTGRES_SETUP = [
+    'CREATE INDEX IF NOT EXISTS http_urls_metadata_gin ON "HttpUrls" USING GIN (metadata jsonb_path_ops)',
+]
+
+
+def install_tag_structures(using='default'):
+    """Index GIN sur HttpUrls.metadata (PostgreSQL uniquement, idempotent)"""
+    conn = connections[using]
+    if conn.vendor != 'postgresql':
+        return
+    with conn.cursor() as cursor:
+        for sql in POSTGRES_SETUP:
+            cursor.execute(sql)
+
+
+# ============ SYNCHRONISATION ============
+
+def sync_tags(url: HttpUrl) -> None:
+    """Aligner les lignes HttpUrlTags d'une URL sur son champ JSON tags"""
+    wanted = set(normalize_tags(url.tags))
+    current = set(url.tag_rows.values_list('tag', flat=True))
+    if current == wanted:
+        return
+    with transaction.atomic():
+        url.tag_rows.filter(tag__in=current - wanted).delete()
+        HttpUrlTag.objects.bulk_create(
+            [HttpUrlTag(url=url, tag=t) for t in wanted - current],
+            ignore_conflicts=True,
+        )
+
+
+def _refresh_json_sql() -> str:
+    # HttpUrl.tags recalculé depuis HttpUrlTags (tri alphabétique), sans aller-retour Python
+    if connection.vendor == 'postgresql':
+        aggregate = (
+            "COALESCE((SELECT jsonb_agg(t.tag ORDER BY t.tag) FROM \"HttpUrlTags\" t "
+            "WHERE t.url_id = \"HttpUrls\".uuid), '[]'::jsonb)"
+        )
+    else:
+        aggregate = (
+            "COALESCE((SELECT json_group_array(tag) FROM (SELECT t.tag FROM \"HttpUrlTags\" t "
+            "WHERE t.url_id = \"HttpUrls\".uuid ORDER BY t.tag)), '[]')"
+        )
+    return f'UPDATE "HttpUrls" SET tags = {aggregate}, updated_at = %s WHERE uuid IN ({{placeholders}})'
+
+
+def refresh_tags_json(url_ids: List) -> None:
+    """Réécrire HttpUrl.tags pour un lot d'URLs depuis HttpUrlTags (une requête)"""
+    if not url_ids:
+        return
+    pk = HttpUrl._meta.pk
+    params = [HttpUrl._meta.get_field('updated_at').get_db_prep_value(timezone.now(), connection)]
+    params += [pk.get_db_prep_value(u, connection) for u in url_ids]
+    sql = _refresh_json_sql().format(placeholders=', '.join(['%s'] * len(url_ids)))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def rebuild_tags(batch_size: int = BULK_BATCH_SIZE, progress: Optional[Callable] = None) -> int:
+    """Reconstruire HttpUrlTags depuis HttpUrl.tags (après un import en masse)"""
+    count = 0
+    urls = HttpUrl.objects.order_by().only('uuid', 'tags')
+    for url in urls.iterator(chunk_size=batch_size):
+        sync_tags(url)
+        count += 1
+        if progress and count % batch_size == 0:
+            progress(count)
+    return count
+
+
+# ============ OPÉRATIONS EN MASSE ============
+
+def _batches(urls, batch_size: int) -> Iterable[List]:
+    """
+    Lots d'ids par pagination sur la clé (uuid > dernier id): le filtre est réévalué à chaque
+    lot, les URLs déjà traitées restent derrière le curseur même si elles ne correspondent plus
+    """
+    last = None
+    while True:
+        page = urls.order_by('uuid')
+        if last is not None:
+            page = page.filter(uuid__gt=last)
+        batch = list(page.values_list('uuid', flat=True)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1]
+
+
+def _after_bulk_change(url_ids: List) -> None:
+    refresh_tags_json(url_ids)
+    # Les tags font partie du document de recherche (media/services/search.py), réindexé par lot
+    from media.services.search import index_objects
+    index_objects(HttpUrl.objects.filter(uuid__in=url_ids))
+
+
+def bulk_tag(urls, tags, batch_size: int = BULK_BATCH_SIZE) -> int:
+    """
+    Ajouter des tags à toutes les URLs du queryset.
+
+    Chaque lot est une transaction: un INSERT ... ON CONFLICT DO NOTHING
+    multi-lignes puis un UPDATE du JSON.
+
+    Returns:
+        Nombre d'URLs traitées
+    """
+    tags = normalize_tags(tags)
+    if not tags:
+        return 0
+    count = 0
+    for batch in _batches(urls, batch_size):
+        with transaction.atomic():
+            HttpUrlTag.objects.bulk_create(
+                [HttpUrlTag(url_id=url_id, tag=tag) for url_id in batch for tag in tags],
+                ignore_conflicts=True,
+            )
+            _after_bulk_change(batch)
+        count += len(batch)
+    return count
+
+
+def bulk_untag(urls, tags, batch_size: int = BULK_BATCH_SIZE) -> int:
+    """
+    Retirer des tags de toutes les URLs du queryset (DELETE ensembliste par lot).
+
+    Returns:
+        Nombre d'URLs traitées
+    """
+    tags = normalize_tags(tags)
+    if not tags:
+        return 0
+    count = 0
+    for batch in _batches(urls, batch_size):
+        with transaction.atomic():
+            HttpUrlTag.objects.filter(url_id__in=batch, tag__in=tags).delete()
+            _after_bulk_change(batch)
+        count += len(batch)
+    return count
+
+
+# ============ STATISTIQUES ============
+
+def tag_counts(urls=None, prefix: str = '', limit: int = 100) -> List[dict]:
+    """
+    Cardinalité des tags: [{'tag': ..., 'count': ...}] par nombre d'URLs décroissant.
+
+    Args:
+        urls: Limiter aux URLs de ce queryset (None = toutes, parcours de l'index seul)
+        prefix: Ne garder que les tags commençant par ce préfixe
+        limit: Nombre maximum de tags
+    """
+    rows = HttpUrlTag.objects.all()
+    if urls is not None:
+        rows = rows.filter(url__in=urls.order_by().values('uuid'))
+    if prefix:
+        rows = rows.filter(tag__startswith=prefix.strip().lower())
+    rows = rows.order_by().values('tag').annotate(count=Count('url_id')).order_by('-count', 'tag')
+    return list(rows[:limit])
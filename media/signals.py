@@ -0,0 +1,77 @@
+"""
+Signaux de l'app media.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from media.models import HttpUrl, Media, MediaJob, MediaRendition
+from media.services import search
+from media.services.job_events import publish_job_event
+from media.services.url_tags import sync_tags
+from media.services.storage_usage import apply_delta
+
+
+@receiver(post_save, sender=Media)
+def add_storage_usage(sender, instance, created, **kwargs):
+    """Comptabiliser un nouveau Media dans l'agrégat StorageUsage"""
+    if created:
+        apply_delta(instance.uploader_id, instance.file_type, 1, instance.file_size)
+
+
+@receiver(post_delete, sender=Media)
+def remove_storage_usage(sender, instance, **kwargs):
+    """Retirer un Media supprimé de l'agrégat StorageUsage"""
+    # Suppression logique (deleted_at): déjà retiré lors de la demande (media/services/deletion.py)
+    if instance.deleted_at is None:
+        apply_delta(instance.uploader_id, instance.file_type, -1, -instance.file_size)
+
+
+@receiver(post_save, sender=MediaRendition)
+@receiver(post_delete, sender=MediaRendition)
+def touch_media(sender, instance, raw=False, **kwargs):
+    """Les renditions font partie de la réponse Media: avancer updated_at (ETag / Last-Modified)"""
+    if not raw:
+        Media.objects.filter(pk=instance.media_id).update(updated_at=timezone.now())
+
+
+# ============ ÉVÉNEMENTS DE JOBS ============
+
+@receiver(post_save, sender=MediaJob)
+def publish_job_state(sender, instance, raw=False, **kwargs):
+    """Diffuser l'état du job aux clients SSE (save(), mark_as_* ...)"""
+    if not raw:
+        publish_job_event(instance.pk, instance.media_id, instance.status, instance.job_type)
+
+
+# ============ TAGS DES URLS ============
+
+@receiver(post_save, sender=HttpUrl)
+def sync_url_tags(sender, instance, raw=False, **kwargs):
+    """Aligner la table HttpUrlTags sur HttpUrl.tags"""
+    if not raw:
+        sync_tags(instance)
+
+
+# ============ INDEX DE RECHERCHE ============
+
+@receiver(post_save, sender=Media)
+@receiver(post_save, sender=HttpUrl)
+def index_search_document(sender, instance, raw=False, **kwargs):
+    """(Ré)indexer l'objet dans SearchDocuments"""
+    if raw:
+        return
+    if getattr(instance, 'deleted_at', None) is not None:
+        search.unindex_object('media', instance.pk)
+    else:
+        search.index_object(instance)
+
+
+@receiver(post_delete, sender=Media)
+def unindex_media(sender, instance, **kwargs):
+    search.unindex_object('media', instance.pk)
+
+
+@receiver(post_delete, sender=HttpUrl)
+def unindex_url(sender, instance, **kwargs):
+    search.unindex_object('url', instance.pk)
@@ -1,3 +1,793 @@
-from django.test import TestCase
+import io
+import itertools
+import json
+import os
+import tempfile
+import uuid
+from concurrent.futures import Future
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import User
+from media.jobs.conversion import convert_image
+from media.jobs.pipelines import complete_job, create_pipeline, fail_job, get_pipeline
+from media.jobs.registry import claim_jobs, requeue_dead_jobs, requeue_stale_jobs
+from media.jobs.transcription import transcribe_media
+from media.management.commands.import_media import Command as ImportMediaCommand
+from media.models import (
+    ArchivedMediaJob, DeletionRequest, HttpUrl, Media, MediaCounter, MediaJob, MediaRendition, SearchDocument, StorageUsage,
+    TranscriptionSegment, WebhookEvent,
+)
+from media.services import search
+from media.services.admission import MemoryTokenBucket
+from media.services.counters import CounterService, write_counts
+from media.services.direct_upload import issue_credentials
+from media.services.job_retention import archive_jobs, purge_archive
+from media.services.storage import LocalStorage
+from media.webhooks import registry as webhooks
+from media.services.deletion import claim_request, request_media_deletion, request_user_deletion, run_request
+from media.services.storage_usage import rebuild_usage
+from media.services.transcription import Recognizer, plan_segments, stitch_segments, transcribe_segment
+
+
+def create_user(username='alice', **fields):
+    return User.objects.create(username=username, email=f"{username}@example.com", **fields)
+
+
+def create_media(uploader, **fields):
+    defaults = {
+        'original_filename': 'clip.mp4',
+        'file_size': 1000,
+        'mime_type': 'video/mp4',
+        'file_type': 'video',
+        'storage_backend': 'local',
+    }
+    defaults.update(fields)
+    defaults.setdefault('imagekit_file_id', f"file-{Media.objects.count()}-{defaults['original_filename']}")
+    defaults.setdefault('imagekit_url', f"https://cdn.example.com/{defaults['imagekit_file_id']}")
+    return Media.objects.create(uploader=uploader, **defaults)
+
+
+# ============ TRANSCRIPTION ============
+
+class EchoRecognizer(Recognizer):
+    """Reconnaisseur de test: un passage par seconde, sans extraction audio"""
+
+    needs_audio = False
+
+    def transcribe(self, pcm, sample_rate, duration):
+        return [{'start': float(s), 'end': float(s) + 1, 'text': f"w{s}"} for s in range(int(duration))]
+
+
+class FakePool:
+    """Pool synchrone: les segments soumis sont enregistrés et leurs futures contrôlées par le test"""
+
+    def __init__(self, fail_index=None):
+        self.submitted = []
+        self.futures = []
+        self.fail_index = fail_index
+
+    def submit(self, func, source, start, end, *args):
+        self.submitted.append((start, end))
+        future = Future()
+        if self.fail_index is None:
+            future.set_result(func(source, start, end, *args))
+        elif len(self.futures) == self.fail_index:
+            future.set_exception(RuntimeError("segment en échec"))
+        self.futures.append(future)
+        return future
+
+
+class PlanSegmentsTests(SimpleTestCase):
+
+    def test_segments_overlap_and_last_is_clipped(self):
+        self.assertEqual(plan_segments(65, 30, 5), [(0, 0.0, 30.0), (1, 25.0, 55.0), (2, 50.0, 65.0)])
+
+    def test_last_segment_end_is_float(self):
+        index, start, end = plan_segments(65, 30, 5)[-1]
+        self.assertIsInstance(end, float)
+
+    def test_overlap_must_be_shorter_than_segment(self):
+        with self.assertRaises(ValueError):
+            plan_segments(60, 10, 10)
+
+    def test_empty_duration(self):
+        self.assertEqual(plan_segments(0, 30, 2), [])
+
+    def test_stitch_cuts_at_middle_of_overlap(self):
+        # Recouvrement [25, 30]: milieu 27.5
+        first = [{'start': 26.0, 'end': 27.0, 'text': 'a'}, {'start': 27.0, 'end': 29.0, 'text': 'dup'}]
+        second = [{'start': 27.0, 'end': 29.0, 'text': 'b'}, {'start': 29.0, 'end': 31.0, 'text': 'c'}]
+        pieces = stitch_segments([(25.0, 55.0, second), (0.0, 30.0, first)])
+        self.assertEqual([p['text'] for p in pieces], ['a', 'b', 'c'])
+
+    def test_transcribe_segment_returns_absolute_times(self):
+        path = f"{__name__}.EchoRecognizer"
+        pieces = transcribe_segment('unused', 10.0, 12.0, path, '', 16000)
+        self.assertEqual(pieces, [
+            {'start': 10.0, 'end': 11.0, 'text': 'w0'},
+            {'start': 11.0, 'end': 12.0, 'text': 'w1'},
+        ])
+
+
+@override_settings(
+    MEDIA_TRANSCRIPTION_RECOGNIZER=f"{__name__}.EchoRecognizer",
+    MEDIA_TRANSCRIPTION_SEGMENT_SECONDS=10.0,
+    MEDIA_TRANSCRIPTION_OVERLAP_SECONDS=2.0,
+)
+class TranscriptionJobTests(TestCase):
+
+    def setUp(self):
+        self.media = create_media(create_user(), duration_s=25)
+        self.job = MediaJob.objects.create(media=self.media, job_type='transcription', status='processing')
+
+    def run_job(self, pool):
+        with mock.patch('media.jobs.transcription.get_process_pool', return_value=pool):
+            return transcribe_media(self.job)
+
+    def test_transcribes_all_segments(self):
+        pool = FakePool()
+        result = self.run_job(pool)
+        self.assertEqual(pool.submitted, [(0.0, 10.0), (8.0, 18.0), (16.0, 25.0)])
+        self.assertEqual(result['segment_count'], 3)
+        starts = [p['start'] for p in result['segments']]
+        self.assertEqual(starts, sorted(starts))
+        self.assertEqual(len(starts), len(set(starts)))
+        self.assertEqual(self.job.transcription_segments.count(), 3)
+
+    def test_resume_submits_only_missing_segments(self):
+        TranscriptionSegment.objects.create(
+            job=self.job, index=1, start_s=8.0, end_s=18.0,
+            pieces=[{'start': 9.0, 'end': 10.0, 'text': 'kept'}],
+        )
+        pool = FakePool()
+        result = self.run_job(pool)
+        self.assertEqual(pool.submitted, [(0.0, 10.0), (16.0, 25.0)])
+        self.assertIn('kept', result['text'])
+
+    def test_failing_segment_cancels_queued_segments(self):
+        pool = FakePool(fail_index=0)
+        with self.assertRaises(RuntimeError):
+            self.run_job(pool)
+        self.assertTrue(all(future.cancelled() for future in pool.futures[1:]))
+        self.assertFalse(self.job.transcription_segments.exists())
+
+
+# ============ UTILISATION DU STOCKAGE ============
+
+class StorageUsageTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+
+    def usage(self):
+        return dict(StorageUsage.objects.filter(uploader=self.user).values_list('file_type', 'total_bytes'))
+
+    def test_rebuild_excludes_media_pending_deletion(self):
+        create_media(self.user, file_size=100)
+        doomed = create_media(self.user, file_size=40)
+        request_media_deletion(doomed)
+        self.assertEqual(self.usage(), {'video': 100, StorageUsage.TOTAL: 100})
+
+        rebuild_usage([self.user.pk])
+        self.assertEqual(self.usage(), {'video': 100, StorageUsage.TOTAL: 100})
+        # La purge (post_delete) ne retire pas une seconde fois le média déjà décompté
+        Media.objects.get(pk=doomed.pk).delete()
+        self.assertEqual(self.usage(), {'video': 100, StorageUsage.TOTAL: 100})
+
+
+# ============ SUPPRESSION DIFFÉRÉE ============
+
+class DeletionTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.media = [create_media(self.user, file_size=10), create_media(self.user, file_size=20)]
+
+    def test_user_deletion_hides_media_immediately(self):
+        self.assertEqual(SearchDocument.objects.filter(object_type='media').count(), 2)
+        request_user_deletion(self.user)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertFalse(Media.objects.alive().filter(uploader=self.user).exists())
+        self.assertFalse(StorageUsage.objects.filter(uploader=self.user).exists())
+        self.assertFalse(SearchDocument.objects.filter(object_type='media').exists())
+        # Idempotent: une seule demande ouverte
+        self.assertEqual(request_user_deletion(self.user).pk, DeletionRequest.objects.get().pk)
+
+    @override_settings(DELETION_RETRY_BASE_DELAY=60, DELETION_RETRY_MAX_DELAY=600, DELETION_MAX_ATTEMPTS=5)
+    def test_failed_run_is_retried_after_a_delay(self):
+        request_media_deletion(self.media[0])
+        deletion = claim_request()
+        with mock.patch('media.services.deletion.process_request', side_effect=RuntimeError("ImageKit indisponible")):
+            run_request(deletion)
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.status, 'pending')
+        self.assertGreaterEqual((deletion.run_after - timezone.now()).total_seconds(), 55)
+        self.assertIsNone(claim_request())
+
+        DeletionRequest.objects.filter(pk=deletion.pk).update(run_after=timezone.now())
+        self.assertEqual(claim_request().pk, deletion.pk)
+
+
+# ============ LIVRAISON ============
+
+class MediaDeliveryAccessTests(TestCase):
+    """Contenu et fichier d'un média: propriétaire ou admin seulement"""
+
+    def setUp(self):
+        self.owner = create_user('owner')
+        self.media = create_media(self.owner, mime_type='image/png', file_type='image', storage_backend='imagekit')
+        self.client = APIClient()
+
+    def get(self, name, user=None):
+        self.client.force_authenticate(user)
+        return self.client.get(f"/api/media/{self.media.pk}/{name}/")
+
+    def test_content_requires_owner_or_staff(self):
+        self.assertEqual(self.get('content').status_code, 403)
+        self.assertEqual(self.get('content', create_user('mallory')).status_code, 404)
+        self.assertEqual(self.get('content', self.owner).status_code, 302)
+        self.assertEqual(self.get('content', create_user('admin', is_admin=True)).status_code, 302)
+
+    def test_file_requires_owner_or_staff(self):
+        self.assertEqual(self.get('file').status_code, 403)
+        self.assertEqual(self.get('file', create_user('mallory')).status_code, 404)
+        self.assertEqual(self.get('file', self.owner).status_code, 302)
+        self.assertEqual(self.get('file', create_user('admin', is_admin=True)).status_code, 302)
+
+
+# ============ ÉVÉNEMENTS DES JOBS (SSE) ============
+
+class JobEventsTransportTests(TestCase):
+
+    def test_wsgi_request_is_refused(self):
+        self.client.force_login(create_user())
+        response = self.client.get('/api/jobs/events/', {'job': '00000000-0000-0000-0000-000000000000'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.streaming)
+
+    async def test_asgi_request_reaches_the_view(self):
+        response = await self.async_client.get('/api/jobs/events/')
+        self.assertEqual(response.status_code, 401)
+
+
+# ============ JOBS: REPRISES ============
+
+class InlinePool:
+    """Pool de processus simulé: exécute la fonction dans le thread du test"""
+
+    def submit(self, func, *args):
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+
+def fake_transcode(source, fmt, quality, width):
+    return {'format': fmt, 'mime_type': f'image/{fmt}', 'width': width or 800, 'height': 600,
+            'quality': quality, 'data': b'x' * 100}
+
+
+@override_settings(MEDIA_CONVERSION_FORMATS=['webp'], MEDIA_RENDITION_WIDTHS=[0, 400])
+class ConversionRetryTests(TestCase):
+
+    def setUp(self):
+        self.media = create_media(create_user(), original_filename='photo.png', mime_type='image/png',
+                                  file_type='image', width=800, height=600)
+        ids = itertools.count()
+        storage = mock.Mock()
+        storage.name = 'local'
+        storage.save.side_effect = lambda *args, **kwargs: {'fileId': f'rendition-{next(ids)}', 'url': 'https://cdn.example.com/r'}
+        self.patch('_load_source', return_value=b'source')
+        self.patch('get_process_pool', return_value=InlinePool())
+        self.patch('get_storage', return_value=storage)
+        self.patch('transcode_image', side_effect=fake_transcode)
+        self.purge_files = self.patch('purge_files')
+
+    def patch(self, name, **kwargs):
+        patcher = mock.patch(f'media.jobs.conversion.{name}', **kwargs)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_retry_replaces_renditions_of_previous_attempt(self):
+        earlier = MediaRendition.objects.create(
+            media=self.media, format='webp', mime_type='image/webp', width=800, height=600,
+            file_size=50, storage_backend='local', imagekit_file_id='earlier', url='https://cdn.example.com/e',
+        )
+        job = MediaJob.objects.create(media=self.media, job_type='conversion', status='processing')
+        convert_image(job)
+        first = set(self.media.renditions.exclude(pk=earlier.pk).values_list('imagekit_file_id', flat=True))
+        self.assertEqual(len(first), 2)
+
+        convert_image(job)
+        self.purge_files.assert_called_once()
+        self.assertEqual({file_id for _, file_id in self.purge_files.call_args.args[0]}, first)
+        self.assertEqual(self.media.renditions.count(), 3)
+        self.assertTrue(MediaRendition.objects.filter(pk=earlier.pk).exists())
+
+
+class JobLeaseTests(TestCase):
+
+    def setUp(self):
+        self.media = create_media(create_user())
+
+    def test_requeued_stale_job_loses_its_lease(self):
+        job = MediaJob.objects.create(media=self.media, job_type='metadata', status='pending')
+        claim_jobs(1)
+        MediaJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(60), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.lease_expires_at, job.locked_by), ('pending', None, ''))
+
+
+# ============ IMPORT EN MASSE ============
+
+class ImportMediaTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.manifest = os.path.join(directory.name, 'legacy.jsonl')
+
+    def write_manifest(self, lines):
+        with open(self.manifest, 'w', encoding='utf-8') as fh:
+            fh.write('\n'.join(lines) + '\n')
+
+    def row(self, index, **fields):
+        row = {'filename': f'photo-{index}.jpg', 'size': 100, 'mime': 'image/jpeg',
+               'imagekit_file_id': f'legacy-{index}', 'imagekit_url': f'https://cdn.example.com/legacy-{index}',
+               'uploader_email': self.user.email}
+        row.update(fields)
+        return json.dumps(row)
+
+    def import_media(self, *args):
+        call_command('import_media', self.manifest, '--batch-size', '2', *args, stdout=open(os.devnull, 'w'))
+
+    def test_invalid_lines_are_skipped(self):
+        self.write_manifest([self.row(0), '{"filename": ', '[1, 2]', '"text"', self.row(1, size='12 Mo'), self.row(2)])
+        self.import_media()
+        self.assertEqual(set(Media.objects.values_list('imagekit_file_id', flat=True)), {'legacy-0', 'legacy-2'})
+
+    def test_each_batch_updates_usage_and_search_index(self):
+        self.write_manifest([self.row(i) for i in range(5)])
+        original_flush = ImportMediaCommand._flush
+        flushed = []
+
+        def flush_then_crash(command, batch, position, checkpoint_path):
+            if flushed:
+                raise RuntimeError('interrompu')
+            flushed.append(position)
+            return original_flush(command, batch, position, checkpoint_path)
+
+        with mock.patch.object(ImportMediaCommand, '_flush', flush_then_crash):
+            with self.assertRaises(RuntimeError):
+                self.import_media()
+        usage = StorageUsage.objects.get(uploader=self.user, file_type='image')
+        self.assertEqual((usage.file_count, usage.total_bytes), (2, 200))
+        self.assertEqual(SearchDocument.objects.filter(object_type='media').count(), 2)
+
+        self.import_media()
+        usage = StorageUsage.objects.get(uploader=self.user, file_type='image')
+        self.assertEqual((usage.file_count, usage.total_bytes), (5, 500))
+        self.assertEqual(SearchDocument.objects.filter(object_type='media').count(), 5)
+
+
+# ============ RECHERCHE PLEIN TEXTE ============
+
+class SearchTests(TestCase):
+    """Index FTS5 (SQLite) synchronisé par triggers, rang bm25"""
+
+    def setUp(self):
+        self.alice = create_user()
+        self.bob = create_user('bob')
+
+    def titles(self, query, **kwargs):
+        return [row['title'] for row in search.search(query, **kwargs)['results']]
+
+    def test_more_relevant_document_ranks_first(self):
+        create_media(self.alice, original_filename='sunset-beach-holiday-family-trip.jpg', mime_type='image/jpeg', file_type='image')
+        create_media(self.alice, original_filename='sunset-sunset.jpg', mime_type='image/jpeg', file_type='image')
+        self.assertEqual(self.titles('sunset'), ['sunset-sunset.jpg', 'sunset-beach-holiday-family-trip.jpg'])
+
+    def test_last_word_is_a_prefix(self):
+        create_media(self.alice, original_filename='holidays.mp4')
+        self.assertEqual(self.titles('holi'), ['holidays.mp4'])
+
+    def test_keyset_cursor_walks_all_results_once(self):
+        for index in range(5):
+            create_media(self.alice, original_filename=f'report-{index}.mp4')
+        seen, cursor = [], None
+        while True:
+            page = search.search('report', cursor=cursor, limit=2)
+            seen += [row['title'] for row in page['results']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(sorted(seen), [f'report-{index}.mp4' for index in range(5)])
+
+    def test_invalid_cursor_is_rejected(self):
+        with self.assertRaises(ValueError):
+            search.search('report', cursor='not-a-cursor')
+
+    def test_facets_count_all_matches_and_filters_apply(self):
+        create_media(self.alice, original_filename='trip.mp4')
+        create_media(self.alice, original_filename='trip.jpg', mime_type='image/jpeg', file_type='image')
+        HttpUrl.objects.create(url='https://example.com/trip', title='Trip notes', tags=['Travel'], created_by=self.alice)
+        result = search.search('trip', limit=1)
+        self.assertEqual(result['facets']['file_type'], {'video': 1, 'image': 1})
+        self.assertEqual(result['facets']['tags'], {'travel': 1})
+        self.assertEqual(self.titles('trip', filters={'file_type': 'image'}), ['trip.jpg'])
+        self.assertEqual(self.titles('trip', filters={'tag': 'TRAVEL'}), ['Trip notes'])
+
+    def test_owner_scoping(self):
+        create_media(self.alice, original_filename='alice-trip.mp4')
+        create_media(self.bob, original_filename='bob-trip.mp4')
+        self.assertEqual(self.titles('trip', owner_id=self.alice.pk), ['alice-trip.mp4'])
+        self.assertEqual(len(self.titles('trip')), 2)
+
+    def test_triggers_follow_update_and_delete(self):
+        media = create_media(self.alice, original_filename='draft.mp4')
+        media.original_filename = 'final.mp4'
+        media.save()
+        self.assertEqual(self.titles('draft'), [])
+        self.assertEqual(self.titles('final'), ['final.mp4'])
+        media.delete()
+        self.assertEqual(self.titles('final'), [])
+
+    def test_rebuild_indexes_in_chunks_and_drops_orphans(self):
+        for index in range(3):
+            create_media(self.alice, original_filename=f'bulk-{index}.mp4')
+        SearchDocument.objects.all().delete()
+        SearchDocument.objects.create(object_type='media', object_id='00000000-0000-0000-0000-000000000000',
+                                      title='orphan', document='orphan')
+        progress = mock.Mock()
+        self.assertEqual(search.rebuild_search_index(batch_size=2, progress=progress), 3)
+        progress.assert_called_once_with(2)
+        self.assertEqual(len(self.titles('bulk')), 3)
+        self.assertEqual(self.titles('orphan'), [])
+
+
+# ============ ADMISSION DES UPLOADS ============
+
+class MemoryTokenBucketTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch('media.services.admission.time.monotonic', return_value=1000.0)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_refill(self):
+        bucket = MemoryTokenBucket()
+        self.assertEqual([bucket.consume('ip:1', 1, 2)[0] for _ in range(3)], [True, True, False])
+        self.assertEqual(bucket.consume('ip:1', 1, 2), (False, 1.0))
+        self.clock.return_value += 1
+        self.assertTrue(bucket.consume('ip:1', 1, 2)[0])
+
+    def test_refilled_buckets_are_evicted(self):
+        bucket = MemoryTokenBucket()
+        bucket.consume('ip:1', 1, 2)
+        bucket.consume('ip:2', 1, 2)
+        self.clock.return_value += 2
+        bucket.consume('ip:3', 1, 2)
+        self.assertEqual(len(bucket), 1)
+
+    def test_least_recently_used_bucket_is_evicted_beyond_max_keys(self):
+        bucket = MemoryTokenBucket(max_keys=2)
+        bucket.consume('ip:1', 1, 1)
+        bucket.consume('ip:2', 1, 1)
+        bucket.consume('ip:1', 1, 1)
+        bucket.consume('ip:3', 1, 1)
+        self.assertEqual(len(bucket), 2)
+        # ip:1 (utilisé récemment) reste vide, ip:2 évincé repart plein
+        self.assertFalse(bucket.consume('ip:1', 1, 1)[0])
+        self.assertTrue(bucket.consume('ip:2', 1, 1)[0])
+
+
+# ============ COMPTEURS ============
+
+@override_settings(MEDIA_COUNTER_FLUSH_INTERVAL=0, REDIS_URL='')
+class CounterTests(TestCase):
+
+    def setUp(self):
+        self.first = create_media(create_user())
+        self.second = create_media(self.first.uploader)
+
+    def counts(self, media):
+        return tuple(MediaCounter.objects.filter(media=media).values_list('view_count', 'download_count').get())
+
+    def test_upsert_inserts_then_adds(self):
+        self.assertEqual(write_counts({(str(self.first.pk), 'view'): 3, (str(self.second.pk), 'download'): 1}, 1), 2)
+        self.assertEqual(write_counts({(str(self.first.pk), 'view'): 2, (str(self.first.pk), 'download'): 4}, 10), 1)
+        self.assertEqual(self.counts(self.first), (5, 4))
+        self.assertEqual(self.counts(self.second), (0, 1))
+
+    def test_deleted_media_are_ignored(self):
+        self.assertEqual(write_counts({(str(uuid.uuid4()), 'view'): 1, (str(self.first.pk), 'view'): 1}, 10), 1)
+        self.assertEqual(MediaCounter.objects.count(), 1)
+
+    def test_flush_writes_pending_and_restores_on_failure(self):
+        service = CounterService()
+        service.record(self.first.pk, 'view')
+        service.record(self.first.pk, 'view')
+        with mock.patch('media.services.counters.write_counts', side_effect=RuntimeError('base indisponible')):
+            self.assertEqual(service.flush(), 0)
+        self.assertEqual(service.pending(self.first.pk), {'view': 2, 'download': 0})
+        self.assertEqual(service.flush(), 1)
+        self.assertEqual(self.counts(self.first), (2, 0))
+        self.assertEqual(service.pending(self.first.pk), {'view': 0, 'download': 0})
+
+
+# ============ STOCKAGE LOCAL ADRESSÉ PAR CONTENU ============
+
+class LocalStorageTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = LocalStorage(root=directory.name, base_url='/files/')
+
+    def save(self, data, name='a.bin'):
+        return self.storage.save(io.BytesIO(data), file_name=name)['fileId']
+
+    def test_identical_content_is_stored_once(self):
+        first, second = self.save(b'same'), self.save(b'same', 'b.bin')
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.storage.path(first), self.storage.path(second))
+        self.assertEqual(len(os.listdir(self.storage.refs_dir(LocalStorage.split_id(first)[0]))), 2)
+        self.assertEqual(self.storage.read(second, ''), b'same')
+
+    def test_content_is_removed_with_its_last_reference(self):
+        first, second = self.save(b'same'), self.save(b'same')
+        blob = self.storage.path(first)
+        self.assertEqual(self.storage.delete([first]), 1)
+        self.assertIsNone(self.storage.path(first))
+        self.assertTrue(os.path.exists(blob))
+        self.assertEqual(self.storage.delete([second, second, 'not-an-id']), 1)
+        self.assertFalse(os.path.exists(blob))
+        self.assertFalse(os.path.exists(self.storage.refs_dir(LocalStorage.split_id(first)[0])))
+
+    def test_saving_again_after_full_deletion(self):
+        file_id = self.save(b'again')
+        self.storage.delete([file_id])
+        self.assertEqual(self.storage.read(self.save(b'again'), ''), b'again')
+
+
+# ============ WEBHOOKS ============
+
+@override_settings(WEBHOOK_MAX_ATTEMPTS=3, WEBHOOK_RETRY_BASE_DELAY=10, WEBHOOK_RETRY_MAX_DELAY=15)
+class WebhookRetryTests(TestCase):
+
+    def setUp(self):
+        self.event = WebhookEvent.objects.create(source='test', event_id='evt-1', event_type='boom', payload={})
+        self.handler = mock.Mock(side_effect=RuntimeError('indisponible'))
+        patcher = mock.patch.dict(webhooks.EVENT_HANDLERS, {('test', 'boom'): self.handler})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_due(self):
+        WebhookEvent.objects.filter(pk=self.event.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+    def test_failed_event_is_retried_with_capped_backoff(self):
+        before = timezone.now()
+        webhooks.process_pending(10)
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.status, self.event.attempts, self.event.last_error), ('pending', 1, 'indisponible'))
+        self.assertAlmostEqual((self.event.next_attempt_at - before).total_seconds(), 10, delta=1)
+
+        # Pas encore dû: non repris
+        self.assertEqual(webhooks.process_pending(10), [])
+        self.make_due()
+        before = timezone.now()
+        webhooks.process_pending(10)
+        self.event.refresh_from_db()
+        self.assertAlmostEqual((self.event.next_attempt_at - before).total_seconds(), 15, delta=1)
+
+        self.make_due()
+        webhooks.process_pending(10)
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.status, self.event.attempts, self.event.next_attempt_at), ('failed', 3, None))
+        self.assertEqual(self.handler.call_count, 3)
+
+    def test_replay_clears_the_delay(self):
+        webhooks.process_pending(10)
+        self.assertEqual(webhooks.replay_events(WebhookEvent.objects.filter(pk=self.event.pk)), 1)
+        self.handler.side_effect = None
+        webhooks.process_pending(10)
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.status, self.event.attempts, self.event.last_error), ('processed', 1, ''))
+
+    def test_transition_skips_jobs_in_a_later_state(self):
+        media = create_media(create_user())
+        done = MediaJob.objects.create(media=media, job_type='conversion', status='completed')
+        running = MediaJob.objects.create(media=media, job_type='metadata', status='processing')
+        jobs = MediaJob.objects.filter(pk__in=[done.pk, running.pk])
+        self.assertEqual(webhooks.transition_job(jobs, 'failed', error_message='x'), 1)
+        self.assertEqual(MediaJob.objects.get(pk=done.pk).status, 'completed')
+        self.assertEqual(MediaJob.objects.get(pk=running.pk).status, 'failed')
+
+
+# ============ UPLOAD DIRECT ============
+
+class DirectUploadCompleteTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        patcher = mock.patch('media.services.direct_upload.ImageKitUploadService')
+        self.service = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.service.get_upload_credentials.side_effect = lambda token, expire: {'token': token, 'expire': expire}
+        self.service.get_file_details.side_effect = self.file_details
+        self.files = {}
+
+    def file_details(self, file_id):
+        if file_id not in self.files:
+            raise LookupError(file_id)
+        return self.files[file_id]
+
+    def upload(self, file_id, user=None, folder=None):
+        self.files[file_id] = {
+            'fileId': file_id, 'name': f'{file_id}.jpg', 'size': 2048, 'mime': 'image/jpeg',
+            'url': f'https://ik.example.com/{file_id}.jpg',
+            'filePath': f"{folder or f'/uploads/{(user or self.user).pk}'}/{file_id}.jpg",
+            'createdAt': timezone.now().isoformat(),
+        }
+
+    def complete(self, file_id, credentials, **overrides):
+        data = {'fileId': file_id, 'token': credentials['token'], 'expire': credentials['expire']}
+        data.update(overrides)
+        return self.client.post('/api/files/upload/complete/', data, format='json')
+
+    def test_complete_registers_media_once(self):
+        credentials = issue_credentials(self.user)
+        self.upload('ik-1')
+        response = self.complete('ik-1', credentials)
+        self.assertEqual(response.status_code, 201)
+        media = Media.objects.get(imagekit_file_id='ik-1')
+        self.assertEqual((media.uploader_id, media.file_size, media.file_type), (self.user.pk, 2048, 'image'))
+        self.assertTrue(MediaJob.objects.filter(media=media).exists())
+
+        self.assertEqual(self.complete('ik-1', credentials).status_code, 200)
+        self.assertEqual(Media.objects.filter(imagekit_file_id='ik-1').count(), 1)
+
+    def test_token_is_single_use(self):
+        credentials = issue_credentials(self.user)
+        self.upload('ik-1')
+        self.upload('ik-2')
+        self.complete('ik-1', credentials)
+        response = self.complete('ik-2', credentials)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json(), {'error': 'Upload token already used'})
+
+    def test_tampered_expiry_is_rejected(self):
+        credentials = issue_credentials(self.user)
+        self.upload('ik-1')
+        self.assertEqual(self.complete('ik-1', credentials, expire=credentials['expire'] + 3600).status_code, 403)
+
+    def test_file_outside_user_folder_is_rejected(self):
+        credentials = issue_credentials(self.user)
+        self.upload('ik-1', folder='/uploads/someone-else')
+        self.assertEqual(self.complete('ik-1', credentials).status_code, 403)
+        self.assertFalse(Media.objects.exists())
+
+    def test_unknown_file(self):
+        self.assertEqual(self.complete('ik-missing', issue_credentials(self.user)).status_code, 404)
+
+    def test_file_registered_by_another_user(self):
+        create_media(create_user('bob'), imagekit_file_id='ik-1')
+        self.upload('ik-1')
+        self.assertEqual(self.complete('ik-1', issue_credentials(self.user)).status_code, 409)
+
+
+# ============ RÉTENTION DES JOBS ============
+
+class JobRetentionTests(TestCase):
+
+    def setUp(self):
+        self.media = create_media(create_user())
+        self.old = timezone.now() - timedelta(days=40)
+
+    def job(self, status, completed_at=None, created_at=None, **fields):
+        job = MediaJob.objects.create(media=self.media, job_type='metadata', status=status, completed_at=completed_at, **fields)
+        if created_at:
+            MediaJob.objects.filter(pk=job.pk).update(created_at=created_at)
+        return job
+
+    def test_only_old_finished_jobs_are_archived(self):
+        completed = self.job('completed', self.old, result_data={'duration': 3})
+        failed_without_date = self.job('failed', created_at=self.old)
+        recent = self.job('completed', timezone.now())
+        pending = self.job('pending', created_at=self.old)
+        progress = mock.Mock()
+
+        self.assertEqual(archive_jobs(30, batch_size=1, progress=progress), 2)
+        self.assertEqual([call.args[0] for call in progress.call_args_list], [1, 2])
+        self.assertEqual(set(MediaJob.objects.values_list('pk', flat=True)), {recent.pk, pending.pk})
+        archived = ArchivedMediaJob.objects.get(pk=completed.pk)
+        self.assertEqual((archived.status, archived.result_data), ('completed', {'duration': 3}))
+        self.assertTrue(ArchivedMediaJob.objects.filter(pk=failed_without_date.pk).exists())
+
+    def test_dependencies_and_checkpoints_go_with_the_job(self):
+        finished = self.job('completed', self.old)
+        successor = self.job('completed', timezone.now())
+        successor.depends_on.add(finished)
+        TranscriptionSegment.objects.create(job=finished, index=0, start_s=0, end_s=10, pieces=[])
+
+        self.assertEqual(archive_jobs(30), 1)
+        self.assertFalse(successor.depends_on.exists())
+        self.assertFalse(TranscriptionSegment.objects.exists())
+
+    def test_max_batches_bounds_one_run(self):
+        for _ in range(3):
+            self.job('completed', self.old)
+        self.assertEqual(archive_jobs(30, batch_size=1, max_batches=2), 2)
+        self.assertEqual(MediaJob.objects.count(), 1)
+
+    def test_purge_archive(self):
+        self.job('completed', self.old)
+        archive_jobs(30)
+        self.assertEqual(purge_archive(10), 0)
+        ArchivedMediaJob.objects.update(archived_at=self.old)
+        self.assertEqual(purge_archive(10, batch_size=1), 1)
+        self.assertFalse(ArchivedMediaJob.objects.exists())
+
+
+# ============ PIPELINES ============
+
+DIAMOND = {'video': {'metadata': [], 'thumbnail': ['metadata'], 'conversion': ['metadata'],
+                     'transcription': ['thumbnail', 'conversion']}}
+
+
+@override_settings(MEDIA_JOB_PIPELINES=DIAMOND)
+class PipelineTests(TestCase):
+
+    def setUp(self):
+        self.jobs = {job.job_type: job for job in create_pipeline(create_media(create_user()))}
+
+    def statuses(self):
+        return dict(MediaJob.objects.values_list('job_type', 'status'))
+
+    def job(self, job_type):
+        return MediaJob.objects.get(pk=self.jobs[job_type].pk)
+
+    def test_only_roots_start_pending(self):
+        self.assertEqual(self.statuses(), {'metadata': 'pending', 'thumbnail': 'blocked',
+                                           'conversion': 'blocked', 'transcription': 'blocked'})
+        self.assertEqual(self.job('transcription').depends_on.count(), 2)
+
+    def test_successor_waits_for_all_dependencies(self):
+        self.assertEqual(set(complete_job(self.job('metadata'))), {self.jobs['thumbnail'].pk, self.jobs['conversion'].pk})
+        self.assertEqual(complete_job(self.job('thumbnail')), [])
+        self.assertEqual(self.job('transcription').status, 'blocked')
+        self.assertEqual(complete_job(self.job('conversion')), [self.jobs['transcription'].pk])
+        self.assertEqual(self.job('transcription').status, 'pending')
+
+    def test_failure_cancels_successors_transitively(self):
+        fail_job(self.job('metadata'), 'boom', status='dead')
+        self.assertEqual(self.statuses(), {'metadata': 'dead', 'thumbnail': 'cancelled',
+                                           'conversion': 'cancelled', 'transcription': 'cancelled'})
+        self.assertEqual(requeue_dead_jobs([self.jobs['metadata'].pk]), 1)
+        self.assertEqual(self.statuses(), {'metadata': 'pending', 'thumbnail': 'blocked',
+                                           'conversion': 'blocked', 'transcription': 'blocked'})
+
+    def test_requeue_keeps_successor_with_another_broken_dependency(self):
+        complete_job(self.job('metadata'))
+        fail_job(self.job('thumbnail'), 'boom', status='dead')
+        fail_job(self.job('conversion'), 'boom', status='dead')
+        requeue_dead_jobs([self.jobs['thumbnail'].pk])
+        self.assertEqual(self.job('transcription').status, 'cancelled')
+        requeue_dead_jobs([self.jobs['conversion'].pk])
+        self.assertEqual(self.job('transcription').status, 'blocked')
+
+    @override_settings(MEDIA_JOB_PIPELINES={'image': {'thumbnail': ['metadata']}})
+    def test_unknown_dependency_is_rejected(self):
+        with self.assertRaises(ValueError):
+            get_pipeline('image')
+        self.assertEqual(get_pipeline('document'), {})
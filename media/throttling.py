@@ -0,0 +1,106 @@
+"""
+Throttles DRF pour les endpoints d'upload.
+
+Avec InFlightLimitMixin, les rejets sont décidés au début d'APIView.initial(), avant
+perform_authentication: le contrôle CSRF de SessionAuthentication lit request.POST,
+c'est-à-dire tout le corps multipart. Une requête refusée ne coûte ni bande passante ni worker.
+Chaque bucket n'est consommé qu'une fois par requête: les throttles sont repassés après
+l'authentification pour les utilisateurs inconnus avant (authentification Basic).
+DRF renvoie 429 avec l'en-tête Retry-After à partir de wait().
+"""
+import math
+
+from django.conf import settings
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+from media.services.admission import get_admission_controller, stats
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle token bucket générique: sous-classer et définir scope / get_ident_key()"""
+
+    scope = None
+    rate_setting = None
+    burst_setting = None
+
+    def get_ident_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        key = self.get_ident_key(request)
+        if key is None:
+            return True
+        bucket = f"{self.scope}:{key}"
+        consumed = getattr(request, '_admission_buckets', None)
+        if consumed is None:
+            consumed = request._admission_buckets = set()
+        if bucket in consumed:
+            return True
+        allowed, self._wait = get_admission_controller().consume(
+            bucket,
+            getattr(settings, self.rate_setting),
+            getattr(settings, self.burst_setting),
+        )
+        if not allowed:
+            stats.incr(f"rejected_{self.scope}")
+            return False
+        consumed.add(bucket)
+        return True
+
+    def wait(self):
+        return math.ceil(self._wait)
+
+
+class UploadUserRateThrottle(TokenBucketThrottle):
+    """Débit d'upload par utilisateur connecté"""
+
+    scope = 'upload_user'
+    rate_setting = 'UPLOAD_USER_RATE'
+    burst_setting = 'UPLOAD_USER_BURST'
+
+    def get_ident_key(self, request):
+        if '_user' in request.__dict__:
+            user = request.user
+        else:
+            # Avant perform_authentication: utilisateur de session (AuthenticationMiddleware), sans lire le corps
+            user = getattr(request._request, 'user', None)
+        if user and user.is_authenticated:
+            return str(user.pk)
+        return None
+
+
+class UploadIPRateThrottle(TokenBucketThrottle):
+    """Débit d'upload par adresse IP (utilisateurs connectés ou non)"""
+
+    scope = 'upload_ip'
+    rate_setting = 'UPLOAD_IP_RATE'
+    burst_setting = 'UPLOAD_IP_BURST'
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+
+class InFlightLimitMixin:
+    """
+    Admission avant authentification: throttles puis limite du nombre d'uploads en cours,
+    avant que SessionAuthentication ne lise le corps. La place est rendue dans
+    finalize_response(), qui est appelé même en cas d'exception.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self.check_throttles(request)
+        slot = get_admission_controller().acquire(settings.UPLOAD_MAX_IN_FLIGHT)
+        if slot is None:
+            stats.incr('rejected_in_flight')
+            raise Throttled(wait=1, detail="Too many uploads in progress, retry later.")
+        request._admission_slot = slot
+        stats.incr('admitted')
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        slot = getattr(request, '_admission_slot', None)
+        if slot is not None:
+            request._admission_slot = None
+            get_admission_controller().release(slot)
+        return super().finalize_response(request, response, *args, **kwargs)
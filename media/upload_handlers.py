@@ -0,0 +1,89 @@
+"""
+Gestionnaire d'upload Django qui valide le fichier pendant la réception.
+
+Placé en tête de request.upload_handlers, il voit chaque bloc avant qu'il soit
+mis en mémoire ou sur disque par les gestionnaires suivants:
+- Content-Length au-delà de la limite: refus avant de lire le corps
+- taille: refus dès que le fichier dépasse UPLOAD_MAX_BYTES
+- type: signature (magic bytes) lue dans le premier bloc, refus si non autorisée
+- SHA-256 calculé au fil des blocs (pas de relecture du fichier)
+
+Un refus lève StopUpload(connection_reset=True): Django arrête de lire le corps.
+Le motif est posé sur request.upload_rejection; le résultat des fichiers acceptés
+sur request.upload_checks[nom du champ].
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+
+from media.services.file_types import SNIFF_BYTES, sniff_mime_type
+
+# Marge pour les en-têtes multipart et les autres champs du formulaire
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class ValidatingUploadHandler(FileUploadHandler):
+    """Limite de taille, contrôle du type réel et empreinte SHA-256 pendant l'upload"""
+
+    def __init__(self, request=None, max_bytes=None, allowed_types=None):
+        super().__init__(request)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.UPLOAD_MAX_BYTES
+        self.allowed_types = set(allowed_types if allowed_types is not None else settings.UPLOAD_ALLOWED_MIME_TYPES)
+        if request is not None:
+            request.upload_checks = {}
+            request.upload_rejection = None
+
+    def reject(self, error, status):
+        self.request.upload_rejection = {'error': error, 'status': status}
+        raise StopUpload(connection_reset=True)
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > self.max_bytes + MULTIPART_OVERHEAD:
+            self.request.upload_rejection = {
+                'error': f"File too large. Maximum size: {self.max_bytes} bytes",
+                'status': 413,
+            }
+            # Formulaire vide: le corps n'est pas lu
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.size = 0
+        self.head = b''
+        self.sniffed_type = None
+        self.sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_bytes:
+            self.reject(f"File too large. Maximum size: {self.max_bytes} bytes", 413)
+        if len(self.head) < SNIFF_BYTES:
+            self.head += raw_data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES and not self._type_allowed():
+                self.reject(f"File type not allowed: {self.sniffed_type or 'unknown'}", 415)
+        self.sha256.update(raw_data)
+        return raw_data
+
+    def _type_allowed(self):
+        self.sniffed_type = sniff_mime_type(self.head)
+        return self.sniffed_type in self.allowed_types
+
+    def file_complete(self, file_size):
+        # Fichier plus court que SNIFF_BYTES: signature vérifiée à la fin.
+        # Le corps est déjà lu, on ne coupe plus la connexion: le refus est signalé à la vue
+        if 0 < self.size < SNIFF_BYTES and not self._type_allowed():
+            self.request.upload_rejection = {
+                'error': f"File type not allowed: {self.sniffed_type or 'unknown'}",
+                'status': 415,
+            }
+        self.request.upload_checks[self.field_name] = {
+            'size': self.size,
+            'mime_type': self.sniffed_type,
+            'sha256': self.sha256.hexdigest(),
+        }
+        # Le fichier lui-même est produit par les gestionnaires suivants (mémoire / disque)
+        return None
@@ -2,11 +2,73 @@
 URLs pour l'app media.
 """
 from django.urls import path
-from media.views import UploadFileView
+from media.views import (
+    UploadFileView,
+    AccountDeletionView,
+    DirectUploadCompleteView,
+    DirectUploadTokenView,
+    AdmissionStatsView,
+    ExportView,
+    HttpUrlBulkTagView,
+    HttpUrlListView,
+    HttpUrlTagsView,
+    JobEventStatsView,
+    JobEventsView,
+    LocalFileView,
+    MediaContentView,
+    MediaDetailView,
+    MediaDuplicatesView,
+    MediaFileView,
+    MediaListView,
+    MediaStatsView,
+    MediaTopView,
+    SearchView,
+    WebhookView,
+)
 
 urlpatterns = [
     # Upload vers ImageKit - Juste file + fileName
     # Utilise l'API v2 ImageKit avec Basic Auth (base64)
 
     path('files/upload/', UploadFileView.as_view(), name='upload'),
+    # Upload direct navigateur -> ImageKit: identifiants signés puis finalisation
+    path('files/upload/token/', DirectUploadTokenView.as_view(), name='upload-token'),
+    path('files/upload/complete/', DirectUploadCompleteView.as_view(), name='upload-complete'),
+    path('files/upload/admission/', AdmissionStatsView.as_view(), name='upload-admission'),
+    # Fichiers du stockage local (MEDIA_STORAGE_BACKEND = 'local')
+    path('files/<str:file_id>/<str:name>', LocalFileView.as_view(), name='local-file'),
+
+    # Médias de l'utilisateur (galerie avec renditions pré-dimensionnées)
+    path('media/', MediaListView.as_view(), name='media-list'),
+    path('media/<uuid:pk>/', MediaDetailView.as_view(), name='media-detail'),
+    path('media/<uuid:pk>/duplicates/', MediaDuplicatesView.as_view(), name='media-duplicates'),
+    # Compteurs de vues / téléchargements (écriture différée) et classement
+    path('media/<uuid:pk>/stats/', MediaStatsView.as_view(), name='media-stats'),
+    path('media/top/', MediaTopView.as_view(), name='media-top'),
+
+    # Suppression du compte: désactivation immédiate, purge des données en arrière-plan
+    path('account/', AccountDeletionView.as_view(), name='account-delete'),
+
+    # URLs suivies: filtres par tags / métadonnées, comptes par tag, tags en masse
+    path('urls/', HttpUrlListView.as_view(), name='url-list'),
+    path('urls/tags/', HttpUrlTagsView.as_view(), name='url-tags'),
+    path('urls/tags/bulk/', HttpUrlBulkTagView.as_view(), name='url-tags-bulk'),
+
+    # Recherche plein texte et facettes (médias + URLs)
+    path('search/', SearchView.as_view(), name='search'),
+
+    # Contenu d'un média: redirection vers la variante la plus légère acceptée (Accept)
+    path('media/<uuid:pk>/content/', MediaContentView.as_view(), name='media-content'),
+    # Fichier original avec requêtes partielles (Range / If-Range), sendfile ou X-Accel-Redirect
+    path('media/<uuid:pk>/file/', MediaFileView.as_view(), name='media-file'),
+
+    # Progression des jobs en Server-Sent Events (ASGI)
+    path('jobs/events/', JobEventsView.as_view(), name='job-events'),
+    path('jobs/events/stats/', JobEventStatsView.as_view(), name='job-events-stats'),
+
+    # Webhooks signés (ImageKit, transcodeur): enregistrement brut, traitement asynchrone
+    path('webhooks/<str:source>/', WebhookView.as_view(), name='webhook'),
+
+    # Export en flux (CSV / JSONL, gzip optionnel) - réservé aux admins
+    path('export/<str:dataset>/', ExportView.as_view(), name='export'),
 ]
@@ -1,25 +1,76 @@
+import json
 import logging
+import mimetypes
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import logout
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.views import View
+from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework import status
-from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample
-from drf_spectacular.types import OpenApiTypes
+from core.schema import extend_schema, OpenApiParameter, OpenApiExample, OpenApiTypes
 
-from media.services.imagekit_service import ImageKitUploadService
+from media.models import HttpUrl, Media, MediaJob
+from media.services.negotiation import IgnoreAcceptNegotiation, pick_smallest
+from media.jobs.pipelines import create_pipeline
+from media.services.storage import get_storage
+from media.services.storage_usage import quota_exceeded
+from media.services.direct_upload import DirectUploadError, complete_upload, issue_credentials
+from media.services.deletion import request_media_deletion, request_user_deletion
+from media.throttling import InFlightLimitMixin, UploadIPRateThrottle, UploadUserRateThrottle
+from media.upload_handlers import ValidatingUploadHandler
+from media.serializers import (
+    BulkTagSerializer,
+    DirectUploadCompleteSerializer,
+    HttpUrlSerializer,
+    MediaSerializer,
+)
+from media.services.admission import stats as admission_stats
+from media.services.duplicates import DEFAULT_MAX_DISTANCE, find_similar
+from media.services.hash_index import HASH_KINDS
+from media.webhooks.ingest import WebhookError, record_event
+from media.services import search as search_service
+from media.services import url_tags
+from media.services import job_events
+from media.services import http_cache
+from media.services import counters
+from media.services import delivery
+from media.services.export_service import (
+    DATASETS,
+    EXPORT_FORMATS,
+    batch_stream,
+    gzip_stream,
+    iter_export,
+)
 
 logger = logging.getLogger(__name__)
 
 
 # ============ FILE UPLOAD ENDPOINTS ============
 
-class UploadFileView(APIView):
+class UploadFileView(InFlightLimitMixin, APIView):
     """
-    Vue pour uploader un fichier vers ImageKit.
+    Vue pour uploader un fichier vers le backend de stockage (ImageKit par défaut).
     """
     
     parser_classes = (MultiPartParser,)
+    throttle_classes = (UploadUserRateThrottle, UploadIPRateThrottle)
+
+    def initial(self, request, *args, **kwargs):
+        # Avant l'authentification: le contrôle CSRF de SessionAuthentication peut lire le corps
+        request._request.upload_handlers.insert(0, ValidatingUploadHandler(request._request))
+        super().initial(request, *args, **kwargs)
     
     @extend_schema(
         summary="Upload file to ImageKit.io",
@@ -33,10 +84,14 @@ class UploadFileView(APIView):
         **Instructions pour Swagger UI:**
         1. Cliquez sur "Try it out"
         2. Cliquez sur "Choose File" dans le champ "file"
-        3. Sélectionnez votre fichier (max 10MB)
+        3. Sélectionnez votre fichier (max UPLOAD_MAX_BYTES, 10MB par défaut)
         4. Cliquez sur "Execute"
         
         Le fichier sera uploadé vers ImageKit (via l'API interne) et vous recevrez l'URL publique.
+
+        **Validation pendant la réception:** la taille est contrôlée au fil des octets (413 dès le
+        dépassement, sans attendre la fin de l'envoi) et le type réel est lu dans la signature du
+        fichier (415 si non autorisé). L'empreinte SHA-256 est renvoyée dans `sha256`.
         
         **Note:** L'URL ImageKit (`https://upload.imagekit.io/api/v1/files/upload`) est utilisée en interne
         par le service. Vous n'avez pas besoin de l'appeler directement.
@@ -49,7 +104,7 @@ class UploadFileView(APIView):
                     "file": {
                         "type": "string",
                         "format": "binary",
-                        "description": "Fichier à uploader (image, document, etc.) - Max 10MB"
+                        "description": "Fichier à uploader (image, vidéo, audio, PDF) - Max 10MB par défaut"
                     }
                 },
                 "required": ["file"]
@@ -69,7 +124,8 @@ class UploadFileView(APIView):
                             "url": "https://ik.imagekit.io/votre-endpoint/uploads/unique-name-abc123.jpg",
                             "fileType": "image",
                             "height": 400,
-                            "width": 600
+                            "width": 600,
+                            "sha256": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"
                         }
                     }
                 }
@@ -84,6 +140,24 @@ class UploadFileView(APIView):
                     }
                 }
             },
+            413: {
+                "description": "Fichier trop volumineux (connexion interrompue dès le dépassement)",
+                "content": {"application/json": {"example": {"error": "File too large. Maximum size: 10485760 bytes"}}}
+            },
+            415: {
+                "description": "Type de fichier non autorisé (signature du contenu)",
+                "content": {"application/json": {"example": {"error": "File type not allowed: unknown"}}}
+            },
+            429: {
+                "description": "Trop de requêtes (voir l'en-tête Retry-After)",
+                "content": {
+                    "application/json": {
+                        "example": {
+                            "detail": "Request was throttled. Expected available in 2 seconds."
+                        }
+                    }
+                }
+            },
             500: {
                 "description": "Erreur serveur",
                 "content": {
@@ -114,29 +188,49 @@ class UploadFileView(APIView):
     def post(self, request):
         incoming_file = request.FILES.get("file")
         
+        # Refus décidé pendant la réception (ValidatingUploadHandler)
+        rejection = getattr(request._request, 'upload_rejection', None)
+        if rejection:
+            return Response({"error": rejection['error']}, status=rejection['status'])
+        
         if incoming_file is None:
             return Response({"error": "No file uploaded"}, status=400)
         
-        # Valider la taille du fichier (max 10MB)
-        max_size = 10 * 1024 * 1024  # 10MB
-        if incoming_file.size > max_size:
-            return Response({
-                "error": f"File too large. Maximum size: 10MB, got: {incoming_file.size / (1024*1024):.2f}MB"
-            }, status=400)
-        
         # Vérifier que le fichier n'est pas vide
         if incoming_file.size == 0:
             return Response({"error": "File is empty"}, status=400)
         
+        checks = request._request.upload_checks.get("file", {})
+        
+        # Quota: lecture d'une seule ligne StorageUsage (total de l'uploader)
+        user = request.user
+        if user.is_authenticated and quota_exceeded(user.pk, incoming_file.size, settings.MEDIA_QUOTA_BYTES):
+            return Response({"error": "Storage quota exceeded"}, status=403)
+        
         try:
-            imagekit_service = ImageKitUploadService()
-            result = imagekit_service.upload_file(
-                file_obj=incoming_file,
-                file_name=None,  # Utilise le nom du fichier automatiquement
-                unique_name=True,  # Génère un nom unique
+            # Backend MEDIA_STORAGE_BACKEND (ImageKit par défaut, ou disque local)
+            storage = get_storage()
+            result = storage.save(
+                incoming_file,
+                file_name=incoming_file.name,
                 folder='/uploads',
+                content_type=checks.get('mime_type'),
             )
             
+            # Enregistrer le Media pour les utilisateurs connectés (alimente StorageUsage)
+            # et ses jobs de traitement (MEDIA_JOB_PIPELINES), dans la même transaction
+            if user.is_authenticated:
+                with transaction.atomic():
+                    media = Media.create_from_imagekit(
+                        uploader=user,
+                        result=result,
+                        mime_type=checks.get('mime_type') or 'application/octet-stream',
+                        content_sha256=checks.get('sha256', ''),
+                        storage_backend=storage.name,
+                    )
+                    create_pipeline(media)
+            result['sha256'] = checks.get('sha256', '')
+            
             # Retourner le résultat d'ImageKit (déjà au format JSON)
             # La méthode upload_file lève ValueError en cas d'erreur, donc si on arrive ici, c'est un succès
             return Response(result, status=200)
@@ -149,4 +243,846 @@ class UploadFileView(APIView):
             logger.error(f"Upload failed: {exc}", exc_info=True)
             return Response({"error": str(exc)}, status=500)
 
-# Create your views here.
+
+class DirectUploadTokenView(APIView):
+    """
+    Vue pour obtenir des identifiants d'upload direct vers ImageKit.
+    Le fichier ne transite pas par Django.
+    """
+
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = (UploadUserRateThrottle, UploadIPRateThrottle)
+
+    @extend_schema(
+        summary="Direct upload credentials",
+        description="""
+        Renvoie `token`, `expire`, `signature` et `publicKey` à joindre à l'upload envoyé
+        directement à `uploadUrl` (ImageKit), dans le dossier `folder`.
+        Appeler ensuite `POST /api/files/upload/complete/` avec le `fileId` obtenu.
+        Le token est à usage unique.
+        """,
+        tags=["upload"],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def post(self, request):
+        if quota_exceeded(request.user.pk, 0, settings.MEDIA_QUOTA_BYTES):
+            return Response({"error": "Storage quota exceeded"}, status=403)
+        try:
+            return Response(issue_credentials(request.user))
+        except ValueError as e:
+            logger.error(f"ImageKit error: {e}")
+            return Response({"error": str(e)}, status=500)
+
+
+class DirectUploadCompleteView(APIView):
+    """
+    Vue pour enregistrer le Media d'un upload direct vers ImageKit.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        summary="Complete direct upload",
+        description="""
+        Enregistre le média à partir des métadonnées ImageKit du fichier (taille, type, URL).
+        Idempotent: rappeler la finalisation pour le même `fileId` renvoie le même média.
+        """,
+        tags=["upload"],
+        request=DirectUploadCompleteSerializer,
+        responses={201: MediaSerializer, 200: MediaSerializer},
+    )
+    def post(self, request):
+        serializer = DirectUploadCompleteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"error": "Validation failed", "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        data = serializer.validated_data
+        existed = Media.objects.filter(imagekit_file_id=data["fileId"], uploader=request.user).exists()
+        try:
+            media = complete_upload(request.user, data["fileId"], data["token"], data["expire"])
+        except DirectUploadError as e:
+            return Response({"error": str(e)}, status=e.status)
+        except ValueError as e:
+            logger.error(f"ImageKit error: {e}")
+            return Response({"error": str(e)}, status=500)
+        return Response(MediaSerializer(media).data, status=200 if existed else 201)
+
+
+class AdmissionStatsView(APIView):
+    """
+    Vue pour consulter les compteurs d'admission des uploads (processus courant).
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(
+        summary="Upload admission counters",
+        description="Compteurs admis / rejetés du contrôle d'admission des uploads.",
+        tags=["upload"],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def get(self, request):
+        return Response(admission_stats.snapshot())
+
+
+# ============ MEDIA ENDPOINTS ============
+
+RENDITION_PARAMETERS = [
+    OpenApiParameter(
+        "width", OpenApiTypes.INT,
+        description="Largeur d'affichage: renvoie la meilleure rendition <= width pour chaque format",
+    ),
+    OpenApiParameter(
+        "formats", OpenApiTypes.STR,
+        description="Formats de rendition séparés par des virgules (défaut: avif,webp)",
+    ),
+]
+
+
+class MediaRenditionsMixin:
+    """
+    Précharge les renditions demandées (?width=&formats=) en une requête pour toute la page.
+    """
+
+    def get_rendition_options(self):
+        try:
+            width = int(self.request.query_params.get("width", 0))
+        except ValueError:
+            width = 0
+        formats = [f for f in self.request.query_params.get("formats", "avif,webp").split(",") if f]
+        return width, formats
+
+    def get_queryset(self):
+        queryset = Media.objects.alive().filter(uploader=self.request.user)
+        width, formats = self.get_rendition_options()
+        if width > 0:
+            queryset = queryset.with_renditions(width, formats)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        width, formats = self.get_rendition_options()
+        if width > 0:
+            context["rendition_formats"] = formats
+        return context
+
+
+class ConditionalGetMixin:
+    """
+    GET conditionnel (If-None-Match / If-Modified-Since): 304 sans sérialiser la réponse.
+
+    get_version() renvoie (clé de version, last_modified) depuis une requête légère,
+    ou None si l'objet n'existe pas (la vue répond alors normalement, 404).
+    L'ETag combine la version, l'URL complète (pagination, renditions) et le format rendu.
+    `use_last_modified = False`: If-Modified-Since est ignoré (seul l'ETag fait foi).
+    """
+
+    use_last_modified = True
+
+    def get_version(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        version = self.get_version()
+        if version is None:
+            return super().get(request, *args, **kwargs)
+        key, last_modified = version
+        etag = http_cache.make_etag(
+            key, request.user.pk, request.get_full_path(), request.accepted_renderer.format,
+        )
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp if self.use_last_modified else None,
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        # Réponse propre à l'utilisateur, à revalider à chaque usage
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ("Accept", "Authorization", "Cookie"))
+        return response
+
+
+class MediaListView(ConditionalGetMixin, MediaRenditionsMixin, ListAPIView):
+    """
+    Vue pour lister les médias de l'utilisateur connecté (galerie).
+    """
+
+    permission_classes = (IsAuthenticated,)
+    serializer_class = MediaSerializer
+    # MAX(updated_at) ne voit pas les suppressions: seul l'ETag (qui inclut le compte) fait foi
+    use_last_modified = False
+
+    def get_version(self):
+        last_modified, count = http_cache.list_version(Media.objects.alive().filter(uploader=self.request.user))
+        return f"{last_modified}:{count}", last_modified
+
+    @extend_schema(
+        summary="List my media",
+        description="""
+        Liste paginée des médias de l'utilisateur, avec renditions pré-dimensionnées.
+        Renvoie un `ETag` (304 sur `If-None-Match` si aucun média n'a changé).
+        """,
+        tags=["media"],
+        parameters=RENDITION_PARAMETERS,
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class MediaDetailView(ConditionalGetMixin, MediaRenditionsMixin, RetrieveAPIView):
+    """
+    Vue pour consulter un média de l'utilisateur connecté.
+    """
+
+    permission_classes = (IsAuthenticated,)
+    serializer_class = MediaSerializer
+    lookup_field = "pk"
+
+    def get_version(self):
+        updated_at = http_cache.object_version(Media.objects.alive().filter(uploader=self.request.user), self.kwargs["pk"])
+        if updated_at is None:
+            return None
+        return updated_at.isoformat(), updated_at
+
+    @extend_schema(
+        summary="Media detail",
+        description="Renvoie `ETag` et `Last-Modified` (304 sur `If-None-Match` / `If-Modified-Since`).",
+        tags=["media"],
+        parameters=RENDITION_PARAMETERS,
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    @extend_schema(
+        summary="Delete media",
+        description="""
+        Masque le média immédiatement et planifie sa suppression (jobs, URLs, fichiers ImageKit)
+        en arrière-plan. Répond 202 avec l'identifiant de la demande de suppression.
+        """,
+        tags=["media"],
+        responses={202: OpenApiTypes.OBJECT, 404: None},
+    )
+    def delete(self, request, pk):
+        media = get_object_or_404(Media.objects.alive().filter(uploader=request.user), pk=pk)
+        deletion = request_media_deletion(media, requested_by=request.user)
+        return Response({"deletion": str(deletion.pk), "status": deletion.status}, status=202)
+
+
+class AccountDeletionView(APIView):
+    """
+    Vue pour supprimer son compte: désactivation immédiate, purge des données en arrière-plan.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        summary="Delete my account",
+        description="""
+        Désactive le compte (la session est fermée) et planifie la suppression de tous ses médias,
+        jobs, URLs et fichiers ImageKit. La durée de la requête ne dépend pas du volume de données.
+        """,
+        tags=["account"],
+        responses={202: OpenApiTypes.OBJECT},
+    )
+    def delete(self, request):
+        deletion = request_user_deletion(request.user, requested_by=request.user)
+        logout(request._request)
+        return Response({"deletion": str(deletion.pk), "status": deletion.status}, status=202)
+
+
+class MediaDuplicatesView(APIView):
+    """
+    Vue pour trouver les quasi-doublons d'un média (empreintes perceptuelles).
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        summary="Near-duplicate media",
+        description="Médias dont l'empreinte est à distance de Hamming <= distance (index en mémoire).",
+        tags=["media"],
+        parameters=[
+            OpenApiParameter("distance", OpenApiTypes.INT, default=DEFAULT_MAX_DISTANCE),
+            OpenApiParameter("kind", OpenApiTypes.STR, enum=list(HASH_KINDS), default="phash"),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def get(self, request, pk):
+        visible = Media.objects.alive() if request.user.is_staff else Media.objects.alive().filter(uploader=request.user)
+        media = get_object_or_404(visible, pk=pk)
+
+        kind = request.query_params.get("kind", "phash")
+        if kind not in HASH_KINDS:
+            return Response({"error": f"Unknown hash kind: {kind}"}, status=400)
+        try:
+            distance = min(int(request.query_params.get("distance", DEFAULT_MAX_DISTANCE)), 32)
+        except ValueError:
+            return Response({"error": "distance must be an integer"}, status=400)
+
+        matches = dict(find_similar(media.pk, kind, distance))
+        rows = visible.filter(pk__in=list(matches)).values("uuid", "original_filename", "file_size")
+        results = sorted(
+            ({**row, "distance": matches[row["uuid"]]} for row in rows),
+            key=lambda row: row["distance"],
+        )
+        return Response({"media": str(media.pk), "kind": kind, "distance": distance, "results": results})
+
+
+class MediaStatsView(APIView):
+    """
+    Vue pour consulter les compteurs de vues / téléchargements d'un média.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        summary="Media view / download counts",
+        description="""
+        Compteurs approximatifs en temps réel: valeur en base plus les incréments pas encore écrits
+        (écriture par lots toutes les MEDIA_COUNTER_FLUSH_INTERVAL secondes).
+        """,
+        tags=["media"],
+        responses={200: OpenApiTypes.OBJECT, 404: None},
+    )
+    def get(self, request, pk):
+        visible = Media.objects.alive() if request.user.is_staff else Media.objects.alive().filter(uploader=request.user)
+        media = get_object_or_404(visible.only("pk"), pk=pk)
+        return Response({"media": str(media.pk), **counters.get_counts(media.pk)})
+
+
+class MediaTopView(APIView):
+    """
+    Vue pour lister les médias les plus vus / téléchargés de l'utilisateur (tous les médias pour un admin).
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        summary="Most viewed / downloaded media",
+        description="Classement par compteurs écrits en base (retard d'au plus un intervalle d'écriture).",
+        tags=["media"],
+        parameters=[
+            OpenApiParameter("by", OpenApiTypes.STR, enum=["view", "download"], default="view"),
+            OpenApiParameter("limit", OpenApiTypes.INT, default=10, description="Au plus 100"),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def get(self, request):
+        kind = request.query_params.get("by", "view")
+        if kind not in counters.KINDS:
+            return Response({"error": f"Unknown counter: {kind}"}, status=400)
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 10)), 100))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=400)
+
+        visible = Media.objects.alive() if request.user.is_staff else Media.objects.alive().filter(uploader=request.user)
+        results = [
+            {
+                "uuid": str(counter.media_id),
+                "original_filename": counter.media.original_filename,
+                "file_type": counter.media.file_type,
+                "views": counter.view_count,
+                "downloads": counter.download_count,
+            }
+            for counter in counters.top_media(kind, limit, visible)
+        ]
+        return Response({"by": kind, "results": results})
+
+
+# ============ URL ENDPOINTS ============
+
+URL_FILTER_PARAMETERS = [
+    OpenApiParameter("tags", OpenApiTypes.STR, description="Tags séparés par des virgules"),
+    OpenApiParameter("match", OpenApiTypes.STR, enum=["any", "all"], default="any"),
+    OpenApiParameter("url_type", OpenApiTypes.STR),
+    OpenApiParameter(
+        "metadata", OpenApiTypes.STR,
+        description="Filtre sur une clé de metadata: `metadata=cle:valeur` (répétable)",
+    ),
+]
+
+
+class HttpUrlQueryMixin:
+    """
+    URLs visibles par l'utilisateur (toutes pour un admin) et filtres communs:
+    ?tags=a,b&match=any|all, ?url_type=, ?metadata=cle:valeur
+    (clé de metadata invalide: ValueError, 400 dans les vues)
+    """
+
+    def get_visible_urls(self):
+        user = self.request.user
+        return HttpUrl.objects.all() if user.is_staff else HttpUrl.objects.filter(created_by=user)
+
+    def filter_urls(self, queryset):
+        params = self.request.query_params
+        tags = [t for t in params.get("tags", "").split(",") if t.strip()]
+        if tags:
+            if params.get("match") == "all":
+                queryset = queryset.tagged_all(tags)
+            else:
+                queryset = queryset.tagged_any(tags)
+        if params.get("url_type"):
+            queryset = queryset.filter(url_type=params["url_type"])
+        for item in params.getlist("metadata"):
+            key, sep, value = item.partition(":")
+            if sep and key:
+                queryset = queryset.with_metadata(key, value)
+        return queryset
+
+
+class HttpUrlListView(HttpUrlQueryMixin, ListAPIView):
+    """
+    Vue pour lister les URLs de l'utilisateur connecté, filtrables par tags et métadonnées.
+    """
+
+    permission_classes = (IsAuthenticated,)
+    serializer_class = HttpUrlSerializer
+
+    def get_queryset(self):
+        return self.filter_urls(self.get_visible_urls())
+
+    def list(self, request, *args, **kwargs):
+        try:
+            return super().list(request, *args, **kwargs)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @extend_schema(
+        summary="List URLs",
+        description="""
+        Liste paginée des URLs. Les filtres par tags passent par la table normalisée
+        HttpUrlTags (index tag, url): `match=any` pour au moins un tag, `match=all` pour tous.
+        """,
+        tags=["urls"],
+        parameters=URL_FILTER_PARAMETERS,
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class HttpUrlTagsView(HttpUrlQueryMixin, APIView):
+    """
+    Vue pour la cardinalité des tags (nombre d'URLs par tag).
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        summary="URL tag counts",
+        description="Nombre d'URLs par tag, décroissant. Accepte les mêmes filtres que la liste.",
+        tags=["urls"],
+        parameters=URL_FILTER_PARAMETERS + [
+            OpenApiParameter("prefix", OpenApiTypes.STR, description="Préfixe de tag (autocomplétion)"),
+            OpenApiParameter("limit", OpenApiTypes.INT, default=100),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get("limit", 100)), 1000)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        # Admin sans filtre: comptes sur toute la table HttpUrlTags (index seul, pas de jointure)
+        has_filters = any(request.query_params.get(p) for p in ("tags", "url_type", "metadata"))
+        try:
+            urls = None if request.user.is_staff and not has_filters else self.filter_urls(self.get_visible_urls())
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        counts = url_tags.tag_counts(urls, prefix=request.query_params.get("prefix", ""), limit=limit)
+        return Response({"tags": counts})
+
+
+class HttpUrlBulkTagView(HttpUrlQueryMixin, APIView):
+    """
+    Vue pour ajouter / retirer des tags sur un ensemble d'URLs.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        summary="Bulk tag / untag URLs",
+        description="""
+        Ajoute (`action=add`) ou retire (`action=remove`) des tags sur les URLs listées (`urls`)
+        ou sur celles portant `filter_tags` (`match=any|all`). Traitement ensembliste par lots.
+        """,
+        tags=["urls"],
+        request=BulkTagSerializer,
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def post(self, request):
+        serializer = BulkTagSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"error": "Validation failed", "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        data = serializer.validated_data
+
+        urls = self.get_visible_urls()
+        if data.get("urls"):
+            urls = urls.filter(uuid__in=data["urls"])
+        if data.get("filter_tags"):
+            if data["match"] == "all":
+                urls = urls.tagged_all(data["filter_tags"])
+            else:
+                urls = urls.tagged_any(data["filter_tags"])
+
+        if data["action"] == "add":
+            count = url_tags.bulk_tag(urls, data["tags"])
+        else:
+            count = url_tags.bulk_untag(urls, data["tags"])
+        return Response({"action": data["action"], "tags": url_tags.normalize_tags(data["tags"]), "urls": count})
+
+
+# ============ SEARCH ENDPOINTS ============
+
+class SearchView(APIView):
+    """
+    Vue de recherche plein texte et à facettes sur les médias et les URLs.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        summary="Full-text search",
+        description="""
+        Recherche classée par pertinence (ts_rank sur PostgreSQL, bm25 sur SQLite) dans
+        les noms de fichiers des médias et les titres / descriptions / tags des URLs.
+
+        La réponse contient les comptes par facette sur l'ensemble des résultats et un
+        `next_cursor` à repasser en `cursor` pour la page suivante.
+        Les utilisateurs non admin ne voient que leurs propres objets.
+        """,
+        tags=["search"],
+        parameters=[
+            OpenApiParameter("q", OpenApiTypes.STR, required=True, description="Texte recherché"),
+            OpenApiParameter("object_type", OpenApiTypes.STR, enum=["media", "url"]),
+            OpenApiParameter("file_type", OpenApiTypes.STR),
+            OpenApiParameter("mime_type", OpenApiTypes.STR),
+            OpenApiParameter("url_type", OpenApiTypes.STR),
+            OpenApiParameter("tag", OpenApiTypes.STR),
+            OpenApiParameter("cursor", OpenApiTypes.STR),
+            OpenApiParameter("limit", OpenApiTypes.INT, default=20),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def get(self, request):
+        params = request.query_params
+        if not params.get("q", "").strip():
+            return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(params.get("limit", 20))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        filters = {
+            field: params[field]
+            for field in ("object_type", "file_type", "mime_type", "url_type", "tag")
+            if params.get(field)
+        }
+        try:
+            result = search_service.search(
+                params["q"],
+                owner_id=None if request.user.is_staff else request.user.pk,
+                filters=filters,
+                cursor=params.get("cursor"),
+                limit=limit,
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+
+# ============ DELIVERY ENDPOINTS ============
+
+class MediaContentView(APIView):
+    """
+    Vue pour accéder au contenu d'un média: redirige vers la variante la plus légère
+    (original ou rendition AVIF / WebP) acceptée par le client.
+    Médias de l'utilisateur connecté (tous pour un admin).
+    """
+
+    permission_classes = (IsAuthenticated,)
+    content_negotiation_class = IgnoreAcceptNegotiation
+
+    @extend_schema(
+        summary="Media content (format negotiation)",
+        description="""
+        Redirige (302) vers l'URL de la variante la plus légère selon l'en-tête `Accept`.
+        La réponse varie selon `Accept`.
+        """,
+        tags=["media"],
+        parameters=[
+            OpenApiParameter("width", OpenApiTypes.INT, description="Largeur maximale de la variante"),
+        ],
+        responses={302: None, 404: None},
+    )
+    def get(self, request, pk):
+        visible = Media.objects.alive() if request.user.is_staff else Media.objects.alive().filter(uploader=request.user)
+        media = get_object_or_404(visible, pk=pk)
+        renditions = media.renditions.variants()
+        try:
+            width = int(request.query_params.get('width', 0))
+        except ValueError:
+            width = 0
+        if width > 0:
+            renditions = renditions.filter(width__lte=width)
+        best = pick_smallest(media, renditions, request.headers.get('Accept'))
+        url = best.imagekit_url if best is media else best.url
+        counters.record(media.pk, 'view')
+
+        response = HttpResponseRedirect(url)
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+
+class MediaFileView(APIView):
+    """
+    Vue pour lire le fichier original d'un média, avec requêtes partielles (lecture vidéo, reprise).
+    Médias de l'utilisateur connecté (tous pour un admin): réponse privée, non partagée par les caches.
+    """
+
+    permission_classes = (IsAuthenticated,)
+    content_negotiation_class = IgnoreAcceptNegotiation
+
+    @extend_schema(
+        summary="Media file (byte ranges)",
+        description="""
+        Fichier original du média. Stockage local: 200 ou 206 selon `Range` / `If-Range`
+        (une seule plage), 304 sur `If-None-Match`, 416 si la plage est hors du fichier;
+        livraison par sendfile ou par le proxy (MEDIA_DELIVERY_MODE).
+        ImageKit: redirection (302) vers l'URL du fichier, qui gère `Range` elle-même.
+        """,
+        tags=["media"],
+        responses={200: OpenApiTypes.BINARY, 206: OpenApiTypes.BINARY, 302: None, 304: None, 404: None, 416: None},
+    )
+    def get(self, request, pk):
+        visible = Media.objects.alive() if request.user.is_staff else Media.objects.alive().filter(uploader=request.user)
+        media = get_object_or_404(
+            visible.only('storage_backend', 'imagekit_file_id', 'imagekit_url', 'mime_type', 'original_filename'),
+            pk=pk,
+        )
+        path = get_storage(media.storage_backend).path(media.imagekit_file_id)
+        if path is None:
+            counters.record(media.pk, 'download')
+            return HttpResponseRedirect(media.imagekit_url)
+        response = delivery.serve_file(
+            request, path, media.mime_type, quote_etag(media.imagekit_file_id), filename=media.original_filename,
+        )
+        # Un téléchargement par lecture depuis le début: les plages suivantes (avance, reprise) ne comptent pas
+        if response.status_code == 200 or response.get('Content-Range', '').startswith('bytes 0-'):
+            counters.record(media.pk, 'download')
+        patch_cache_control(response, private=True, max_age=settings.MEDIA_DELIVERY_MAX_AGE)
+        return response
+
+
+class LocalFileView(View):
+    """
+    Fichiers du stockage local (LOCAL_STORAGE_URL): équivalent des URLs publiques ImageKit.
+    Le contenu d'un fileId ne change jamais: cache immuable.
+    """
+
+    def get(self, request, file_id, name):
+        path = get_storage('local').path(file_id) if 'local' in settings.MEDIA_STORAGE_BACKENDS else None
+        if path is None:
+            raise Http404("Fichier introuvable")
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        response = delivery.serve_file(request, path, content_type, quote_etag(file_id))
+        patch_cache_control(response, public=True, max_age=365 * 24 * 3600, immutable=True)
+        return response
+
+
+# ============ JOB EVENTS (SSE) ============
+
+class JobEventsView(View):
+    """
+    Flux Server-Sent Events des changements d'état des jobs (nécessite un serveur ASGI).
+    ?job=<uuid> et / ou ?media=<uuid>, répétables. Un événement `job` est envoyé à
+    l'ouverture pour l'état courant de chaque job suivi, puis à chaque transition.
+    Authentification par session (les EventSource du navigateur n'envoient pas d'en-têtes).
+    Sous WSGI (gunicorn), le flux sans fin occuperait un worker: la requête est refusée (400),
+    le flux est servi par le service ASGI (config/asgi.py, ASGI_PATHS).
+    """
+
+    @staticmethod
+    def _visible_topics(user, job_ids, media_ids):
+        """Sujets autorisés: jobs et médias demandés appartenant à l'utilisateur (tous pour le staff)"""
+        jobs = MediaJob.objects.all() if user.is_staff else MediaJob.objects.filter(media__uploader=user)
+        media = Media.objects.alive() if user.is_staff else Media.objects.alive().filter(uploader=user)
+        allowed_media = [str(pk) for pk in media.filter(pk__in=media_ids).values_list("pk", flat=True)]
+        allowed_jobs = [str(pk) for pk in jobs.filter(pk__in=job_ids).values_list("pk", flat=True)]
+        return [f"job:{pk}" for pk in allowed_jobs] + [f"media:{pk}" for pk in allowed_media]
+
+    @staticmethod
+    def _snapshot(topics):
+        """État courant des jobs des sujets (lu après l'abonnement: aucune transition perdue entre les deux)"""
+        job_ids = [topic[4:] for topic in topics if topic.startswith("job:")]
+        media_ids = [topic[6:] for topic in topics if topic.startswith("media:")]
+        jobs = MediaJob.objects.filter(pk__in=job_ids) | MediaJob.objects.filter(media_id__in=media_ids)
+        return [job_events.job_snapshot(job) for job in jobs]
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({"error": "Event stream is only served over ASGI"}, status=400)
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({"error": "Authentication required"}, status=401)
+
+        job_ids = set(request.GET.getlist("job"))
+        media_ids = set(request.GET.getlist("media"))
+        if not job_ids and not media_ids:
+            return JsonResponse({"error": "job or media is required"}, status=400)
+        if len(job_ids) + len(media_ids) > settings.JOB_EVENTS_MAX_TOPICS:
+            return JsonResponse({"error": f"At most {settings.JOB_EVENTS_MAX_TOPICS} ids"}, status=400)
+        try:
+            topics = await sync_to_async(self._visible_topics)(user, job_ids, media_ids)
+        except ValidationError:
+            return JsonResponse({"error": "Invalid id"}, status=400)
+        if not topics:
+            return JsonResponse({"error": "Not found"}, status=404)
+
+        # Abonnement avant la lecture de l'état courant: une transition publiée entre les deux
+        # est reçue (au pire deux fois, l'état envoyé étant idempotent)
+        subscription = job_events.hub.subscribe(topics)
+        try:
+            snapshot = await sync_to_async(self._snapshot)(topics)
+        except BaseException:
+            job_events.hub.unsubscribe(subscription)
+            raise
+
+        response = StreamingHttpResponse(self.stream(subscription, snapshot), content_type="text/event-stream")
+        # Réponse fermée sans avoir été itérée (client parti): libérer l'abonnement
+        response._resource_closers.append(lambda: job_events.hub.unsubscribe(subscription))
+        response["Cache-Control"] = "no-cache"
+        # Pas de mise en tampon par nginx
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @staticmethod
+    async def stream(subscription, snapshot):
+        try:
+            yield "retry: 3000\n\n"
+            for event in snapshot:
+                yield f"event: job\ndata: {json.dumps(event)}\n\n"
+            while True:
+                event = await subscription.get(settings.JOB_EVENTS_HEARTBEAT_SECONDS)
+                if event is None:
+                    # Commentaire SSE: garde la connexion ouverte à travers les proxys
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: job\ndata: {json.dumps(event)}\n\n"
+        finally:
+            job_events.hub.unsubscribe(subscription)
+
+
+class JobEventStatsView(APIView):
+    """
+    Vue pour consulter les compteurs du flux d'événements des jobs (processus courant).
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(
+        summary="Job events counters",
+        description="Connexions SSE ouvertes / totales, événements publiés / remis / perdus, latence de diffusion.",
+        tags=["jobs"],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def get(self, request):
+        return Response(job_events.stats.snapshot())
+
+
+# ============ WEBHOOK ENDPOINTS ============
+
+class WebhookView(APIView):
+    """
+    Vue de réception des webhooks (ImageKit, transcodeur).
+    Vérifie la signature, enregistre l'événement brut et répond immédiatement;
+    le traitement est fait par `manage.py process_webhooks`.
+    """
+
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+
+    @extend_schema(
+        summary="Receive webhook",
+        description="""
+        Point d'entrée des webhooks signés (`t=<ms>,v1=<HMAC-SHA256>`).
+        Les redélivrances (même `id`) sont acceptées et ignorées.
+        """,
+        tags=["webhooks"],
+        request=OpenApiTypes.OBJECT,
+        responses={202: OpenApiTypes.OBJECT, 400: None, 401: None, 404: None},
+    )
+    def post(self, request, source):
+        try:
+            event_id = record_event(source, request.META, request.body)
+        except WebhookError as exc:
+            return Response({"error": str(exc)}, status=exc.status)
+        return Response({"received": event_id}, status=status.HTTP_202_ACCEPTED)
+
+
+# ============ EXPORT ENDPOINTS ============
+
+class ExportView(APIView):
+    """
+    Vue pour exporter Media / MediaJob en flux (CSV ou JSONL, gzip optionnel).
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(
+        summary="Export Media / MediaJob",
+        description="""
+        Exporte toutes les lignes du dataset (`media` ou `jobs`) en flux continu.
+        La mémoire du serveur reste constante quel que soit le nombre de lignes.
+        """,
+        tags=["export"],
+        parameters=[
+            OpenApiParameter("export_format", OpenApiTypes.STR, enum=list(EXPORT_FORMATS), default="jsonl"),
+            OpenApiParameter("gzip", OpenApiTypes.BOOL, default=False),
+            OpenApiParameter("since", OpenApiTypes.DATETIME, description="created_at >= since"),
+            OpenApiParameter("until", OpenApiTypes.DATETIME, description="created_at < until"),
+            OpenApiParameter("uploader", OpenApiTypes.UUID),
+            OpenApiParameter("file_type", OpenApiTypes.STR),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    def get(self, request, dataset):
+        if dataset not in DATASETS:
+            return Response({"error": f"Unknown dataset: {dataset}"}, status=404)
+
+        # "format" est réservé par DRF (URL_FORMAT_OVERRIDE)
+        fmt = request.query_params.get("export_format", "jsonl")
+        compress = request.query_params.get("gzip", "").lower() in ("1", "true")
+
+        try:
+            chunks = iter_export(
+                dataset,
+                fmt,
+                since=request.query_params.get("since"),
+                until=request.query_params.get("until"),
+                uploader=request.query_params.get("uploader"),
+                file_type=request.query_params.get("file_type"),
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        filename = f"{dataset}.{fmt}"
+        content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        if compress:
+            filename += ".gz"
+            content_type = "application/gzip"
+            body = gzip_stream(chunks)
+        else:
+            body = batch_stream(chunks)
+
+        response = StreamingHttpResponse(body, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
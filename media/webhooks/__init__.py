@@ -0,0 +1,7 @@
+"""
+Réception et traitement des webhooks (ImageKit, transcodeur).
+
+- ingest: vérification de signature et enregistrement brut (WebhookEvent), côté requête HTTP
+- registry: handlers par (source, type), traitement par lots, rejeu
+- chaque autre module enregistre ses handlers via registry.register_handler(source, event_type)
+"""
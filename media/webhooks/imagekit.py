@@ -0,0 +1,80 @@
+"""
+Handlers des webhooks ImageKit.
+Documentation: https://imagekit.io/docs/webhooks
+
+Les transformations asynchrones (vidéo, pré/post-transformations d'upload) sont suivies
+par un MediaJob dont idempotency_key vaut "imagekit:<x_request_id>".
+"""
+from django.utils import timezone
+
+from media.models import Media, MediaJob
+from media.services.storage_usage import apply_delta
+from media.webhooks.registry import register_handler, transition_job
+
+SOURCE = 'imagekit'
+
+
+def job_key(request_id: str) -> str:
+    return f"{SOURCE}:{request_id}"
+
+
+def _jobs_for(event):
+    request_id = (event.payload.get('request') or {}).get('x_request_id')
+    if not request_id:
+        return MediaJob.objects.none()
+    return MediaJob.objects.filter(idempotency_key=job_key(request_id))
+
+
+def _transformation(event) -> dict:
+    return (event.payload.get('data') or {}).get('transformation') or {}
+
+
+@register_handler(SOURCE, 'video.transformation.accepted')
+def transformation_accepted(event):
+    transition_job(_jobs_for(event), 'processing')
+
+
+@register_handler(SOURCE, 'video.transformation.ready', 'upload.post-transform.success')
+def transformation_ready(event):
+    data = event.payload.get('data') or {}
+    output = _transformation(event).get('output') or {}
+    transition_job(_jobs_for(event), 'completed', result_data={
+        'url': output.get('url') or data.get('url'),
+        'metadata': output.get('video_metadata') or {},
+        'webhook_event': event.event_id,
+    })
+
+
+@register_handler(SOURCE, 'video.transformation.error', 'upload.post-transform.error')
+def transformation_error(event):
+    error = _transformation(event).get('error') or {}
+    transition_job(_jobs_for(event), 'failed', error_message=error.get('reason') or event.event_type)
+
+
+@register_handler(SOURCE, 'upload.pre-transform.success')
+def pre_transform_success(event):
+    """Dimensions / taille finales du fichier après la pré-transformation"""
+    data = event.payload.get('data') or {}
+    file_id = data.get('fileId')
+    if not file_id:
+        return
+    fields = {
+        name: data[key]
+        for name, key in (('width', 'width'), ('height', 'height'), ('file_size', 'size'))
+        if data.get(key) is not None
+    }
+    # Affectation de valeurs absolues: rejouer l'événement donne le même résultat
+    for media in Media.objects.select_for_update().filter(imagekit_file_id=file_id):
+        if 'file_size' in fields and fields['file_size'] != media.file_size:
+            # update() ne déclenche pas les signaux: ajuster l'agrégat StorageUsage ici
+            apply_delta(media.uploader_id, media.file_type, 0, fields['file_size'] - media.file_size)
+        if any(getattr(media, name) != value for name, value in fields.items()):
+            # update() n'applique pas auto_now: updated_at sert de validateur HTTP (ETag)
+            Media.objects.filter(pk=media.pk).update(updated_at=timezone.now(), **fields)
+    transition_job(_jobs_for(event), 'completed', result_data={'file_id': file_id, 'webhook_event': event.event_id})
+
+
+@register_handler(SOURCE, 'upload.pre-transform.error')
+def pre_transform_error(event):
+    error = _transformation(event).get('error') or {}
+    transition_job(_jobs_for(event), 'failed', error_message=error.get('reason') or event.event_type)
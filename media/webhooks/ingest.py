@@ -0,0 +1,88 @@
+"""
+Réception d'un webhook: vérification de la signature et enregistrement brut.
+
+Aucun traitement métier ici: la requête se limite à un HMAC et un INSERT
+(ON CONFLICT DO NOTHING), le traitement est fait par le worker process_webhooks.
+
+Signature (format ImageKit, repris par le transcodeur):
+    <header>: t=<timestamp ms>,v1=<hex HMAC-SHA256(secret, "<t>.<corps brut>")>
+"""
+import hashlib
+import hmac
+import json
+import time
+from typing import Optional
+
+from django.conf import settings
+
+from media.models import WebhookEvent
+
+
+class WebhookError(Exception):
+    """Webhook refusé (signature, contenu); `status` est le code HTTP à renvoyer"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def get_source_config(source: str) -> Optional[dict]:
+    """Configuration de la source (None si inconnue ou sans secret)"""
+    config = settings.WEBHOOK_SOURCES.get(source)
+    if not config or not config.get('secret'):
+        return None
+    return config
+
+
+def verify_signature(secret: str, header: str, body: bytes, tolerance: int, now: Optional[float] = None) -> bool:
+    """Vérifier l'en-tête de signature (comparaison en temps constant, fenêtre anti-rejeu)"""
+    parts = dict(item.split('=', 1) for item in (header or '').split(',') if '=' in item)
+    timestamp, signature = parts.get('t'), parts.get('v1')
+    if not timestamp or not signature or not timestamp.isdigit():
+        return False
+    now = time.time() if now is None else now
+    if abs(now - int(timestamp) / 1000) > tolerance:
+        return False
+    expected = hmac.new(secret.encode(), timestamp.encode() + b'.' + body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def record_event(source: str, headers, body: bytes) -> str:
+    """
+    Vérifier puis enregistrer un webhook.
+
+    Args:
+        source: Nom de la source (clé de WEBHOOK_SOURCES)
+        headers: request.META
+        body: Corps brut de la requête
+
+    Returns:
+        Identifiant de l'événement (une redélivrance déjà enregistrée est ignorée)
+
+    Raises:
+        WebhookError: source inconnue (404), signature invalide (401), JSON invalide (400)
+    """
+    config = get_source_config(source)
+    if config is None:
+        raise WebhookError(f"Unknown webhook source: {source}", status=404)
+    if not verify_signature(config['secret'], headers.get(config['signature_header'], ''), body,
+                            settings.WEBHOOK_SIGNATURE_TOLERANCE):
+        raise WebhookError("Invalid signature", status=401)
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise WebhookError("Invalid JSON payload")
+    if not isinstance(payload, dict):
+        raise WebhookError("Invalid JSON payload")
+
+    # Sans identifiant fourni, le condensat du corps tient lieu de clé d'idempotence
+    event_id = str(payload.get('id') or hashlib.sha256(body).hexdigest())
+    event = WebhookEvent(
+        source=source,
+        event_id=event_id[:255],
+        event_type=str(payload.get('type', ''))[:100],
+        payload=payload,
+    )
+    # INSERT ... ON CONFLICT DO NOTHING: une redélivrance ne coûte ni erreur ni SELECT préalable
+    WebhookEvent.objects.bulk_create([event], ignore_conflicts=True)
+    return event_id
@@ -0,0 +1,151 @@
+"""
+Registre des handlers de webhooks, traitement par lots et rejeu.
+
+Un lot est traité dans une seule transaction: les effets des handlers et le passage
+des événements en 'processed' sont validés ensemble. Chaque événement a son
+savepoint, un handler en erreur n'annule pas les autres.
+Un événement en échec est retenté après un délai exponentiel (next_attempt_at),
+puis passe 'failed' après WEBHOOK_MAX_ATTEMPTS tentatives.
+"""
+import importlib
+import logging
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from media.jobs.pipelines import cancel_dependents, release_dependents
+from media.models import MediaJob, WebhookEvent
+from media.services.job_events import publish_job_event
+
+logger = logging.getLogger(__name__)
+
+# Modules importés au démarrage du worker pour enregistrer leurs handlers
+HANDLER_MODULES = [
+    'media.webhooks.imagekit',
+    'media.webhooks.transcoder',
+]
+
+EVENT_HANDLERS: Dict[Tuple[str, str], Callable[[WebhookEvent], None]] = {}
+
+# Transitions de MediaJob autorisées depuis un webhook: un événement rejoué ou arrivé
+# après un état plus avancé ne modifie rien
+JOB_TRANSITIONS = {
+    'processing': ['pending'],
+    'completed': ['pending', 'processing'],
+    'failed': ['pending', 'processing'],
+}
+
+
+def register_handler(source: str, *event_types: str):
+    """Décorateur: enregistrer la fonction comme handler des types d'événement de la source"""
+    def decorator(func):
+        for event_type in event_types:
+            EVENT_HANDLERS[(source, event_type)] = func
+        return func
+    return decorator
+
+
+def load_handlers() -> None:
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+def transition_job(jobs, status: str, **fields) -> int:
+    """
+    Passer les jobs au statut donné si leur statut actuel le permet (UPDATE conditionnel).
+    Les jobs sont verrouillés avant la mise à jour: événements et successeurs ne concernent
+    que les jobs effectivement modifiés, pas ceux passés entre-temps à un autre statut.
+
+    Returns:
+        Nombre de jobs modifiés (0 si l'effet a déjà été appliqué)
+    """
+    now = timezone.now()
+    if status == 'processing':
+        fields.setdefault('started_at', now)
+    elif status in ('completed', 'failed'):
+        fields.setdefault('completed_at', now)
+    with transaction.atomic():
+        targets = list(
+            MediaJob.objects.select_for_update()
+            .filter(pk__in=list(jobs.values_list('pk', flat=True)), status__in=JOB_TRANSITIONS[status])
+            .order_by('pk')
+            .values_list('pk', 'media_id', 'job_type')
+        )
+        if not targets:
+            return 0
+        job_ids = [pk for pk, _, _ in targets]
+        MediaJob.objects.filter(pk__in=job_ids).update(status=status, updated_at=now, **fields)
+        for pk, media_id, job_type in targets:
+            publish_job_event(pk, media_id, status, job_type)
+        # Successeurs du pipeline: libérés ou annulés dans la même transaction
+        if status == 'completed':
+            release_dependents(job_ids)
+        elif status == 'failed':
+            cancel_dependents(job_ids, "Dépendance en échec")
+    return len(targets)
+
+
+def retry_delay(attempts: int) -> float:
+    """Délai (s) avant la tentative suivante d'un événement: exponentiel, plafonné"""
+    return min(settings.WEBHOOK_RETRY_MAX_DELAY, settings.WEBHOOK_RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0))
+
+
+def process_event(event: WebhookEvent) -> None:
+    """Exécuter le handler d'un événement et mettre à jour son état (sans sauvegarder)"""
+    event.attempts += 1
+    handler = EVENT_HANDLERS.get((event.source, event.event_type))
+    if handler is None:
+        event.status = 'ignored'
+        event.processed_at = timezone.now()
+        return
+    try:
+        with transaction.atomic():
+            handler(event)
+    except Exception as exc:
+        logger.error(f"Webhook {event.pk} ({event.source}:{event.event_type}) failed: {exc}", exc_info=True)
+        event.last_error = str(exc)
+        if event.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+            event.status = 'failed'
+            event.next_attempt_at = None
+        else:
+            event.status = 'pending'
+            event.next_attempt_at = timezone.now() + timedelta(seconds=retry_delay(event.attempts))
+        return
+    event.status = 'processed'
+    event.processed_at = timezone.now()
+    event.last_error = ''
+    event.next_attempt_at = None
+
+
+def process_pending(batch_size: int, sources: Optional[List[str]] = None) -> List[WebhookEvent]:
+    """
+    Traiter jusqu'à `batch_size` événements en attente et dus (next_attempt_at passé), dans l'ordre de réception.
+    SKIP LOCKED (PostgreSQL) permet à plusieurs workers de se partager la file.
+    """
+    with transaction.atomic():
+        queryset = WebhookEvent.objects.select_for_update(skip_locked=True).filter(
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=timezone.now()), status='pending',
+        )
+        if sources:
+            queryset = queryset.filter(source__in=sources)
+        events = list(queryset.order_by('id')[:batch_size])
+        for event in events:
+            process_event(event)
+        WebhookEvent.objects.bulk_update(events, ['status', 'attempts', 'processed_at', 'last_error', 'next_attempt_at'])
+    return events
+
+
+def replay_events(events) -> int:
+    """
+    Remettre des événements en file (rejeu). Les handlers étant idempotents,
+    rejouer un événement déjà traité ne modifie rien.
+
+    Returns:
+        Nombre d'événements remis en attente
+    """
+    return events.update(status='pending', attempts=0, processed_at=None, last_error='', next_attempt_at=None)
+
@@ -0,0 +1,37 @@
+"""
+Handlers des callbacks du service de transcodage.
+
+Contenu attendu:
+    {"id": "...", "type": "job.started|job.completed|job.failed",
+     "job_id": "<uuid du MediaJob>", "result": {...}, "error": "..."}
+"""
+import uuid
+
+from media.models import MediaJob
+from media.webhooks.registry import register_handler, transition_job
+
+SOURCE = 'transcoder'
+
+
+def _jobs_for(event):
+    try:
+        job_id = uuid.UUID(str(event.payload.get('job_id')))
+    except ValueError:
+        return MediaJob.objects.none()
+    return MediaJob.objects.filter(pk=job_id)
+
+
+@register_handler(SOURCE, 'job.started')
+def job_started(event):
+    transition_job(_jobs_for(event), 'processing')
+
+
+@register_handler(SOURCE, 'job.completed')
+def job_completed(event):
+    result = dict(event.payload.get('result') or {}, webhook_event=event.event_id)
+    transition_job(_jobs_for(event), 'completed', result_data=result)
+
+
+@register_handler(SOURCE, 'job.failed')
+def job_failed(event):
+    transition_job(_jobs_for(event), 'failed', error_message=str(event.payload.get('error') or 'failed'))